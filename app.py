@@ -1,15 +1,14 @@
 import streamlit as st
-from tests.kendall import kendall_tau_simplifie
-from tests.mann_whitney import run_mann_whitney_test
-from utils.visualisation import afficher_nuage_points
-from tests.pearson import run_pearson_test
-from tests.spearman import run_spearman_test
-from tests.one_way_anova import run_one_way_anova
-from tests.wilcoxon import run_wilcoxon_test
-from tests.bartlett import run_bartlett_test
-from tests.levene import run_levene_test
-from tests.proportion import run_proportion_test
-from tests.chi2_independance import run_chi2_indep_test
+from tests.registry import (SAISIES_SEGMENTS, TESTS, charger_graphique, charger_incremental, charger_moniteur,
+                            charger_runner, limite_bootstrap)
+from utils.cache import cached_figure, cached_frame, cached_result, cached_stream, data_digest, file_digest
+from utils.multiple_testing import CORRECTIONS
+from utils.profiling import JOURNAL, stage, start_run
+
+# Profilage facultatif (panneau en bas de la barre latérale) : temps de chaque étape de cette exécution du script
+profil = start_run(enabled=st.session_state.get("profilage", False),
+                   cprofile=st.session_state.get("profilage_cprofile", False),
+                   memory=st.session_state.get("profilage_memoire", False))
 
 
 
@@ -22,9 +21,9 @@ st.title("📊 Application de test statistique")
 st.sidebar.header("🧪 Choix du test")
 
 
-# Liste des tests disponibles (à étendre)
-test_choisi = st.sidebar.selectbox("Sélectionner un test :", ["Test de Kendall Tau simplifié", "Test de Mann-Whitney", "Test de Pearson", "Test de Spearman", "Test One-Way ANOVA", "Test de Wilcoxon","Test de Bartlett (égalité des variances)","Test de Levene","Test de proportion","Test du χ² d’indépendance",
-])
+# Liste des tests disponibles (déclarés dans tests/registry.py)
+test_choisi = st.sidebar.selectbox("Sélectionner un test :", list(TESTS))
+spec = TESTS[test_choisi]
 
 alpha = st.sidebar.number_input(
     "Seuil de signification α",
@@ -32,612 +31,246 @@ alpha = st.sidebar.number_input(
     step=0.005, format="%.3f"
 )
 
+# Tests de rangs : p-value complémentaire tirée de la loi de permutation (exacte pour les petits effectifs)
+par_permutation = spec.get("permutation", False) and st.sidebar.checkbox(
+    "🎲 p-value par permutation",
+    help="Loi de la statistique sous H₀ énumérée exactement si possible, sinon estimée par tirages aléatoires.")
+
 uploaded_file = st.sidebar.file_uploader("📤 Importer un fichier de données (.csv, .xls)", type=["csv","xls"])
 imported_data = None
+mode_flux = False
+
+# Tests capables de lire le fichier par blocs, sans le charger entièrement
+TESTS_FLUX = [nom for nom, s in TESTS.items() if s["flux"]]
+SEUIL_FLUX = 50 * 1024 * 1024  # au-delà de 50 Mo, la lecture par blocs est proposée par défaut
 
 if uploaded_file:
     import pandas as pd
-    try:
-        imported_data = pd.read_csv(uploaded_file)
-        st.sidebar.success("✅ Données importées avec succès")
-    except Exception as e:
-        st.sidebar.error(f"Erreur de lecture du fichier : {e}")
-
-
-##si on selectionne un test de kendall
-if test_choisi == "Test de Kendall Tau simplifié":
-    st.markdown("## 🔹 Test de Kendall Tau simplifié (corrélation de rangs)")
-
-    x = []
-    y = []
-
-    if imported_data is not None:
-        if list(imported_data.columns)[:2] == ['X', 'Y']:
-            try:
-                x = list(imported_data['X'].dropna())
-                y = list(imported_data['Y'].dropna())
-                st.success("✅ Données importées automatiquement depuis le fichier CSV")
-            except Exception as e:
-                st.error(f"Erreur dans le format des données importées : {e}")
-        else:
-            st.warning("⚠️ Les colonnes attendues sont : X et Y")
-
-    n = min(len(x), len(y)) if x and y else st.number_input("Taille des séries", min_value=3, max_value=100, value=5, step=1, key="n_kendall")
-    
-
-    with st.form("form_kendall"):
-        st.markdown("### 📥 Données des variables")
-        col1, col2 = st.columns(2)
-
-        for i in range(n):
-            with col1:
-                xi = st.number_input(f"x[{i+1}]", value=x[i] if i < len(x) else 0.0, key=f"px_{i}")
-            with col2:
-                yi = st.number_input(f"y[{i+1}]", value=y[i] if i < len(y) else 0.0, key=f"py_{i}")
-            if i >= len(x):
-                x.append(xi)
-                y.append(yi)
-            else:
-                x[i] = xi
-                y[i] = yi
-
-        submit = st.form_submit_button("✅ Exécuter le test")
-
-    if submit:
+    if test_choisi in TESTS_FLUX:
+        mode_flux = st.sidebar.checkbox("⚡ Lecture par blocs (gros fichiers)", value=uploaded_file.size > SEUIL_FLUX,
+                                        help="Ne lit que les colonnes utiles au test, bloc par bloc, sans charger le fichier en mémoire.")
+    if mode_flux:
+        st.sidebar.info("ℹ️ Le fichier sera lu par blocs à l’exécution du test")
+    else:
         try:
-            tau, c, d, z, z_crit, conclusion = kendall_tau_simplifie(x, y, alpha)
-
-            st.markdown("### ✅ Résultats du test")
-            st.write(f"**Tau simplifié** : {tau:.4f}")
-            st.write(f"**Nombre de paires concordantes** : {c}")
-            st.write(f"**Nombre de paires discordantes** : {d}")
-            st.write(f"**Statistique de test Z** : {z:.4f}")
-            st.write(f"**Valeur critique à α = {alpha:.2f}** : ±{z_crit}")
-            st.info(conclusion)
-
-            with st.expander("🔍 Détails des calculs"):
-                st.markdown(f"""
-                - Nombre total de paires comparées : {c + d}
-                - Tau = (C - D) / (C + D) = ({c} - {d}) / ({c + d}) = {tau:.4f}
-                - Variance de τ sous H₀ : Var(τ) = 2(2n + 5) / (9n(n - 1))  
-                → Var(τ) = {((2 * (2 * n + 5)) / (9 * n * (n - 1))):.6f}
-                - Statistique Z = τ / √Var(τ) = {z:.4f}
-                - Valeur critique pour α = {alpha:.2f} : ±{z_crit}
-                """)
-
-
-            # Optionnel : nuage de points
-            from utils.visualisation import afficher_nuage_points
-            fig = afficher_nuage_points(x, y)
-            st.markdown("### 📊 Nuage de points (x vs y)")
-            st.pyplot(fig)
-
+            imported_data = cached_frame(uploaded_file, pd.read_csv)
+            st.sidebar.success("✅ Données importées avec succès")
         except Exception as e:
-            st.error(f"Erreur : {e}")
+            st.sidebar.error(f"Erreur de lecture du fichier : {e}")
 
+# Table longue : le test est exécuté sur chaque segment défini par des colonnes clés
+par_segments = imported_data is not None and spec["saisie"] in SAISIES_SEGMENTS and st.sidebar.checkbox(
+    "🧩 Un test par segment (table longue)",
+    help="Découpe le fichier selon une ou plusieurs colonnes clés (pays, jour, bras…) et exécute le test sur chaque segment.")
 
-##si on selectionne un test de Mann-whitney
-elif test_choisi == "Test de Mann-Whitney":
-    st.markdown("## 🔹 Test de Mann-Whitney")
+# Suivi séquentiel : chaque fichier importé s'ajoute comme nouveau lot à l'état du test gardé dans la session
+par_suivi = imported_data is not None and "suivi" in spec and not par_segments and st.sidebar.checkbox(
+    "📡 Suivi séquentiel (lots successifs)",
+    help="Chaque fichier ajouté complète les précédents sans tout recalculer ; la décision reste valide malgré "
+         "les consultations répétées.")
 
-    ech1 = []
-    ech2 = []
+# Intervalle de confiance bootstrap de la statistique ; les valeurs brutes sont nécessaires (pas d'accumulateurs)
+valeurs_brutes = not mode_flux or spec["flux"] == "colonnes"
+par_bootstrap = spec.get("bootstrap", False) and valeurs_brutes and not par_segments and st.sidebar.checkbox(
+    "📏 Intervalle de confiance bootstrap",
+    help="Intervalle BCa de niveau 1 - α, estimé sur 10 000 rééchantillons.")
+profil.lap("widgets")
 
-    # 🔹 Données importées automatiquement si dispo
-    if imported_data is not None:
-        if list(imported_data.columns)[:2] == ['A', 'B']:
-            try:
-                ech1 = list(imported_data['A'].dropna())
-                ech2 = list(imported_data['B'].dropna())
-                st.success("✅ Données importées automatiquement depuis le fichier CSV")
-            except Exception as e:
-                st.error(f"Erreur dans le format des données importées : {e}")
-        else:
-            st.warning("⚠️ Les colonnes attendues sont : A et B")
 
-    n1 = len(ech1) if ech1 else st.number_input("Taille de l’échantillon 1", min_value=2, max_value=100, value=5, step=1, key="n1_mw")
-    n2 = len(ech2) if ech2 else st.number_input("Taille de l’échantillon 2", min_value=2, max_value=100, value=5, step=1, key="n2_mw")
+def barre_progression(texte="📥 Lecture du fichier par blocs…"):
+    barre = st.progress(0.0, text=texte)
+    return lambda fraction: barre.progress(fraction, text=texte)
 
-    with st.form("form_mann_whitney"):
-        st.markdown("### 📥 Données des échantillons")
-        col1, col2 = st.columns(2)
 
-        for i in range(n1):
-            with col1:
-                xi = st.number_input(f"A[{i+1}]", value=ech1[i] if i < len(ech1) else 0.0, key=f"mw_a_{i}")
-            if i >= len(ech1):
-                ech1.append(xi)
-            else:
-                ech1[i] = xi
+def saisie_tableau(cle, colonnes, donnees=None, lignes=5):
+    """Grille de saisie éditable (une colonne par série, collage possible) ; renvoie chaque colonne sans les cases vides."""
+    import pandas as pd
+    if donnees is None:
+        donnees = pd.DataFrame({col: [0.0] * lignes for col in colonnes})
+    tableau = st.data_editor(
+        donnees, num_rows="dynamic", use_container_width=True, key=cle,
+        column_config={col: st.column_config.NumberColumn(str(col)) for col in colonnes},
+    )
+    with stage("conversions"):
+        return [pd.to_numeric(tableau[col], errors="coerce").dropna().to_numpy(dtype=float) for col in colonnes]
 
-        for i in range(n2):
-            with col2:
-                yi = st.number_input(f"B[{i+1}]", value=ech2[i] if i < len(ech2) else 0.0, key=f"mw_b_{i}")
-            if i >= len(ech2):
-                ech2.append(yi)
-            else:
-                ech2[i] = yi
 
-        submit = st.form_submit_button("✅ Exécuter le test")
+def cle_donnees(*series, colonnes=()):
+    """Clé des données du test : contenu du fichier en lecture par blocs, sinon valeurs saisies."""
+    if mode_flux:
+        return ("flux", file_digest(uploaded_file), tuple(colonnes))
+    return data_digest(*series)
 
-    if submit:
-        try:
-            result = run_mann_whitney_test(ech1, ech2, alpha)
-
-            st.markdown("### ✅ Résultats du test")
-            st.write(f"**U1** : {result['U1']}")
-            st.write(f"**U2** : {result['U2']}")
-            st.write(f"**U observé** : {result['U_obs']}")
-            st.write(f"**Z** : {result['z']}")
-            st.write(f"**Valeur critique à α = {alpha:.2f}** : ±{result['z_crit']}")
-            st.info(result['conclusion'])
-
-            with st.expander("🔍 Détails des calculs"):
-                st.markdown(f"""
-                - W1 (somme des rangs de l’échantillon 1) : {result['W1']}  
-                - W2 (somme des rangs de l’échantillon 2) : {result['W2']}  
-
-                $$
-                U_1 = W_1 - \\frac{{n_1(n_1 + 1)}}{{2}} = {result['U1']} \\\\
-                U_2 = W_2 - \\frac{{n_2(n_2 + 1)}}{{2}} = {result['U2']} \\\\
-                U = \\min(U_1, U_2) = {result['U_obs']}
-                $$
-
-                - Moyenne de U sous H₀ : μ = {result['mu_U']}  
-                - Écart-type de U sous H₀ : σ = {result['sigma_U']}  
-
-                $$
-                Z = \\frac{{U - \\mu}}{{\\sigma}} = \\frac{{{result['U_obs']} - {result['mu_U']}}}{{{result['sigma_U']}}} = {result['z']}
-                $$
-
-                - Zone de non-rejet : ±{result['z_crit']}
-                """, unsafe_allow_html=True)
-
-            from utils.visualisation import afficher_boxplot
-            fig = afficher_boxplot(ech1, ech2)
-            st.markdown("### 📊 Boxplot des deux échantillons")
-            st.pyplot(fig)
 
-        except Exception as e:
-            st.error(f"Erreur : {e}")
+def executer(cle, calcul):
+    """Résultat du test, recalculé seulement si le test, les données ou α ont changé."""
+    return cached_result((test_choisi, cle, alpha), calcul)
 
 
-#si test de  Pearson
-elif test_choisi == "Test de Pearson":
-    st.markdown("## 🔹 Test de corrélation linéaire de Pearson")
+def afficher_figure(cle, tracer):
+    """Affiche la figure du test, rendue une seule fois pour ces données."""
+    st.image(cached_figure((test_choisi, cle), tracer), use_container_width=True)
 
-    x = []
-    y = []
 
-    if imported_data is not None:
-        if list(imported_data.columns)[:2] == ['X', 'Y']:
-            try:
-                x = list(imported_data['X'].dropna())
-                y = list(imported_data['Y'].dropna())
-                st.success("✅ Données importées automatiquement depuis le fichier CSV")
-            except Exception as e:
-                st.error(f"Erreur dans le format des données importées : {e}")
-        else:
-            st.warning("⚠️ Les colonnes attendues sont : X et Y")
-
-    n = min(len(x), len(y)) if x and y else st.number_input("Taille des séries", min_value=3, max_value=100, value=5, step=1, key="n_pearson")
-    
-
-    with st.form("form_pearson"):
-        st.markdown("### 📥 Données des variables")
-        col1, col2 = st.columns(2)
-
-        for i in range(n):
-                with col1:
-                    xi = st.number_input(f"x[{i+1}]", value=x[i] if i < len(x) else 0.0, key=f"px_{i}")
-                with col2:
-                    yi = st.number_input(f"y[{i+1}]", value=y[i] if i < len(y) else 0.0, key=f"py_{i}")
-                if i >= len(x):
-                    x.append(xi)
-                    y.append(yi)
-                else:
-                    x[i] = xi
-                    y[i] = yi
+def afficher_permutation(result):
+    """Ligne de la p-value de permutation, quand elle a été calculée."""
+    loi = result.get("permutation")
+    if loi is None:
+        return
+    if loi["exact"]:
+        methode = f"loi exacte, {loi['n_resamples']} configurations"
+    else:
+        methode = f"{loi['n_resamples']} permutations" + (", arrêt anticipé" if loi["stopped_early"] else "")
+    st.write(f"**p-value par permutation** : {loi['p_value']:.4g} ({methode})")
 
-        submit = st.form_submit_button("✅ Exécuter le test")
 
-    if submit:
-        try:
-            result = run_pearson_test(x, y, alpha)
-
-            st.markdown("### ✅ Résultats du test")
-            st.write(f"**Coefficient r** : {result['r']}")
-            st.write(f"**Statistique de test t** : {result['t_obs']}")
-            st.write(f"**Valeur critique à α = {alpha:.2f}** : ±{result['t_crit']} (ddl = {result['ddl']})")
-            st.info(result['conclusion'])
-
-            with st.expander("🔍 Détails des calculs"):
-                st.markdown(f"""
-                - Moyenne de X : {result['x_bar']}  
-                - Moyenne de Y : {result['y_bar']}  
-                - Formule du r :  
-                    $$
-                    r = \\frac{{\\sum (x_i - \\bar{{x}})(y_i - \\bar{{y}})}}{{\\sqrt{{\\sum (x_i - \\bar{{x}})^2}} \\cdot \\sqrt{{\\sum (y_i - \\bar{{y}})^2}}}} = {result['r']}
-                    $$
-                - Statistique t :
-                    $$
-                    t = \\frac{{r \\cdot \\sqrt{{n - 2}}}}{{\\sqrt{{1 - r^2}}}} = {result['t_obs']}
-                    $$
-                - Valeur critique (bilatéral) : ±{result['t_crit']} pour ddl = {result['ddl']}
-                """)
-
-            from utils.visualisation import afficher_nuage_points
-            fig = afficher_nuage_points(x, y)
-            st.markdown("### 📊 Nuage de points (x vs y)")
-            st.pyplot(fig)
+def afficher_bootstrap(ic, nom):
+    """Ligne de l'intervalle de confiance bootstrap de la statistique, quand il a été calculé."""
+    if ic is None:
+        return
+    st.write(f"**IC bootstrap à {ic['confidence']:.0%} de {nom}** : [{ic['ci_low']:.4f} ; {ic['ci_high']:.4f}] "
+             f"({ic['method'].upper()}, {ic['n_resamples']} rééchantillons, erreur standard {ic['std_error']:.4f})")
 
-        except Exception as e:
-            st.error(f"Erreur : {e}")
+
+BOUTON = "✅ Exécuter le test"
 
 
-#si test de  Spearmann
-elif test_choisi == "Test de Spearman":
-    st.markdown("## 🔹 Test de corrélation de Spearman (implémenté manuellement)")
+# ---------- Saisie des données (une fonction par mode de saisie du registre) ----------
+# Chaque fonction renvoie (soumis, donnees) ; donnees["args"] sont passés à la fonction du test, avec les arguments
+# nommés de donnees["precalcul"] (quantités tenues à jour par un état incrémental), et donnees["graphe"] à la
+# fonction de tracé (None quand les valeurs brutes ne sont pas conservées).
 
-    x = []
-    y = []
+def saisie_paires():
+    """Deux colonnes (X/Y ou A/B) : fichier importé, lecture par blocs ou grille."""
+    col1, col2 = spec["colonnes"]
+    donnees = None
 
     if imported_data is not None:
-        if list(imported_data.columns)[:2] == ['X', 'Y']:
+        if list(imported_data.columns)[:2] == [col1, col2]:
             try:
-                x = list(imported_data['X'].dropna())
-                y = list(imported_data['Y'].dropna())
+                donnees = imported_data[[col1, col2]]
                 st.success("✅ Données importées automatiquement depuis le fichier CSV")
             except Exception as e:
                 st.error(f"Erreur dans le format des données importées : {e}")
         else:
-            st.warning("⚠️ Les colonnes attendues sont : X et Y")
-
-    n = min(len(x), len(y)) if x and y else st.number_input("Taille des séries", min_value=3, max_value=100, value=5, step=1, key="n_pearson")
-    
-
-    with st.form("form_spearman"):
-        st.markdown("### 📥 Données des variables")
-        col1, col2 = st.columns(2)
-
-        for i in range(n):
-            with col1:
-                xi = st.number_input(f"x[{i+1}]", value=x[i] if i < len(x) else 0.0, key=f"px_{i}")
-            with col2:
-                yi = st.number_input(f"y[{i+1}]", value=y[i] if i < len(y) else 0.0, key=f"py_{i}")
-            if i >= len(x):
-                x.append(xi)
-                y.append(yi)
-            else:
-                x[i] = xi
-                y[i] = yi
-        submit = st.form_submit_button("✅ Exécuter le test")
-
-    if submit:
-        try:
-            result = run_spearman_test(x, y, alpha)
-
-            st.markdown("### ✅ Résultats du test")
-            st.write(f"**Coefficient ρ (rho)** : {result['rho']}")
-            st.write(f"**Statistique de test Z** : {result['z']}")
-            if result['z_crit']:
-                st.write(f"**Valeur critique à α = {alpha:.2f}** : ±{result['z_crit']}")
-            st.info(result['conclusion'])
-
-            with st.expander("🔍 Détails des calculs"):
-                st.markdown(f"""
-                - Rang(x) : {result['rangs_x']}
-                - Rang(y) : {result['rangs_y']}
-                - d² = (rangX - rangY)² : {result['d²']}
-                - ∑ d² = {result['sum_d2']}
-                - ρ = 1 - (6 × ∑d²) / n(n² - 1)
-                  = 1 - (6 × {result['sum_d2']}) / {n}({n}² - 1) = {result['rho']}
-                """)
-                if result['z'] != "N/A":
-                    st.markdown(f"""
-                    - Approximation normale : z = ρ × √(n - 1)
-                      = {result['rho']} × √({n} - 1) = {result['z']}
-                    - Zone de rejet : ±{result['z_crit']}
-                    """)
-
-            from utils.visualisation import afficher_nuage_points
-            fig = afficher_nuage_points(x, y)
-            st.markdown("### 📊 Nuage de points (x vs y)")
-            st.pyplot(fig)
-
-        except Exception as e:
-            st.error(f"Erreur : {e}")
-
-# si test one Way Anova
-elif test_choisi == "Test One-Way ANOVA":
-    st.markdown("## 🔹 Test One-Way ANOVA (analyse de variance à un facteur)")
-
-    groups = []
-    column_labels = []
+            st.warning(f"⚠️ Les colonnes attendues sont : {col1} et {col2}")
 
-    if imported_data is not None:
+    if mode_flux:
+        if not st.button(spec.get("bouton", BOUTON), key=f"flux_{spec['cle']}"):
+            return False, None
         try:
-            # On lit chaque colonne comme un groupe (valeurs numériques seulement)
-            for col in imported_data.columns:
-                groupe_valide = imported_data[col].dropna().tolist()
-                if len(groupe_valide) >= 2:
-                    groups.append(groupe_valide)
-                    column_labels.append(str(col))
-            nb_groupes = len(groups)
-            st.success(f"✅ {nb_groupes} groupes importés automatiquement depuis le fichier CSV")
+            if spec["flux"] == "paire":
+                from utils.ingestion import stream_pair
+                # Moyennes, sommes des carrés et co-moment accumulés bloc par bloc
+                acc = cached_stream(uploaded_file, ("paire", col1, col2),
+                                    lambda: stream_pair(uploaded_file, col1, col2, progress=barre_progression()))
+                return True, {"args": (acc, None), "n": acc.n, "graphe": None}
+            from utils.ingestion import stream_columns
+            colonnes = cached_stream(uploaded_file, ("colonnes", col1, col2),
+                                     lambda: stream_columns(uploaded_file, [col1, col2], progress=barre_progression()))
+            x, y = colonnes[col1], colonnes[col2]
         except Exception as e:
-            st.error(f"Erreur lors de l’importation des groupes : {e}")
-            nb_groupes = st.number_input("Nombre de groupes à comparer", min_value=2, max_value=10, value=3, step=1)
+            st.error(f"Erreur lors de la lecture par blocs : {e}")
+            return False, None
     else:
-        nb_groupes = st.number_input("Nombre de groupes à comparer", min_value=2, max_value=10, value=3, step=1)
-
-    if not groups:  # si pas importé
-        groups = []
-        column_labels = []
-        for g in range(nb_groupes):
-            group_size = st.number_input(f"Nombre d’observations dans le groupe {g+1}", min_value=2, max_value=100, value=3, step=1, key=f"taille_g{g}")
-            group_data = []
-            with st.expander(f"📥 Saisir les données pour le groupe {g+1}"):
-                for i in range(group_size):
-                    val = st.number_input(f"Groupe {g+1} - Valeur {i+1}", key=f"g{g}_v{i}")
-                    group_data.append(val)
-            groups.append(group_data)
-            column_labels.append(f"Groupe {g+1}")
-
-    if st.button("✅ Exécuter le test"):
-        try:
-            result = run_one_way_anova(groups, alpha)
-
-            st.markdown("### ✅ Résultats du test")
-            st.write(f"**Statistique F observée** : {result['F_obs']}")
-            st.write(f"**Valeur critique F à α = {alpha:.2f}** : {result['F_crit']} "
-                     f"(ddl = {result['df_between']} ; {result['df_within']})")
-            st.info(result['conclusion'])
-
-            with st.expander("🔍 Détails des calculs"):
-                st.markdown(f"""
-                - Moyenne globale : **{result['overall_mean']}**
-                - Somme des carrés entre groupes : SS_inter = {result['ss_between']}
-                - Somme des carrés intra-groupes : SS_intra = {result['ss_within']}
-                - ddl inter : {result['df_between']}, ddl intra : {result['df_within']}
-                - MS_inter = SS_inter / ddl = {result['ms_between']}
-                - MS_intra = SS_intra / ddl = {result['ms_within']}
-
-                $$
-                F = \\frac{{MS_{{inter}}}}{{MS_{{intra}}}} = \\frac{{{result['ms_between']}}}{{{result['ms_within']}}} = {result['F_obs']}
-                $$
-
-                Zone de non-rejet : F < {result['F_crit']}
-                """, unsafe_allow_html=True)
-
-            # 📊 Graphe : Boxplot par groupe
-            from utils.visualisation import afficher_boxplot_groupes
-            fig = afficher_boxplot_groupes(groups, column_labels, titre="ANOVA")
-
-            st.markdown("### 📊 Visualisation des groupes")
-            st.pyplot(fig)
-
-        except Exception as e:
-            st.error(f"Erreur : {e}")
-
-
-#Si test de wilcoxon
-elif test_choisi == "Test de Wilcoxon":
-    st.markdown("## 🔹 Test de Wilcoxon signé-rang (données appariées)")
-
-    # Données chargées depuis un fichier (optionnel)
-    x = []
-    y = []
-
-    if imported_data is not None:
-        if list(imported_data.columns)[:2] == ['A', 'B']:
+        with st.form(f"form_{spec['cle']}"):
+            st.markdown(spec["entete_saisie"])
+            x, y = saisie_tableau(f"grille_{spec['cle']}", [col1, col2], donnees)
+            submit = st.form_submit_button(spec.get("bouton", BOUTON))
+        if not submit:
+            return False, None
+        if "incremental" in spec:
+            # État conservé d'une exécution à l'autre : seules les lignes modifiées ou ajoutées sont reprises
+            cle_etat = f"incremental_{spec['cle']}"
             try:
-                x = list(imported_data['A'].dropna())
-                y = list(imported_data['B'].dropna())
-                st.success("✅ Données importées automatiquement depuis le fichier CSV")
-            except Exception as e:
-                st.error(f"Erreur dans le format des données importées : {e}")
-        else:
-            st.warning("⚠️ Les colonnes attendues sont : A et B")
-
-    # Taille estimée automatiquement
-    n = min(len(x), len(y)) if x and y else st.number_input(
-        "Taille de l’échantillon (apparié)", min_value=2, max_value=100, value=5, step=1, key="n_wilcoxon")
-
-    with st.form("form_wilcoxon"):
-        st.markdown("### 📥 Données appariées")
-        col1, col2 = st.columns(2)
-
-        for i in range(n):
-            with col1:
-                xi = st.number_input(f"x[{i+1}]", value=x[i] if i < len(x) else 0.0, key=f"wx_{i}")
-            with col2:
-                yi = st.number_input(f"y[{i+1}]", value=y[i] if i < len(y) else 0.0, key=f"wy_{i}")
-            if i >= len(x):
-                x.append(xi)
-                y.append(yi)
-            else:
-                x[i] = xi
-                y[i] = yi
-
-        submit = st.form_submit_button("✅ Exécuter le test")
-
-    if submit:
-        try:
-            result = run_wilcoxon_test(x, y, alpha)
-
-            st.markdown("### ✅ Résultats du test")
-            st.write(f"**Somme des rangs positifs (R⁺)** : {result['R_pos']}")
-            st.write(f"**Somme des rangs négatifs (R⁻)** : {result['R_neg']}")
-            st.write(f"**Statistique W (observée)** : {result['W']}")
-            st.write(f"**Z calculé** : {result['z']}")
-            st.write(f"**Valeur critique à α = {alpha:.2f}** : ±{result['z_crit']}")
-            st.info(result['conclusion'])
-
-            with st.expander("🔍 Détails des calculs"):
-                st.markdown(f"""
-                - Nombre de paires effectives (≠ 0) : {len(result['ranks'])}
-                - Moyenne de W sous H₀ : μ = {result['mu_W']}
-                - Écart-type de W : σ = {result['sigma_W']}
-
-                $$
-                Z = \\frac{{W - \\mu}}{{\\sigma}} = \\frac{{{result['W']} - {result['mu_W']}}}{{{result['sigma_W']}}} = {result['z']}
-                $$
-
-                - Zone de non-rejet : ±{result['z_crit']}
-                """, unsafe_allow_html=True)
-
-            from utils.visualisation import afficher_diff_ligne
-            fig = afficher_diff_ligne(x, y)
-            st.markdown("### 📊 Visualisation des différences (y - x)")
-            st.pyplot(fig)
+                etat = st.session_state.get(cle_etat)
+                if etat is None:
+                    etat = st.session_state[cle_etat] = charger_incremental(test_choisi)(x, y)
+                else:
+                    etat.sync(x, y)
+            except ValueError as e:
+                st.session_state.pop(cle_etat, None)
+                st.error(f"Erreur : {e}")
+                return False, None
+            return True, {"args": (x, y), "precalcul": etat.precalcul(), "n": min(len(x), len(y)), "graphe": (x, y)}
 
-        except Exception as e:
-            st.error(f"Erreur : {e}")
+    return True, {"args": (x, y), "n": min(len(x), len(y)), "graphe": (x, y)}
 
-#Si test de Bartlett
-elif test_choisi == "Test de Bartlett (égalité des variances)":
-    st.markdown("## 🔹 Test de Bartlett (homogénéité des variances)")
 
+def saisie_groupes():
+    """Une colonne par groupe : fichier importé, lecture par blocs (accumulateurs) ou grille."""
     groups = []
     column_labels = []
 
-    if imported_data is not None:
-        try:
-            for col in imported_data.columns:
-                valeurs = imported_data[col].dropna().tolist()
-                if len(valeurs) >= 2:
-                    groups.append(valeurs)
-                    column_labels.append(str(col))
-            nb_groupes = len(groups)
-            st.success(f"✅ {nb_groupes} groupes importés automatiquement depuis le fichier CSV")
-        except Exception as e:
-            st.error(f"Erreur lors de l’importation des données : {e}")
-            nb_groupes = st.number_input("Nombre de groupes", min_value=2, max_value=10, value=3)
-    else:
-        nb_groupes = st.number_input("Nombre de groupes", min_value=2, max_value=10, value=3)
-
-    if not groups:
-        groups = []
-        column_labels = []
-        for g in range(nb_groupes):
-            group_size = st.number_input(f"Nombre d’observations dans le groupe {g+1}", min_value=2, max_value=100, value=3, step=1, key=f"taille_bartlett_g{g}")
-            group_data = []
-            with st.expander(f"📥 Saisir les données pour le groupe {g+1}"):
-                for i in range(group_size):
-                    val = st.number_input(f"Groupe {g+1} - Valeur {i+1}", key=f"bartlett_g{g}_v{i}")
-                    group_data.append(val)
-            groups.append(group_data)
-            column_labels.append(f"Groupe {g+1}")
-
-    if st.button("✅ Exécuter le test de Bartlett"):
+    if mode_flux:
+        if not st.button(spec.get("bouton", BOUTON), key=f"flux_{spec['cle']}"):
+            return False, None
+        from utils.ingestion import stream_deviations, stream_groups
         try:
-            result = run_bartlett_test(groups, alpha)
-
-            st.markdown("### ✅ Résultats du test")
-            st.write(f"**Statistique T observée** : {result['T']}")
-            st.write(f"**Valeur critique χ²({result['ddl']}) à α = {alpha:.2f}** : {result['chi2_crit']}")
-            st.info(result['conclusion'])
-
-            with st.expander("🔍 Détails des calculs"):
-                st.markdown(f"""
-                - Variances des groupes : {result['var_i']}  
-                - Taille des groupes : {result['n_i']}  
-                - Variance globale pondérée (sp²) : {result['sp2']}
-
-                $$
-                T = \\frac{{(N - k) \\cdot \\ln(s_p^2) - \\sum (n_i - 1) \\cdot \\ln(s_i^2)}}{{1 + \\frac{{1}}{{3(k - 1)}} \\left( \\sum \\frac{{1}}{{n_i - 1}} - \\frac{{1}}{{N - k}} \\right)}} = {result['T']}
-                $$
-
-                Zone de non-rejet : T < {result['chi2_crit']}
-                """, unsafe_allow_html=True)
-
-            # 📊 Graphe : Boxplot des groupes
-            from utils.visualisation import afficher_boxplot_groupes
-            fig = afficher_boxplot_groupes(groups, column_labels, titre="BartLett")
-            st.markdown("### 📊 Visualisation des variances par groupe")
-            st.pyplot(fig)
-
+            accumulateurs = cached_stream(uploaded_file, "groupes",
+                                          lambda: stream_groups(uploaded_file, progress=barre_progression()))
+            if spec["flux"] == "ecarts":
+                # Seconde passe : écarts absolus à la moyenne de chaque groupe
+                accumulateurs = cached_stream(
+                    uploaded_file, "ecarts",
+                    lambda: stream_deviations(uploaded_file, accumulateurs,
+                                              progress=barre_progression("📥 Seconde lecture (écarts à la moyenne)…")))
         except Exception as e:
-            st.error(f"Erreur : {e}")
-
-#Test de Levene
-elif test_choisi == "Test de Levene":
-    st.markdown("## 🔹 Test de Levene")
-
-    groups = []
-    column_labels = []
+            st.error(f"Erreur lors de la lecture par blocs : {e}")
+            return False, None
+        return True, {"args": (list(accumulateurs.values()),), "graphe": None}
 
     if imported_data is not None:
         try:
-            for col in imported_data.columns:
-                valeurs = imported_data[col].dropna().tolist()
-                if len(valeurs) >= 2:
-                    groups.append(valeurs)
-                    column_labels.append(str(col))
+            # On lit chaque colonne comme un groupe (valeurs numériques seulement)
+            with stage("conversions"):
+                for col in imported_data.columns:
+                    valeurs = imported_data[col].dropna().tolist()
+                    if len(valeurs) >= 2:
+                        groups.append(valeurs)
+                        column_labels.append(str(col))
             nb_groupes = len(groups)
             st.success(f"✅ {nb_groupes} groupes importés automatiquement depuis le fichier CSV")
         except Exception as e:
-            st.error(f"Erreur lors de l’importation des données : {e}")
-            nb_groupes = st.number_input("Nombre de groupes", min_value=2, max_value=10, value=3)
+            st.error(f"Erreur lors de l’importation des groupes : {e}")
+            nb_groupes = st.number_input("Nombre de groupes à comparer", min_value=2, max_value=10, value=3, step=1)
     else:
-        nb_groupes = st.number_input("Nombre de groupes", min_value=2, max_value=10, value=3)
-
-    if not groups:
-        groups = []
-        column_labels = []
-        for g in range(nb_groupes):
-            group_size = st.number_input(f"Nombre d’observations dans le groupe {g+1}", min_value=2, max_value=100, value=3, step=1, key=f"taille_levene_g{g}")
-            group_data = []
-            with st.expander(f"📥 Saisir les données pour le groupe {g+1}"):
-                for i in range(group_size):
-                    val = st.number_input(f"Groupe {g+1} - Valeur {i+1}", key=f"levene_g{g}_v{i}")
-                    group_data.append(val)
-            groups.append(group_data)
-            column_labels.append(f"Groupe {g+1}")
-
-    if st.button("✅ Exécuter le test de Levene"):
-        try:
-            result = run_levene_test(groups, alpha)
-
-            st.markdown("### ✅ Résultats du test")
-            st.write(f"**Statistique F observée** : {result['F_obs']}")
-            st.write(f"**Valeur critique F à α = {alpha:.2f}** : {result['F_crit']} "
-                     f"(ddl = {result['ddl_between']} ; {result['ddl_within']})")
-            st.info(result['conclusion'])
-
-            with st.expander("🔍 Détails des calculs"):
-                st.markdown(f"""
-                - Moyenne globale des |différences| : **{result['overall_mean']}**  
-                - Moyenne par groupe des |x - moyenne_groupe| : {result['group_means']}  
-                - MS_inter : {result['ms_between']}  
-                - MS_intra : {result['ms_within']}
-
-                $$
-                F = \\frac{{MS_{{inter}}}}{{MS_{{intra}}}} = \\frac{{{result['ms_between']}}}{{{result['ms_within']}}} = {result['F_obs']}
-                $$
-
-                Zone de non-rejet : F < {result['F_crit']}
-                """, unsafe_allow_html=True)
-
-            from utils.visualisation import afficher_boxplot_groupes
-            fig = afficher_boxplot_groupes(groups, column_labels, titre="Levene")
-            st.markdown("### 📊 Boxplot des groupes")
-            st.pyplot(fig)
-
-        except Exception as e:
-            st.error(f"Erreur : {e}")
-
-#Si test de proportion
-elif test_choisi == "Test de proportion":
-    st.markdown("## 🔹 Test de proportion (bilatéral)")
+        nb_groupes = st.number_input("Nombre de groupes à comparer", min_value=2, max_value=10, value=3, step=1)
 
+    if not groups:  # si pas importé
+        column_labels = [f"Groupe {g+1}" for g in range(nb_groupes)]
+        st.markdown("### 📥 Données des groupes (une colonne par groupe)")
+        groups = saisie_tableau(f"grille_{spec['cle']}_{nb_groupes}", column_labels, lignes=3)
+
+    if not st.button(spec.get("bouton", BOUTON)):
+        return False, None
+    return True, {"args": (groups,), "graphe": (groups, column_labels)}
+
+
+def saisie_proportions():
+    """Tableau importé de plusieurs tests (x, n, p0 ou x1, n1, x2, n2) : un test par ligne."""
+    from tests.proportion import run_proportion_table
+    deux = {"x1", "n1", "x2", "n2"} <= set(imported_data.columns)
+    st.success(f"✅ {len(imported_data)} ligne(s) importée(s) : "
+               + ("comparaison de deux proportions" if deux else "un test de proportion par ligne"))
+    st.dataframe(imported_data, use_container_width=True)
+    if not st.button(BOUTON):
+        return False, None
+    return True, {"args": (imported_data,), "graphe": None, "runner": run_proportion_table,
+                  "affichage": resultats_proportions}
+
+
+def saisie_proportion():
+    """Nombre de succès, taille d'échantillon et proportion attendue."""
     x = None
     n = None
     p0 = None
 
     # Si un CSV est importé avec colonnes "x" et "n"
     if imported_data is not None:
+        colonnes = set(imported_data.columns)
+        if {"x1", "n1", "x2", "n2"} <= colonnes or ({"x", "n"} <= colonnes and len(imported_data) > 1):
+            return saisie_proportions()
         try:
             if "x" in imported_data.columns and "n" in imported_data.columns:
                 x = int(imported_data["x"].iloc[0])
@@ -656,51 +289,54 @@ elif test_choisi == "Test de proportion":
         with col3:
             p0 = st.number_input("Proportion attendue (p₀)", min_value=0.0, max_value=1.0, value=p0 if p0 else 0.5, step=0.01)
 
-        submit = st.form_submit_button("✅ Exécuter le test")
-
-    if submit:
-        if x > n:
-            st.error("❌ Le nombre de succès (x) ne peut pas dépasser la taille de l’échantillon (n).")
+        submit = st.form_submit_button(BOUTON)
+
+    if not submit:
+        return False, None
+    if x > n:
+        st.error("❌ Le nombre de succès (x) ne peut pas dépasser la taille de l’échantillon (n).")
+        return False, None
+    return True, {"args": (x, n, p0), "graphe": (x, n)}
+
+
+def saisie_observations():
+    """Deux colonnes qualitatives, une ligne par observation : tableau construit par codes entiers et bincount."""
+    from utils.ingestion import read_header
+    colonnes = read_header(uploaded_file) if mode_flux else list(imported_data.columns)
+    col1, col2 = st.columns(2)
+    var_lignes = col1.selectbox("Variable en ligne", colonnes)
+    var_colonnes = col2.selectbox("Variable en colonne", colonnes, index=min(1, len(colonnes) - 1))
+    if not st.button(BOUTON):
+        return False, None
+    try:
+        if mode_flux:
+            from utils.ingestion import stream_contingency
+            table, row_labels, col_labels = cached_stream(
+                uploaded_file, ("contingence", var_lignes, var_colonnes),
+                lambda: stream_contingency(uploaded_file, var_lignes, var_colonnes,
+                                           progress=barre_progression()).table())
         else:
-            try:
-                result = run_proportion_test(x, n, p0, alpha)
-
-                st.markdown("### ✅ Résultats du test")
-                st.write(f"**Proportion observée** : p̂ = {result['p_hat']}")
-                st.write(f"**Erreur standard** : {result['std_error']}")
-                st.write(f"**Statistique Z observée** : {result['z']}")
-                st.write(f"**Valeur critique (bilatérale)** : ±{result['z_crit']}")
-                st.info(result['conclusion'])
-
-                with st.expander("🔍 Détails des calculs"):
-                    st.markdown(f"""
-                    $$
-                    Z = \\frac{{\\hat{{p}} - p_0}}{{\\sqrt{{\\frac{{p_0(1 - p_0)}}{{n}}}}}} = \\frac{{{result['p_hat']} - {p0}}}{{{result['std_error']}}} = {result['z']}
-                    $$
-
-                    Zone de non-rejet : ±{result['z_crit']}
-                    """, unsafe_allow_html=True)
-
-                # Bonus graphe
-                import matplotlib.pyplot as plt
-                fig, ax = plt.subplots()
-                ax.bar(["Succès", "Échecs"], [x, n - x], color=["green", "gray"])
-                ax.set_title("Répartition des succès et échecs")
-                st.markdown("### 📊 Visualisation")
-                st.pyplot(fig)
-
-            except Exception as e:
-                st.error(f"Erreur : {e}")
-
+            from utils.accumulators import ContingencyAccumulator
+            table, row_labels, col_labels = ContingencyAccumulator.from_values(
+                imported_data[var_lignes], imported_data[var_colonnes]).table()
+    except Exception as e:
+        st.error(f"Erreur lors de la construction du tableau : {e}")
+        return False, None
+    return True, {"args": (table,), "lignes": row_labels, "colonnes": col_labels, "graphe": None,
+                  "colonnes_lues": (var_lignes, var_colonnes)}
 
-#Si test d'independance de KHi-2 
-elif test_choisi == "Test du χ² d’indépendance":
-    st.markdown("## 🔹 Test du χ² d’indépendance (variables qualitatives)")
 
+def saisie_contingence():
+    """Tableau de contingence importé ou saisi cellule par cellule, ou construit à partir de deux colonnes qualitatives."""
     table = []
     row_labels = []
     col_labels = []
 
+    if mode_flux or (imported_data is not None and st.radio(
+            "Format du fichier", ["Tableau de contingence", "Une ligne par observation (deux colonnes qualitatives)"],
+            horizontal=True) != "Tableau de contingence"):
+        return saisie_observations()
+
     if imported_data is not None:
         try:
             df = imported_data.dropna(how="all").dropna(axis=1, how="all")
@@ -729,24 +365,579 @@ elif test_choisi == "Test du χ² d’indépendance":
         col_labels = [f"C{j+1}" for j in range(nb_cols)]
         row_labels = [f"L{i+1}" for i in range(nb_rows)]
 
-    if st.button("✅ Exécuter le test"):
-        try:
-            result = run_chi2_indep_test(table, alpha)
-
-            st.markdown("### ✅ Résultats du test")
-            st.write(f"**Statistique χ² observée** : {result['chi2']}")
-            st.write(f"**Valeur critique à α = {alpha:.2f}** : {result['chi2_crit']} (ddl = {result['ddl']})")
-            st.info(result['conclusion'])
-
-            with st.expander("🔍 Détails du tableau (théorique vs observé)"):
-                import pandas as pd
-                obs_df = pd.DataFrame(result['observed'], columns=col_labels, index=row_labels)
-                exp_df = pd.DataFrame(result['expected'], columns=col_labels, index=row_labels)
-                st.write("**Tableau Observé :**")
-                st.dataframe(obs_df)
-                st.write("**Tableau Théorique (H₀) :**")
-                st.dataframe(exp_df)
+    if not st.button(BOUTON):
+        return False, None
+    return True, {"args": (table,), "lignes": row_labels, "colonnes": col_labels, "graphe": None}
 
-        except Exception as e:
-            st.error(f"Erreur : {e}")
 
+def saisie_matrice():
+    """Toutes les colonnes numériques du fichier importé, ou une grille d'une colonne par variable."""
+    import numpy as np
+    methode = st.selectbox("Coefficient de corrélation", ["Pearson", "Spearman", "Kendall"])
+
+    if imported_data is not None:
+        numeriques = imported_data.select_dtypes("number")
+        labels = [str(col) for col in numeriques.columns]
+        valeurs = numeriques.to_numpy(dtype=float)
+        st.success(f"✅ {len(labels)} variables numériques importées automatiquement depuis le fichier CSV")
+    else:
+        nb_variables = st.number_input("Nombre de variables", min_value=2, max_value=20, value=3, step=1)
+        labels = [f"V{j+1}" for j in range(nb_variables)]
+        st.markdown("### 📥 Données des variables (une colonne par variable)")
+        colonnes = saisie_tableau(f"grille_matrice_{nb_variables}", labels)
+        n = min(len(c) for c in colonnes)
+        valeurs = np.column_stack([c[:n] for c in colonnes])
+
+    if not st.button(BOUTON):
+        return False, None
+    return True, {"args": (valeurs,), "options": {"method": methode.lower()}, "labels": labels, "graphe": None}
+
+
+def saisie_criblage():
+    """Variable cible et paramètres du criblage, sur le fichier importé (en mémoire ou lu une seule fois par blocs de lignes)."""
+    if uploaded_file is None:
+        st.info("ℹ️ Importer un fichier CSV : chaque colonne numérique est une variable candidate.")
+        return False, None
+    if mode_flux:
+        from utils.ingestion import numeric_columns
+        colonnes = numeric_columns(uploaded_file)
+    elif imported_data is not None:
+        colonnes = list(imported_data.select_dtypes("number").columns)
+    else:
+        return False, None
+
+    cible = st.selectbox("Variable cible", colonnes)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        methode = st.selectbox("Coefficient", ["Pearson", "Spearman"])
+    with col2:
+        k = st.number_input("Variables retenues (k)", min_value=1, max_value=500, value=20, step=1)
+    with col3:
+        correction = st.selectbox("Correction des tests multiples", list(CORRECTIONS), index=2,
+                                  format_func=CORRECTIONS.get)
+
+    if not st.button(BOUTON):
+        return False, None
+    options = {"target": cible, "method": methode.lower(), "k": int(k), "correction": correction}
+    return True, {"args": (uploaded_file if mode_flux else imported_data,), "options": options, "graphe": None}
+
+
+def saisie_segments():
+    """Table longue : colonnes clés des segments, colonne(s) de valeurs et, au besoin, colonne des groupes."""
+    from tests.segments import run_by_segment
+    colonnes = list(imported_data.columns)
+    with st.form(f"form_segments_{spec['cle']}"):
+        st.markdown("### 🧩 Découpage en segments")
+        by = st.multiselect("Colonnes clés des segments", colonnes)
+        if spec["saisie"] == "proportion":
+            valeurs = [st.selectbox("Colonne des succès (0/1)", colonnes)]
+            groupe = None
+            p0 = st.number_input("Proportion attendue (p₀)", min_value=0.0, max_value=1.0, value=0.5, step=0.01)
+        else:
+            valeurs = st.multiselect("Colonne(s) de valeurs", colonnes,
+                                     help="Deux colonnes appariées, ou une colonne de valeurs avec une colonne de groupes.")
+            groupe = st.selectbox("Colonne des groupes comparés", ["(aucune)"] + colonnes)
+            groupe = None if groupe == "(aucune)" else groupe
+            p0 = None
+        correction = st.selectbox("Correction des tests multiples", [None, *CORRECTIONS],
+                                  format_func=lambda c: "(aucune)" if c is None else CORRECTIONS[c])
+        submit = st.form_submit_button(spec.get("bouton", BOUTON))
+    if not submit:
+        return False, None
+
+    options = {"test": spec["cle"], "by": tuple(by), "columns": tuple(valeurs), "group": groupe, "correction": correction}
+    if p0 is not None:
+        options["p0"] = p0
+    return True, {"args": (imported_data,), "options": options, "graphe": None, "runner": run_by_segment,
+                  "affichage": resultats_segments}
+
+
+def saisie_suivi():
+    """Suivi séquentiel : le fichier importé est ajouté comme nouveau lot à l'état du test conservé dans la session.
+
+    Le résultat est affiché directement (il dépend des lots déjà reçus, il n'est donc pas mis en cache).
+    """
+    import pandas as pd
+    colonnes = list(imported_data.columns)
+    col1, col2 = st.columns(2)
+    premiere = col1.selectbox("Premier groupe / variable", colonnes)
+    seconde = col2.selectbox("Second groupe / variable", colonnes, index=min(1, len(colonnes) - 1))
+
+    etat = st.session_state.setdefault(f"suivi_{spec['cle']}", {"moniteur": None, "lots": []})
+    bouton1, bouton2 = st.columns(2)
+    if bouton2.button("🔄 Réinitialiser le suivi"):
+        etat.update(moniteur=None, lots=[])
+    if bouton1.button("➕ Ajouter le fichier comme nouveau lot"):
+        empreinte = file_digest(uploaded_file)
+        if empreinte in etat["lots"]:
+            st.warning("⚠️ Ce fichier a déjà été ajouté au suivi.")
+        else:
+            if etat["moniteur"] is None:
+                etat["moniteur"] = charger_moniteur(test_choisi)(alpha)
+            etat["moniteur"].update(*(pd.to_numeric(imported_data[col], errors="coerce").to_numpy(dtype=float)
+                                      for col in (premiere, seconde)))
+            etat["lots"].append(empreinte)
+            resultats_suivi(etat["moniteur"].result(), len(etat["lots"]))
+    elif etat["moniteur"] is not None:
+        st.caption(f"{len(etat['lots'])} lot(s) déjà reçu(s) ; importer le fichier suivant puis l'ajouter.")
+    return False, None
+
+
+SAISIES = {
+    "paires": saisie_paires,
+    "groupes": saisie_groupes,
+    "proportion": saisie_proportion,
+    "contingence": saisie_contingence,
+    "matrice": saisie_matrice,
+    "criblage": saisie_criblage,
+}
+
+
+# ---------- Affichage des résultats (un par test, clé "cle" du registre) ----------
+
+def resultats_kendall(result, donnees):
+    tau, tau_b, c, d, z, z_crit, p, conclusion, ic, _ = result
+    n = donnees["n"]
+
+    st.markdown("### ✅ Résultats du test")
+    st.write(f"**Tau simplifié** : {tau:.4f}")
+    st.write(f"**Tau-b (corrigé des ex aequo)** : {tau_b:.4f}")
+    st.write(f"**Nombre de paires concordantes** : {c}")
+    st.write(f"**Nombre de paires discordantes** : {d}")
+    st.write(f"**Statistique de test Z** : {z:.4f}")
+    st.write(f"**Valeur critique à α = {alpha:.2f}** : ±{z_crit:.4f}")
+    st.write(f"**p-value** : {p:.4g}")
+    afficher_bootstrap(ic, "τ")
+    st.info(conclusion)
+
+    with st.expander("🔍 Détails des calculs"):
+        st.markdown(f"""
+        - Nombre total de paires comparées : {c + d}
+        - Tau = (C - D) / (C + D) = ({c} - {d}) / ({c + d}) = {tau:.4f}
+        - Variance de τ sous H₀ : Var(τ) = 2(2n + 5) / (9n(n - 1))
+        → Var(τ) = {((2 * (2 * n + 5)) / (9 * n * (n - 1))):.6f}
+        - Statistique Z = τ / √Var(τ) = {z:.4f}
+        - Valeur critique pour α = {alpha:.2f} : ±{z_crit:.4f}
+        """)
+
+
+def resultats_mann_whitney(result, donnees):
+    st.markdown("### ✅ Résultats du test")
+    st.write(f"**U1** : {result['U1']}")
+    st.write(f"**U2** : {result['U2']}")
+    st.write(f"**U observé** : {result['U_obs']}")
+    st.write(f"**Z** : {result['z']}")
+    st.write(f"**Valeur critique à α = {alpha:.2f}** : ±{result['z_crit']}")
+    st.write(f"**p-value ({result['methode']})** : {result['p_value']:.4g}")
+    afficher_permutation(result)
+    st.info(result['conclusion'])
+
+    with st.expander("🔍 Détails des calculs"):
+        st.markdown(f"""
+        - W1 (somme des rangs de l’échantillon 1) : {result['W1']}
+        - W2 (somme des rangs de l’échantillon 2) : {result['W2']}
+
+        $$
+        U_1 = W_1 - \\frac{{n_1(n_1 + 1)}}{{2}} = {result['U1']} \\\\
+        U_2 = W_2 - \\frac{{n_2(n_2 + 1)}}{{2}} = {result['U2']} \\\\
+        U = \\min(U_1, U_2) = {result['U_obs']}
+        $$
+
+        - Moyenne de U sous H₀ : μ = {result['mu_U']}
+        - Écart-type de U sous H₀ : σ = {result['sigma_U']}
+
+        $$
+        Z = \\frac{{U - \\mu}}{{\\sigma}} = \\frac{{{result['U_obs']} - {result['mu_U']}}}{{{result['sigma_U']}}} = {result['z']}
+        $$
+
+        - Zone de non-rejet : ±{result['z_crit']}
+        """, unsafe_allow_html=True)
+
+
+def resultats_pearson(result, donnees):
+    st.markdown("### ✅ Résultats du test")
+    st.write(f"**Coefficient r** : {result['r']}")
+    st.write(f"**Statistique de test t** : {result['t_obs']}")
+    st.write(f"**Valeur critique à α = {alpha:.2f}** : ±{result['t_crit']} (ddl = {result['ddl']})")
+    st.write(f"**p-value** : {result['p_value']:.4g}")
+    afficher_bootstrap(result.get("bootstrap"), "r")
+    st.info(result['conclusion'])
+
+    with st.expander("🔍 Détails des calculs"):
+        st.markdown(f"""
+        - Moyenne de X : {result['x_bar']}
+        - Moyenne de Y : {result['y_bar']}
+        - Formule du r :
+            $$
+            r = \\frac{{\\sum (x_i - \\bar{{x}})(y_i - \\bar{{y}})}}{{\\sqrt{{\\sum (x_i - \\bar{{x}})^2}} \\cdot \\sqrt{{\\sum (y_i - \\bar{{y}})^2}}}} = {result['r']}
+            $$
+        - Statistique t :
+            $$
+            t = \\frac{{r \\cdot \\sqrt{{n - 2}}}}{{\\sqrt{{1 - r^2}}}} = {result['t_obs']}
+            $$
+        - Valeur critique (bilatéral) : ±{result['t_crit']} pour ddl = {result['ddl']}
+        """)
+
+
+def resultats_spearman(result, donnees):
+    n = donnees["n"]
+
+    st.markdown("### ✅ Résultats du test")
+    st.write(f"**Coefficient ρ (rho)** : {result['rho']}")
+    st.write(f"**Statistique de test Z** : {result['z']}")
+    if result['z_crit']:
+        st.write(f"**Valeur critique à α = {alpha:.2f}** : ±{result['z_crit']}")
+        st.write(f"**p-value** : {result['p_value']:.4g}")
+    afficher_permutation(result)
+    afficher_bootstrap(result.get("bootstrap"), "ρ")
+    st.info(result['conclusion'])
+
+    with st.expander("🔍 Détails des calculs"):
+        st.markdown(f"""
+        - Rang(x) : {result['rangs_x']}
+        - Rang(y) : {result['rangs_y']}
+        - d² = (rangX - rangY)² : {result['d²']}
+        - ∑ d² = {result['sum_d2']}
+        - ρ = 1 - (6 × ∑d²) / n(n² - 1)
+          = 1 - (6 × {result['sum_d2']}) / {n}({n}² - 1) = {result['rho']}
+        """)
+        if result['z'] != "N/A":
+            st.markdown(f"""
+            - Approximation normale : z = ρ × √(n - 1)
+              = {result['rho']} × √({n} - 1) = {result['z']}
+            - Zone de rejet : ±{result['z_crit']}
+            """)
+
+
+def resultats_anova(result, donnees):
+    st.markdown("### ✅ Résultats du test")
+    st.write(f"**Statistique F observée** : {result['F_obs']}")
+    st.write(f"**Valeur critique F à α = {alpha:.2f}** : {result['F_crit']} "
+             f"(ddl = {result['df_between']} ; {result['df_within']})")
+    st.write(f"**p-value** : {result['p_value']:.4g}")
+    st.write(f"**Taille d'effet η²** : {result['eta2']}")
+    afficher_bootstrap(result.get("bootstrap"), "η²")
+    st.info(result['conclusion'])
+
+    with st.expander("🔍 Détails des calculs"):
+        st.markdown(f"""
+        - Moyenne globale : **{result['overall_mean']}**
+        - Somme des carrés entre groupes : SS_inter = {result['ss_between']}
+        - Somme des carrés intra-groupes : SS_intra = {result['ss_within']}
+        - ddl inter : {result['df_between']}, ddl intra : {result['df_within']}
+        - MS_inter = SS_inter / ddl = {result['ms_between']}
+        - MS_intra = SS_intra / ddl = {result['ms_within']}
+
+        $$
+        F = \\frac{{MS_{{inter}}}}{{MS_{{intra}}}} = \\frac{{{result['ms_between']}}}{{{result['ms_within']}}} = {result['F_obs']}
+        $$
+
+        Zone de non-rejet : F < {result['F_crit']}
+        """, unsafe_allow_html=True)
+
+
+def resultats_wilcoxon(result, donnees):
+    st.markdown("### ✅ Résultats du test")
+    st.write(f"**Somme des rangs positifs (R⁺)** : {result['R_pos']}")
+    st.write(f"**Somme des rangs négatifs (R⁻)** : {result['R_neg']}")
+    st.write(f"**Statistique W (observée)** : {result['W']}")
+    st.write(f"**Z calculé** : {result['z']}")
+    st.write(f"**Valeur critique à α = {alpha:.2f}** : ±{result['z_crit']}")
+    st.write(f"**p-value ({result['methode']})** : {result['p_value']:.4g}")
+    afficher_permutation(result)
+    st.info(result['conclusion'])
+
+    with st.expander("🔍 Détails des calculs"):
+        st.markdown(f"""
+        - Nombre de paires effectives (≠ 0) : {len(result['ranks'])}
+        - Moyenne de W sous H₀ : μ = {result['mu_W']}
+        - Écart-type de W : σ = {result['sigma_W']}
+
+        $$
+        Z = \\frac{{W - \\mu}}{{\\sigma}} = \\frac{{{result['W']} - {result['mu_W']}}}{{{result['sigma_W']}}} = {result['z']}
+        $$
+
+        - Zone de non-rejet : ±{result['z_crit']}
+        """, unsafe_allow_html=True)
+
+
+def resultats_bartlett(result, donnees):
+    st.markdown("### ✅ Résultats du test")
+    st.write(f"**Statistique T observée** : {result['T']}")
+    st.write(f"**Valeur critique χ²({result['ddl']}) à α = {alpha:.2f}** : {result['chi2_crit']}")
+    st.write(f"**p-value** : {result['p_value']:.4g}")
+    st.info(result['conclusion'])
+
+    with st.expander("🔍 Détails des calculs"):
+        st.markdown(f"""
+        - Variances des groupes : {result['var_i']}
+        - Taille des groupes : {result['n_i']}
+        - Variance globale pondérée (sp²) : {result['sp2']}
+
+        $$
+        T = \\frac{{(N - k) \\cdot \\ln(s_p^2) - \\sum (n_i - 1) \\cdot \\ln(s_i^2)}}{{1 + \\frac{{1}}{{3(k - 1)}} \\left( \\sum \\frac{{1}}{{n_i - 1}} - \\frac{{1}}{{N - k}} \\right)}} = {result['T']}
+        $$
+
+        Zone de non-rejet : T < {result['chi2_crit']}
+        """, unsafe_allow_html=True)
+
+
+def resultats_levene(result, donnees):
+    st.markdown("### ✅ Résultats du test")
+    st.write(f"**Statistique F observée** : {result['F_obs']}")
+    st.write(f"**Valeur critique F à α = {alpha:.2f}** : {result['F_crit']} "
+             f"(ddl = {result['ddl_between']} ; {result['ddl_within']})")
+    st.write(f"**p-value** : {result['p_value']:.4g}")
+    st.info(result['conclusion'])
+
+    with st.expander("🔍 Détails des calculs"):
+        st.markdown(f"""
+        - Moyenne globale des |différences| : **{result['overall_mean']}**
+        - Moyenne par groupe des |x - moyenne_groupe| : {result['group_means']}
+        - MS_inter : {result['ms_between']}
+        - MS_intra : {result['ms_within']}
+
+        $$
+        F = \\frac{{MS_{{inter}}}}{{MS_{{intra}}}} = \\frac{{{result['ms_between']}}}{{{result['ms_within']}}} = {result['F_obs']}
+        $$
+
+        Zone de non-rejet : F < {result['F_crit']}
+        """, unsafe_allow_html=True)
+
+
+def resultats_proportion(result, donnees):
+    p0 = donnees["args"][2]
+
+    st.markdown("### ✅ Résultats du test")
+    st.write(f"**Proportion observée** : p̂ = {result['p_hat']}")
+    st.write(f"**Erreur standard** : {result['std_error']}")
+    st.write(f"**Statistique Z observée** : {result['z']}")
+    st.write(f"**Valeur critique (bilatérale)** : ±{result['z_crit']}")
+    st.write(f"**p-value ({result['methode']})** : {result['p_value']:.4g}")
+    afficher_bootstrap(result.get("bootstrap"), "p̂")
+    st.info(result['conclusion'])
+
+    with st.expander("🔍 Détails des calculs"):
+        st.markdown(f"""
+        $$
+        Z = \\frac{{\\hat{{p}} - p_0}}{{\\sqrt{{\\frac{{p_0(1 - p_0)}}{{n}}}}}} = \\frac{{{result['p_hat']} - {p0}}}{{{result['std_error']}}} = {result['z']}
+        $$
+
+        Zone de non-rejet : ±{result['z_crit']}
+        """, unsafe_allow_html=True)
+
+
+CELLULES_AFFICHEES = 2500  # au-delà, seuls les plus forts résidus du χ² sont affichés
+
+
+def resultats_chi2(result, donnees):
+    st.markdown("### ✅ Résultats du test")
+    st.write(f"**Statistique χ² observée** : {result['chi2']}")
+    st.write(f"**Valeur critique à α = {alpha:.2f}** : {result['chi2_crit']} (ddl = {result['ddl']})")
+    st.write(f"**p-value** : {result['p_value']:.4g}")
+    st.info(result['conclusion'])
+
+    import pandas as pd
+    from tests.chi2_independance import expected_cells, largest_residuals
+    lignes, colonnes = donnees["lignes"], donnees["colonnes"]
+    if len(lignes) * len(colonnes) <= CELLULES_AFFICHEES and not hasattr(result["observed"], "tocoo"):
+        with st.expander("🔍 Détails du tableau (théorique vs observé)"):
+            obs_df = pd.DataFrame(result['observed'], columns=colonnes, index=lignes)
+            exp_df = pd.DataFrame(expected_cells(result), columns=colonnes, index=lignes)
+            st.write("**Tableau Observé :**")
+            st.dataframe(obs_df)
+            st.write("**Tableau Théorique (H₀) :**")
+            st.dataframe(exp_df)
+    else:
+        # Grand tableau : seuls les résidus des cellules les plus atypiques sont calculés
+        with st.expander(f"🔍 Cellules les plus éloignées de l'indépendance ({len(lignes)} × {len(colonnes)})"):
+            residus = pd.DataFrame(largest_residuals(result, k=50),
+                                   columns=["ligne", "colonne", "Observé", "Théorique (H₀)", "Résidu"])
+            residus["ligne"] = [lignes[i] for i in residus["ligne"]]
+            residus["colonne"] = [colonnes[j] for j in residus["colonne"]]
+            st.dataframe(residus)
+
+
+def resultats_correlation_matrix(result, donnees):
+    import pandas as pd
+    from tests.correlation_matrix import strongest_pairs
+    from utils.visualisation import afficher_heatmap
+
+    st.markdown("### ✅ Résultats du test")
+    st.write(f"**Observations complètes** : {result['n']}")
+    st.write(f"**Paires de variables testées** : {result['n_pairs']}")
+    st.write(f"**Valeur critique à α = {alpha:.2f}** : ±{result['critical_value']:.4f}")
+    st.info(f"Au seuil de signification de {alpha:.2f}, {result['n_reject']} paire(s) sur {result['n_pairs']} "
+            f"présentent une corrélation significative ({result['method'].capitalize()}).")
+
+    st.markdown("### 📊 Carte des coefficients")
+    afficher_figure(donnees["cle"], lambda: afficher_heatmap(result["coef"], result["columns"],
+                                                              titre=f"Corrélations ({result['method'].capitalize()})"))
+
+    with st.expander("🔍 Paires les plus corrélées"):
+        paires = pd.DataFrame(strongest_pairs(result, k=50),
+                              columns=["Variable 1", "Variable 2", "Coefficient", "Statistique", "p-value"])
+        st.dataframe(paires)
+
+    if len(result["columns"]) <= 40:
+        with st.expander("🔍 Matrice des coefficients"):
+            st.dataframe(pd.DataFrame(result["coef"], columns=result["columns"], index=result["columns"]).round(4))
+
+
+def resultats_screening(result, donnees):
+    import pandas as pd
+    correction = CORRECTIONS[result["correction"]]
+
+    st.markdown("### ✅ Résultats du criblage")
+    st.write(f"**Variable cible** : {result['target']}")
+    st.write(f"**Variables candidates testées** : {result['n_features']}")
+    st.info(f"Au seuil de signification de {alpha:.2f} (correction de {correction}), {result['n_reject']} variable(s) "
+            f"sur {result['n_features']} sont significativement associées à {result['target']}.")
+
+    st.markdown(f"### 🏆 Les {result['k']} associations les plus fortes")
+    top = pd.DataFrame(result["top"]).rename(columns={
+        "column": "Variable", "coef": "Coefficient", "statistic": "Statistique", "n": "n",
+        "p_value": "p-value", "p_adjusted": "p-value ajustée", "reject": "Significative"})
+    st.dataframe(top)
+
+
+def resultats_proportions(result, donnees):
+    st.markdown("### ✅ Résultats par ligne")
+    st.write(f"**Tests réalisés** : {len(result)}")
+    st.write(f"**Tests où H₀ est rejetée au seuil α = {alpha:.2f}** : {int(result['reject'].sum())}")
+    if "methode" in result:
+        st.caption(f"{int((result['methode'] == 'exacte').sum())} test(s) conclu(s) par la loi binomiale exacte "
+                   f"(n·p₀ ou n·(1 - p₀) < 5).")
+    st.dataframe(result, use_container_width=True)
+
+
+def resultats_suivi(result, lots):
+    st.markdown(f"### 📡 Suivi séquentiel ({lots} lot(s))")
+    effectifs = {cle: result[cle] for cle in ("n1", "n2", "n") if cle in result}
+    st.write("**Effectifs cumulés** : " + ", ".join(f"{cle} = {val}" for cle, val in effectifs.items()))
+    if result["z"] is not None:
+        st.write(f"**Statistique Z** : {result['z']}")
+        st.write(f"**p-value séquentielle (toujours valide)** : {result['always_valid_p']:.4g}")
+        st.caption(f"p-value à effectif fixé : {result['p_value']:.4g} (non valide si les résultats sont consultés "
+                   f"après chaque lot).")
+    st.info(result["conclusion"])
+
+
+def resultats_segments(result, donnees):
+    st.markdown("### ✅ Résultats par segment")
+    st.write(f"**Segments analysés** : {int((result['status'] == 'ok').sum())} sur {len(result)}")
+    st.write(f"**Segments où H₀ est rejetée au seuil α = {alpha:.2f}** : {int(result['reject'].eq(True).sum())}")
+    if "p_adjusted" in result:
+        correction = CORRECTIONS[donnees["options"]["correction"]]
+        st.info(f"Après correction de {correction}, H₀ est rejetée dans {int(result['reject_adjusted'].sum())} "
+                f"segment(s) sur {int(result['p_value'].notna().sum())}.")
+    st.dataframe(result, use_container_width=True)
+
+
+AFFICHAGES = {
+    "kendall": resultats_kendall,
+    "mann_whitney": resultats_mann_whitney,
+    "pearson": resultats_pearson,
+    "spearman": resultats_spearman,
+    "anova": resultats_anova,
+    "wilcoxon": resultats_wilcoxon,
+    "bartlett": resultats_bartlett,
+    "levene": resultats_levene,
+    "proportion": resultats_proportion,
+    "chi2": resultats_chi2,
+    "correlation_matrix": resultats_correlation_matrix,
+    "screening": resultats_screening,
+}
+
+
+# ---------- Exécution du test choisi ----------
+st.markdown(spec["titre"])
+
+if par_suivi:
+    soumis, donnees = saisie_suivi()
+else:
+    soumis, donnees = saisie_segments() if par_segments else SAISIES[spec["saisie"]]()
+profil.lap("widgets")
+
+if soumis:
+    try:
+        # Seul le module du test choisi est importé, au premier lancement
+        # Un mode de saisie peut remplacer la fonction du test (un test par segment, par ligne d'un tableau…)
+        runner = donnees.get("runner") or charger_runner(test_choisi)
+        profil.lap("modules")
+        options = donnees.get("options", {})
+        if par_permutation and "runner" not in donnees:
+            options = {**options, "permutation": True}
+        if par_bootstrap and "runner" not in donnees:
+            # La taille des données n'est connue qu'ici : au-delà de la limite du test, pas d'intervalle
+            limite = limite_bootstrap(test_choisi)
+            if limite is not None and donnees.get("n", 0) > limite:
+                st.caption(f"📏 Intervalle bootstrap non calculé au-delà de {limite} observations.")
+            else:
+                options = {**options, "bootstrap": True}
+        # Le précalcul d'un état incrémental découle des valeurs saisies : il n'entre pas dans la clé
+        cle = cle_donnees(*donnees["args"],
+                          colonnes=donnees.get("colonnes_lues", spec["colonnes"] or ()))
+        if options:
+            cle = (cle, tuple(sorted(options.items())))
+        donnees["cle"] = cle
+        result = executer(cle, lambda: profil.call("calcul", runner, *donnees["args"], alpha, **options,
+                                                   **donnees.get("precalcul", {})))
+        profil.lap("cache")  # empreinte des données et recherche du résultat
+
+        donnees.get("affichage", AFFICHAGES[spec["cle"]])(result, donnees)
+        profil.lap("affichage")
+
+        graphique = None if "affichage" in donnees else spec["graphique"]
+        if graphique is not None:
+            if donnees["graphe"] is None:
+                st.caption("Graphique non affiché en lecture par blocs : seules les statistiques sont conservées.")
+            else:
+                st.markdown(graphique["entete"])
+                afficher_figure(cle, lambda: charger_graphique(test_choisi)(*donnees["graphe"],
+                                                                             **graphique.get("options", {})))
+                profil.lap("figure")
+
+    except Exception as e:
+        st.error(f"Erreur : {e}")
+
+
+# ---------- Profilage de l'exécution (facultatif) ----------
+
+def afficher_profil(record):
+    """Temps de chaque étape de l'exécution, pic mémoire et profil cProfile du calcul, s'ils ont été mesurés."""
+    import pandas as pd
+    total = record["total_s"]
+    etapes = pd.DataFrame(
+        [(nom, s * 1000, s / total if total else 0.0)
+         for nom, s in sorted(record["stages"].items(), key=lambda e: -e[1])],
+        columns=["Étape", "ms", "Part"])
+    st.write(f"**Exécution** : {total * 1000:.1f} ms")
+    st.dataframe(etapes, hide_index=True, use_container_width=True,
+                 column_config={"ms": st.column_config.NumberColumn(format="%.1f"),
+                                "Part": st.column_config.ProgressColumn(format="%.0f%%", min_value=0, max_value=1)})
+    if record["soumis"] and "calcul" not in record["stages"]:
+        st.caption("Résultat du test lu dans le cache : le calcul n'a pas été relancé.")
+    if record["peak_mb"] is not None:
+        st.write(f"**Pic mémoire du calcul** : {record['peak_mb']:.1f} Mo")
+    if profil.profile_text:
+        st.code(profil.profile_text, language=None)
+    st.caption(f"Journal : {JOURNAL}")
+
+
+with st.sidebar.expander("⏱️ Profilage", expanded=profil.enabled):
+    st.checkbox("Mesurer les étapes de chaque exécution", key="profilage",
+                help="Lecture du fichier, conversions, widgets, calcul du test, affichage et figure ; "
+                     "chaque exécution est ajoutée au journal JSON lines.")
+    st.checkbox("Profil cProfile du calcul", key="profilage_cprofile", disabled=not profil.enabled)
+    st.checkbox("Pic mémoire du calcul (tracemalloc, plus lent)", key="profilage_memoire", disabled=not profil.enabled)
+    if profil.enabled:
+        enregistrement = profil.finish(
+            test=spec["cle"], soumis=bool(soumis), flux=mode_flux, segments=bool(par_segments),
+            suivi=bool(par_suivi), lignes=None if imported_data is None else len(imported_data),
+            octets=uploaded_file.size if uploaded_file else None)
+        afficher_profil(enregistrement)
+        try:
+            profil.append_log(enregistrement)
+        except OSError as e:
+            st.warning(f"⚠️ Journal non écrit : {e}")
@@ -0,0 +1,277 @@
+"""Cas de mesure : fonction chronométrée, données synthétiques de n lignes (avec ou sans ex aequo) et valeur de
+référence calculée par scipy pour vérifier l'exactitude du résultat."""
+from importlib import import_module
+
+import numpy as np
+import pandas as pd
+
+
+# ---------- Données synthétiques : (args, options) de la fonction mesurée ----------
+
+def _arrondir(v, ex_aequo):
+    # Valeurs arrondies au tiers : quelques dizaines de valeurs distinctes, beaucoup d'ex aequo
+    return np.round(v * 3) / 3 if ex_aequo else v
+
+
+def donnees_paires(rng, n, ex_aequo):
+    x = rng.standard_normal(n)
+    y = 0.5 * x + rng.standard_normal(n)
+    return (_arrondir(x, ex_aequo), _arrondir(y, ex_aequo)), {}
+
+
+def donnees_echantillons(rng, n, ex_aequo):
+    n1 = n // 2
+    return (_arrondir(rng.standard_normal(n1), ex_aequo),
+            _arrondir(rng.standard_normal(n - n1) + 0.2, ex_aequo)), {}
+
+
+def donnees_groupes(rng, n, ex_aequo):
+    tailles = [len(t) for t in np.array_split(np.arange(n), 4)]
+    return ([_arrondir(rng.standard_normal(t) * (1 + 0.1 * i) + 0.1 * i, ex_aequo) for i, t in enumerate(tailles)],), {}
+
+
+def donnees_proportion(rng, n, ex_aequo):
+    return (int(rng.binomial(n, 0.52)), n, 0.5), {}
+
+
+def donnees_contingence(rng, n, ex_aequo):
+    # 12 × 8 modalités, une légère dépendance entre lignes et colonnes
+    lignes = rng.integers(0, 12, n)
+    colonnes = (lignes + rng.integers(0, 8, n) * (rng.random(n) < 0.9)) % 8
+    return (np.bincount(lignes * 8 + colonnes, minlength=96).reshape(12, 8),), {}
+
+
+def donnees_tableau(rng, n, ex_aequo, p=8):
+    valeurs = rng.standard_normal((n, p))
+    valeurs[:, 1] += 0.5 * valeurs[:, 0]
+    return (pd.DataFrame(_arrondir(valeurs, ex_aequo), columns=[f"V{j + 1}" for j in range(p)]),), {}
+
+
+def donnees_criblage(rng, n, ex_aequo):
+    (data,), _ = donnees_tableau(rng, n, ex_aequo, p=20)
+    data["cible"] = _arrondir(data["V3"].to_numpy() + rng.standard_normal(n), ex_aequo)
+    return (data,), {"target": "cible"}
+
+
+def donnees_segments(rng, n, ex_aequo):
+    bras = rng.integers(0, 2, n)
+    data = pd.DataFrame({
+        "segment": rng.integers(0, 5, n),
+        "bras": np.where(bras == 1, "B", "A"),
+        "valeur": _arrondir(rng.standard_normal(n) + 0.2 * bras, ex_aequo),
+    })
+    return (data,), {"test": "mann_whitney", "by": ["segment"], "columns": ["valeur"], "group": "bras"}
+
+
+def donnees_proportions(rng, n, ex_aequo):
+    # Une comparaison de deux proportions par ligne
+    n1 = rng.integers(50, 500, n)
+    n2 = rng.integers(50, 500, n)
+    return (pd.DataFrame({"x1": rng.binomial(n1, 0.5), "n1": n1, "x2": rng.binomial(n2, 0.55), "n2": n2}),), {}
+
+
+def donnees_heatmap(rng, n, ex_aequo):
+    # La taille est ici le nombre de variables (plafonné : au-delà, la figure reste illisible)
+    p = min(n, 100)
+    matrice = np.corrcoef(rng.standard_normal((p, 2 * p + 10)))
+    return (matrice, [f"V{j + 1}" for j in range(p)]), {}
+
+
+# Intervalles bootstrap : lots répartis entre 2 processus dès que le volume de calcul le justifie (n = 100 000)
+OPTIONS_BOOTSTRAP = {"n_resamples": 1000, "seed": 0, "workers": 2}
+
+
+def donnees_bootstrap(donnees):
+    def construire(rng, n, ex_aequo):
+        args, _ = donnees(rng, n, ex_aequo)
+        return args, OPTIONS_BOOTSTRAP
+    return construire
+
+
+# ---------- Valeurs de référence : (valeur obtenue, valeur attendue) ----------
+
+def _spearman_rangs(args, result):
+    from scipy.stats import rankdata
+    x, y = args
+    n = len(x)
+    d2 = ((rankdata(x) - rankdata(y)) ** 2).sum()
+    return result["rho"], 1 - 6 * d2 / (n * (n ** 2 - 1))
+
+
+def _proportion(args, result):
+    from scipy.stats import binomtest, norm
+    x, n, p0 = args
+    if result["methode"] == "exacte":
+        return result["p_value"], binomtest(x, n, p0).pvalue
+    return result["p_value"], 2 * norm.sf(abs(x / n - p0) / np.sqrt(p0 * (1 - p0) / n))
+
+
+def _segments(args, result):
+    from scipy.stats import mannwhitneyu
+    from utils.exact import use_exact
+    (data,) = args
+    segment = data[data["segment"] == result["segment"].iloc[0]]
+    a = segment.loc[segment["bras"] == "A", "valeur"].to_numpy()
+    b = segment.loc[segment["bras"] == "B", "valeur"].to_numpy()
+    exacte = use_exact("mann_whitney", len(a), len(b), ties=len(np.unique(segment["valeur"])) < len(segment))
+    reference = mannwhitneyu(a, b, method="exact" if exacte else "asymptotic", use_continuity=False)
+    return result["p_value"].iloc[0], reference.pvalue
+
+
+def _criblage(args, result):
+    from scipy.stats import pearsonr
+    (data,) = args
+    meilleure = result["top"][0]
+    return meilleure["coef"], pearsonr(data["cible"], data[meilleure["column"]]).statistic
+
+
+def _deux_proportions(args, result):
+    from scipy.stats import chi2_contingency
+    ligne = args[0].iloc[0]
+    table = [[ligne["x1"], ligne["n1"] - ligne["x1"]], [ligne["x2"], ligne["n2"] - ligne["x2"]]]
+    return result["p_value"].iloc[0], chi2_contingency(table, correction=False).pvalue
+
+
+def _bootstrap_sequentiel(fonction):
+    """Référence d'un intervalle bootstrap : même graine en un seul processus. L'erreur type dépend de chaque
+    rééchantillon ; elle doit être identique quel que soit le nombre de workers."""
+    def reference(args, result):
+        sequentiel = getattr(import_module("tests.bootstrap"), fonction)(*args, **{**OPTIONS_BOOTSTRAP, "workers": 1})
+        return result["std_error"], sequentiel["std_error"]
+    return reference
+
+
+def _scipy(fonction, cle, **options):
+    """Référence directe : statistique de la fonction scipy.stats appliquée aux mêmes arguments."""
+    def reference(args, result):
+        stats = import_module("scipy.stats")
+        valeurs = args[0] if isinstance(args[0], list) else args
+        return result[cle], getattr(stats, fonction)(*valeurs, **options).statistic
+    return reference
+
+
+# Cas mesurés. "donnees" construit les arguments pour n lignes ; "reference" renvoie (obtenu, attendu), comparés
+# à la tolérance (absolue, relative) ; "max_n" borne la taille des données (mémoire, temps de tracé) ;
+# "ex_aequo" indique si la variante avec ex aequo a un sens.
+CAS = {
+    "kendall": {
+        "module": "tests.kendall", "fonction": "kendall_tau_simplifie", "donnees": donnees_paires,
+        "reference": _scipy("kendalltau", 1), "tolerance": (1e-9, 1e-9), "ex_aequo": True,
+    },
+    "pearson": {
+        "module": "tests.pearson", "fonction": "run_pearson_test", "donnees": donnees_paires,
+        "reference": _scipy("pearsonr", "r"), "tolerance": (5e-5, 0), "ex_aequo": True,
+    },
+    "spearman": {
+        "module": "tests.spearman", "fonction": "run_spearman_test", "donnees": donnees_paires,
+        "reference": _spearman_rangs, "tolerance": (5e-5, 0), "ex_aequo": True,
+    },
+    "mann_whitney": {
+        "module": "tests.mann_whitney", "fonction": "run_mann_whitney_test", "donnees": donnees_echantillons,
+        "reference": _scipy("mannwhitneyu", "U1"), "tolerance": (1e-6, 1e-12), "ex_aequo": True,
+    },
+    "wilcoxon": {
+        "module": "tests.wilcoxon", "fonction": "run_wilcoxon_test", "donnees": donnees_paires,
+        "reference": _scipy("wilcoxon", "W", method="approx"), "tolerance": (1e-6, 1e-12), "ex_aequo": True,
+    },
+    "anova": {
+        "module": "tests.one_way_anova", "fonction": "run_one_way_anova", "donnees": donnees_groupes,
+        "reference": _scipy("f_oneway", "F_obs"), "tolerance": (5e-5, 1e-6), "ex_aequo": True,
+    },
+    "bartlett": {
+        "module": "tests.bartlett", "fonction": "run_bartlett_test", "donnees": donnees_groupes,
+        "reference": _scipy("bartlett", "T"), "tolerance": (5e-5, 1e-6), "ex_aequo": True,
+    },
+    "levene": {
+        "module": "tests.levene", "fonction": "run_levene_test", "donnees": donnees_groupes,
+        "reference": _scipy("levene", "F_obs", center="mean"), "tolerance": (5e-5, 1e-6), "ex_aequo": True,
+    },
+    "proportion": {
+        "module": "tests.proportion", "fonction": "run_proportion_test", "donnees": donnees_proportion,
+        "reference": _proportion, "tolerance": (1e-12, 1e-6), "ex_aequo": False,
+    },
+    "proportions": {
+        "module": "tests.proportion", "fonction": "run_proportion_table", "donnees": donnees_proportions,
+        "reference": _deux_proportions, "tolerance": (1e-12, 1e-6), "ex_aequo": False,
+    },
+    "chi2": {
+        "module": "tests.chi2_independance", "fonction": "run_chi2_indep_test", "donnees": donnees_contingence,
+        "reference": _scipy("chi2_contingency", "chi2", correction=False), "tolerance": (5e-5, 1e-6),
+        "ex_aequo": False,
+    },
+    "correlation_matrix": {
+        "module": "tests.correlation_matrix", "fonction": "run_correlation_matrix", "donnees": donnees_tableau,
+        "reference": lambda args, r: (r["coef"][0, 1], import_module("scipy.stats").pearsonr(
+            args[0]["V1"], args[0]["V2"]).statistic),
+        "tolerance": (1e-9, 1e-9), "ex_aequo": True, "max_n": 1_000_000,
+    },
+    "screening": {
+        "module": "tests.screening", "fonction": "run_screening", "donnees": donnees_criblage,
+        "reference": _criblage, "tolerance": (1e-9, 1e-9), "ex_aequo": True, "max_n": 1_000_000,
+    },
+    "segments": {
+        "module": "tests.segments", "fonction": "run_by_segment", "donnees": donnees_segments,
+        "reference": _segments, "tolerance": (1e-12, 1e-6), "ex_aequo": True,
+    },
+    "bootstrap_pearson": {
+        "module": "tests.bootstrap", "fonction": "bootstrap_pearson", "donnees": donnees_bootstrap(donnees_paires),
+        "reference": _bootstrap_sequentiel("bootstrap_pearson"), "tolerance": (0, 0), "ex_aequo": True,
+    },
+    "bootstrap_spearman": {
+        "module": "tests.bootstrap", "fonction": "bootstrap_spearman", "donnees": donnees_bootstrap(donnees_paires),
+        "reference": _bootstrap_sequentiel("bootstrap_spearman"), "tolerance": (0, 0), "ex_aequo": True,
+    },
+    "bootstrap_kendall": {
+        "module": "tests.bootstrap", "fonction": "bootstrap_kendall", "donnees": donnees_bootstrap(donnees_paires),
+        "reference": _bootstrap_sequentiel("bootstrap_kendall"), "tolerance": (0, 0), "ex_aequo": True,
+        "max_n": 20_000,
+    },
+    "bootstrap_anova": {
+        "module": "tests.bootstrap", "fonction": "bootstrap_anova", "donnees": donnees_bootstrap(donnees_groupes),
+        "reference": _bootstrap_sequentiel("bootstrap_anova"), "tolerance": (0, 0), "ex_aequo": True,
+    },
+    # Figures : tracé puis rendu PNG, comme dans l'application ; pas de valeur de référence
+    "figure_nuage_points": {
+        "module": "utils.visualisation", "fonction": "afficher_nuage_points", "donnees": donnees_paires,
+        "figure": True, "ex_aequo": False, "max_n": 1_000_000,
+    },
+    "figure_boxplot": {
+        "module": "utils.visualisation", "fonction": "afficher_boxplot", "donnees": donnees_echantillons,
+        "figure": True, "ex_aequo": False, "max_n": 1_000_000,
+    },
+    "figure_boxplot_groupes": {
+        "module": "utils.visualisation", "fonction": "afficher_boxplot_groupes", "donnees": donnees_groupes,
+        "figure": True, "ex_aequo": False, "max_n": 1_000_000,
+    },
+    "figure_diff_ligne": {
+        "module": "utils.visualisation", "fonction": "afficher_diff_ligne", "donnees": donnees_paires,
+        "figure": True, "ex_aequo": False, "max_n": 1_000_000,
+    },
+    "figure_repartition": {
+        "module": "utils.visualisation", "fonction": "afficher_repartition",
+        "donnees": lambda rng, n, ex_aequo: (donnees_proportion(rng, n, ex_aequo)[0][:2], {}),
+        "figure": True, "ex_aequo": False,
+    },
+    "figure_heatmap": {
+        "module": "utils.visualisation", "fonction": "afficher_heatmap", "donnees": donnees_heatmap,
+        "figure": True, "ex_aequo": False,
+    },
+}
+
+
+def charger_fonction(nom):
+    """Importe à la demande la fonction mesurée ; une figure est tracée puis rendue en PNG."""
+    cas = CAS[nom]
+    fonction = getattr(import_module(cas["module"]), cas["fonction"])
+    if not cas.get("figure"):
+        return fonction
+
+    def tracer_et_rendre(*args, **options):
+        import io
+        import matplotlib.pyplot as plt
+        fig = fonction(*args, **options)
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
+        plt.close(fig)
+        return buf.getvalue()
+    return tracer_et_rendre
@@ -0,0 +1,164 @@
+"""Mesure des cas de benchmarks/cases.py : temps, mémoire de pointe, exactitude et comparaison à une référence."""
+import json
+import platform
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.cases import CAS, charger_fonction
+
+# Durée cumulée visée pour les répétitions d'une mesure ; le meilleur temps est retenu (le moins bruité)
+DUREE_MIN = 0.2
+REPETITIONS_MAX = 50
+
+
+def chronometrer(appel, duree_min=DUREE_MIN):
+    """(meilleur temps en s, nombre de répétitions, dernier résultat) ; au moins une exécution."""
+    meilleur = float("inf")
+    total = 0.0
+    repetitions = 0
+    while repetitions == 0 or (total < duree_min and repetitions < REPETITIONS_MAX):
+        debut = time.perf_counter()
+        result = appel()
+        duree = time.perf_counter() - debut
+        meilleur = min(meilleur, duree)
+        total += duree
+        repetitions += 1
+    return meilleur, repetitions, result
+
+
+def pic_memoire(appel):
+    """Pic d'allocation (octets) pendant un appel, tableaux numpy compris (tracemalloc)."""
+    tracemalloc.start()
+    try:
+        appel()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def etalonner():
+    """Temps (s) d'une charge fixe (tri numpy et boucle Python) : vitesse de la machine au moment des mesures."""
+    valeurs = np.random.default_rng(0).standard_normal(200_000)
+
+    def charge():
+        np.sort(valeurs)
+        total = 0
+        for i in range(100_000):
+            total += i
+        return total
+    return chronometrer(charge, duree_min=5 * DUREE_MIN)[0]
+
+
+def cle_mesure(nom, n, ex_aequo):
+    return f"{nom}|{n}|{'ex_aequo' if ex_aequo else 'continu'}"
+
+
+def decoder_cle(cle):
+    """(cas, n, ex_aequo) d'une clé de cle_mesure."""
+    nom, n, variante = cle.rsplit("|", 2)
+    return nom, int(n), variante == "ex_aequo"
+
+
+def mesurer(nom, n, ex_aequo=False, seed=0, memoire=True, duree_min=DUREE_MIN):
+    """Une ligne de résultats : temps, débit (lignes/s), pic mémoire et écart à la référence scipy."""
+    cas = CAS[nom]
+    ligne = {"cas": nom, "n": n, "ex_aequo": ex_aequo, "secondes": None, "repetitions": 0, "lignes_par_s": None,
+             "pic_mo": None, "obtenu": None, "attendu": None, "ecart": None, "exact": None, "statut": "ok"}
+    fonction = charger_fonction(nom)
+    args, options = cas["donnees"](np.random.default_rng(seed), n, ex_aequo)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            secondes, repetitions, result = chronometrer(lambda: fonction(*args, **options), duree_min)
+            if memoire:
+                ligne["pic_mo"] = round(pic_memoire(lambda: fonction(*args, **options)) / 1024 ** 2, 3)
+        except Exception as e:
+            ligne["statut"] = f"erreur : {e}"
+            return ligne
+        ligne.update(secondes=secondes, repetitions=repetitions, lignes_par_s=n / secondes)
+
+        if "reference" in cas:
+            try:
+                obtenu, attendu = cas["reference"](args, result)
+            except Exception as e:
+                ligne["statut"] = f"référence indisponible : {e}"
+                return ligne
+            obtenu, attendu = float(obtenu), float(attendu)
+            atol, rtol = cas["tolerance"]
+            ecart = abs(obtenu - attendu)
+            ligne.update(obtenu=obtenu, attendu=attendu, ecart=ecart,
+                         exact=bool(ecart <= atol + rtol * abs(attendu) or (np.isnan(obtenu) and np.isnan(attendu))))
+    return ligne
+
+
+def prechauffer(noms):
+    """Un appel sur de petites données par cas : imports (scipy, matplotlib) et caches hors des mesures."""
+    for nom in noms:
+        args, options = CAS[nom]["donnees"](np.random.default_rng(0), 50, False)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                charger_fonction(nom)(*args, **options)
+        except Exception:
+            pass
+
+
+def environnement():
+    import scipy
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "machine": f"{platform.system()} {platform.machine()} {platform.processor()}".strip(),
+    }
+
+
+def enregistrer_reference(lignes, chemin, etalon):
+    """Enregistre les mesures comme référence (JSON) : débit et pic mémoire de chaque cas mesuré sans erreur,
+    avec le temps de la charge d'étalonnage."""
+    mesures = {
+        cle_mesure(l["cas"], l["n"], l["ex_aequo"]): {"lignes_par_s": l["lignes_par_s"], "pic_mo": l["pic_mo"]}
+        for l in lignes if l["lignes_par_s"] is not None
+    }
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump({"environnement": environnement(), "etalon_s": etalon, "mesures": mesures}, f, indent=2,
+                  ensure_ascii=False)
+
+
+def charger_reference(chemin):
+    with open(chemin, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def comparer(lignes, reference, seuil=0.25, etalon=None):
+    """Complète chaque ligne par son rapport de débit à la référence ; renvoie les régressions au-delà du seuil.
+
+    Une régression est un débit inférieur à (1 - seuil) fois celui de la référence, pour le même cas et la même taille.
+    Le rapport est corrigé de la vitesse de la machine (temps de la charge d'étalonnage, actuel / de référence).
+    """
+    regressions = []
+    mesures = reference["mesures"]
+    vitesse = etalon / reference["etalon_s"] if etalon and reference.get("etalon_s") else 1.0
+    for ligne in lignes:
+        ancienne = mesures.get(cle_mesure(ligne["cas"], ligne["n"], ligne["ex_aequo"]))
+        if ancienne is None or ligne["lignes_par_s"] is None:
+            ligne["rapport_debit"] = None
+            continue
+        ligne["rapport_debit"] = ligne["lignes_par_s"] / ancienne["lignes_par_s"] * vitesse
+        if ligne["rapport_debit"] < 1 - seuil:
+            regressions.append(ligne)
+    return regressions
+
+
+def sans_mesure(lignes, reference, attendue):
+    """Mesures de la référence que cette exécution aurait dû refaire et n'a pas obtenues (cas retiré ou taille
+    désormais ignorée) ; attendue(cas, n, ex_aequo) dit si la mesure fait partie de l'exécution. Les mesures en
+    erreur, signalées à part, n'y figurent pas."""
+    faites = {cle_mesure(l["cas"], l["n"], l["ex_aequo"]) for l in lignes}
+    return sorted(cle for cle in reference["mesures"] if cle not in faites and attendue(*decoder_cle(cle)))
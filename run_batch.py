@@ -0,0 +1,260 @@
+"""Exécution des tests en lot, sans interface : python run_batch.py manifeste.json -o resultats.csv
+
+Le manifeste (JSON) décrit les travaux à lancer :
+
+    {
+      "alpha": 0.05,
+      "jobs": [
+        {"file": "extraits/*.csv", "test": "mann_whitney", "columns": ["A", "B"]},
+        {"file": "extraits/groupes.csv", "test": "anova", "alpha": 0.01, "chunked": true}
+      ]
+    }
+
+"test" est la clé courte du registre (kendall, mann_whitney, pearson, spearman, anova, wilcoxon, bartlett,
+levene, proportion, chi2). "columns" est facultatif : colonnes du registre par défaut, toutes les colonnes pour
+les tests de groupes. Pour chi2, le fichier est un tableau de contingence, ou "columns" désigne deux colonnes
+qualitatives dont le tableau est construit ligne à ligne. Pour proportion, chaque ligne du fichier (x, n, p0, ou
+x1, n1, x2, n2 pour comparer deux proportions) est un test et produit une ligne de résultats.
+Les motifs glob de "file" sont développés. Chaque travail est exécuté dans un processus du pool ; le tableau de
+résultats contient une ligne par travail avec ses temps de lecture et de calcul.
+
+Un travail sur une table longue peut être découpé en segments : "by" donne les colonnes clés, "group" la colonne
+des groupes comparés dans chaque segment ("columns" désigne alors la colonne de valeurs) ; une ligne de résultats
+est produite par segment.
+
+        {"file": "essais.csv", "test": "mann_whitney", "by": ["pays", "jour"], "columns": ["duree"], "group": "bras"}
+
+"correction" (au niveau du manifeste, ou --correction) corrige les tests multiples sur l'ensemble des lignes du lot :
+bonferroni, holm, bh (Benjamini-Hochberg) ou by (Benjamini-Yekutieli). Les colonnes p_adjusted et reject_adjusted
+sont alors ajoutées.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from tests.registry import TESTS, charger_runner, nom_par_cle, resumer_resultat
+from utils.multiple_testing import CORRECTIONS, adjust_p_values
+
+
+def lire_manifeste(chemin):
+    """Liste des travaux du manifeste, motifs glob développés et valeurs par défaut appliquées."""
+    with open(chemin, encoding="utf-8") as f:
+        manifeste = json.load(f)
+    base = os.path.dirname(os.path.abspath(chemin))
+    defauts = {k: v for k, v in manifeste.items() if k != "jobs"}
+
+    travaux = []
+    for job in manifeste["jobs"]:
+        job = {**defauts, **job}
+        motif = job["file"] if os.path.isabs(job["file"]) else os.path.join(base, job["file"])
+        fichiers = sorted(glob.glob(motif)) or [motif]  # fichier absent : l'erreur sera reportée dans les résultats
+        for fichier in fichiers:
+            travaux.append({**job, "file": fichier})
+    return travaux
+
+
+def _colonne(df, col):
+    return pd.to_numeric(df[col], errors="coerce").dropna().to_numpy(dtype=float)
+
+
+def charger_donnees(spec, chemin, colonnes=None, par_blocs=False):
+    """Arguments de la fonction du test lus depuis le fichier, comme dans l'application."""
+    saisie = spec["saisie"]
+    colonnes = colonnes or spec["colonnes"]
+
+    if saisie == "contingence" and colonnes:
+        # Deux colonnes qualitatives (une ligne par observation) : tableau construit par codes entiers et bincount
+        if par_blocs:
+            from utils.ingestion import stream_contingency
+            with open(chemin, "rb") as f:
+                return (stream_contingency(f, *colonnes),)
+        from utils.accumulators import ContingencyAccumulator
+        df = pd.read_csv(chemin, usecols=colonnes, dtype="category")
+        return (ContingencyAccumulator.from_values(df[colonnes[0]], df[colonnes[1]]),)
+
+    if par_blocs and spec["flux"] and saisie != "contingence":
+        from utils.ingestion import stream_columns, stream_deviations, stream_groups, stream_moments, stream_pair
+        with open(chemin, "rb") as f:
+            if spec["flux"] == "paire":
+                return (stream_pair(f, *colonnes), None)
+            if spec["flux"] == "colonnes":
+                series = stream_columns(f, colonnes)
+                return tuple(series[col] for col in colonnes)
+            groupes = stream_moments(f, colonnes) if colonnes else stream_groups(f)
+            groupes = {col: acc for col, acc in groupes.items() if acc.n >= 2}
+            if spec["flux"] == "ecarts":
+                groupes = stream_deviations(f, groupes)
+            return (list(groupes.values()),)
+
+    df = pd.read_csv(chemin, usecols=colonnes)
+    if saisie == "paires":
+        return tuple(_colonne(df, col) for col in colonnes)
+    if saisie == "groupes":
+        groupes = [_colonne(df, col) for col in df.columns]
+        return ([g for g in groupes if len(g) >= 2],)
+    # Tableau de contingence
+    df = df.dropna(how="all").dropna(axis=1, how="all")
+    return (df.values.tolist(),)
+
+
+def _effectif(spec, args):
+    """Nombre d'observations utilisées par le test (lignes, observations des groupes ou total du tableau)."""
+    saisie = spec["saisie"]
+    if saisie == "contingence":
+        return int(args[0].n) if hasattr(args[0], "n") else int(np.sum(args[0]))
+    if saisie == "groupes":
+        return int(sum(g.n if hasattr(g, "n") else len(g) for g in args[0]))
+    if hasattr(args[0], "n"):
+        return int(args[0].n)
+    return max(len(a) for a in args)
+
+
+def _prechauffer(cles):
+    """Initialisation d'un processus du pool : importe une fois les modules des tests du lot."""
+    for cle in cles:
+        charger_runner(nom_par_cle(cle))
+
+
+def executer_segments(job, ligne):
+    """Travail par segments d'une table longue : une ligne de résultats par segment."""
+    from tests.segments import run_by_segment
+    debut = time.perf_counter()
+    colonnes = list(job["by"]) + list(job.get("columns") or []) + ([job["group"]] if job.get("group") else [])
+    df = pd.read_csv(job["file"], usecols=lambda c: c in colonnes)
+    lecture = time.perf_counter()
+    resultats = run_by_segment(df, ligne["alpha"], job["test"], by=job["by"], columns=job.get("columns"),
+                               group=job.get("group"), p0=job.get("p0", 0.5))
+    fin = time.perf_counter()
+
+    lignes = []
+    for segment in resultats.to_dict("records"):
+        cles = ", ".join(f"{col}={segment.pop(col)}" for col in job["by"])
+        lignes.append({**ligne, "segment": cles, **segment, "read_s": round(lecture - debut, 6),
+                       "compute_s": round(fin - lecture, 6)})
+    return lignes
+
+
+def executer_proportions(job, ligne):
+    """Tableau de tests de proportion (x, n, p0 ou x1, n1, x2, n2) : une ligne de résultats par ligne du fichier."""
+    from tests.proportion import run_proportion_table
+    from utils.distributions import critical_value
+    debut = time.perf_counter()
+    df = pd.read_csv(job["file"])
+    lecture = time.perf_counter()
+    resultats = run_proportion_table(df, ligne["alpha"], job.get("method", "auto"))
+    fin = time.perf_counter()
+
+    z_crit = critical_value("norm", ligne["alpha"], bilateral=True)
+    effectifs = resultats["n"] if "n" in resultats else resultats["n1"] + resultats["n2"]
+    return [{**ligne, "segment": f"ligne {i + 1}", "n": int(n), "statistic": round(float(z), 4),
+             "critical_value": round(z_crit, 4), "p_value": float(p), "reject": bool(r), "status": "ok",
+             "read_s": round(lecture - debut, 6), "compute_s": round(fin - lecture, 6)}
+            for i, (n, z, p, r) in enumerate(zip(effectifs, resultats["z"], resultats["p_value"], resultats["reject"]))]
+
+
+def executer_travail(job):
+    """Exécute un travail dans un processus du pool et renvoie ses lignes de résultats (une par segment)."""
+    ligne = {
+        "file": job["file"],
+        "test": job["test"],
+        "columns": " ".join(job.get("columns") or []),
+        "alpha": job.get("alpha", 0.05),
+    }
+    debut = time.perf_counter()
+    try:
+        if job.get("by"):
+            return executer_segments(job, ligne)
+        nom = nom_par_cle(job["test"])
+        spec = TESTS[nom]
+        if spec["saisie"] == "proportion":
+            return executer_proportions(job, ligne)
+        if spec["statistique"] is None:
+            raise ValueError(f"le test {job['test']} ne produit pas de ligne de résultats unique")
+        args = charger_donnees(spec, job["file"], job.get("columns"), job.get("chunked", False))
+        lecture = time.perf_counter()
+
+        result = charger_runner(nom)(*args, ligne["alpha"])
+        fin = time.perf_counter()
+
+        ligne.update({
+            "n": _effectif(spec, args),
+            **resumer_resultat(nom, result),
+            "status": "ok",
+            "read_s": round(lecture - debut, 6),
+            "compute_s": round(fin - lecture, 6),
+        })
+    except Exception as e:
+        ligne.update({"status": f"erreur : {e}", "read_s": None,
+                      "compute_s": round(time.perf_counter() - debut, 6)})
+    return [ligne]
+
+
+def ecrire_resultats(lignes, chemin, correction=None):
+    """Tableau des résultats en CSV, ou en Parquet si l'extension est .parquet (pyarrow requis).
+
+    Avec une correction, les p-values sont ajustées sur toutes les lignes du lot, décisions au seuil de chaque ligne.
+    """
+    colonnes = ["file", "test", "columns", "segment", "alpha", "n", "statistic", "critical_value", "p_value",
+                "reject", "status", "read_s", "compute_s"]
+    df = pd.DataFrame(lignes, columns=colonnes)
+    if correction is not None:
+        df["p_adjusted"] = adjust_p_values(df["p_value"].to_numpy(dtype=float), correction)
+        df["reject_adjusted"] = df["p_adjusted"] <= df["alpha"]
+    if chemin.endswith(".parquet"):
+        df.to_parquet(chemin, index=False)
+    else:
+        df.to_csv(chemin, index=False)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exécute des tests statistiques en lot sur des fichiers CSV.")
+    parser.add_argument("manifeste", nargs="?", help="manifeste JSON des travaux")
+    parser.add_argument("--files", nargs="+", help="fichiers CSV (à la place d'un manifeste)")
+    parser.add_argument("--test", help="clé du test pour --files (ex. mann_whitney, anova)")
+    parser.add_argument("--columns", nargs="+", help="colonnes à utiliser pour --files")
+    parser.add_argument("--alpha", type=float, default=0.05, help="seuil de signification (défaut 0.05)")
+    parser.add_argument("--chunked", action="store_true", help="lecture des fichiers par blocs")
+    parser.add_argument("--by", nargs="+", help="colonnes clés : un test par segment d'une table longue")
+    parser.add_argument("--group", help="colonne des groupes comparés dans chaque segment")
+    parser.add_argument("--correction", choices=list(CORRECTIONS), help="correction des tests multiples du lot")
+    parser.add_argument("-o", "--output", default="resultats.csv", help="fichier de résultats (.csv ou .parquet)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="nombre de processus")
+    args = parser.parse_args(argv)
+
+    if args.manifeste:
+        travaux = lire_manifeste(args.manifeste)
+    elif args.files and args.test:
+        travaux = [{"file": f, "test": args.test, "columns": args.columns, "alpha": args.alpha,
+                    "chunked": args.chunked, "by": args.by, "group": args.group} for f in args.files]
+    else:
+        parser.error("indiquer un manifeste, ou --files et --test")
+
+    debut = time.perf_counter()
+    if args.jobs == 1:
+        lignes = [ligne for job in travaux for ligne in executer_travail(job)]
+    else:
+        cles = sorted({job["test"] for job in travaux if job["test"] in {s["cle"] for s in TESTS.values()}})
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_prechauffer, initargs=(cles,)) as pool:
+            lignes = [ligne for lignes_job in pool.map(executer_travail, travaux,
+                                                       chunksize=max(1, len(travaux) // (4 * args.jobs)))
+                      for ligne in lignes_job]
+
+    correction = args.correction or next((job["correction"] for job in travaux if job.get("correction")), None)
+    df = ecrire_resultats(lignes, args.output, correction)
+    erreurs = int((df["status"] != "ok").sum())
+    print(f"{len(travaux)} travaux, {len(df)} lignes en {time.perf_counter() - debut:.2f} s ({erreurs} en erreur) "
+          f"→ {args.output}",
+          file=sys.stderr)
+    return 1 if erreurs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
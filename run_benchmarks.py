@@ -0,0 +1,129 @@
+"""Mesures de performance des tests et des figures : python run_benchmarks.py [--sizes 10 1000 100000]
+
+Chaque cas de benchmarks/cases.py (kendall_tau_simplifie, chaque fonction run_*, les intervalles bootstrap, chaque
+figure de utils/visualisation.py) est exécuté sur des données synthétiques de n lignes, sans ex aequo puis avec ex aequo.
+Pour chaque mesure : meilleur temps sur des répétitions d'au moins 0,2 s, débit (lignes/s), pic mémoire
+(tracemalloc, dans une exécution séparée) et écart du résultat à la valeur de référence calculée par scipy
+(pour un intervalle bootstrap réparti entre processus : au même calcul en un seul processus).
+Une charge fixe, chronométrée au début et à la fin, corrige les débits comparés de la vitesse de la machine ;
+une régression supposée est remesurée plus longuement avant d'être signalée.
+
+    python run_benchmarks.py --save                     # enregistre benchmarks/baseline.json
+    python run_benchmarks.py --threshold 0.25           # compare à la référence : code de sortie 1 si un débit
+                                                        # baisse de plus de 25 %, si un résultat est inexact, si
+                                                        # un cas échoue ou si une mesure de la référence manque
+    python run_benchmarks.py --cases kendall spearman --sizes 10 1000000 10000000
+
+Les tailles au-delà du "max_n" d'un cas (figures, tableaux à plusieurs colonnes) sont ignorées.
+"""
+import argparse
+import os
+import sys
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import pandas as pd
+
+from benchmarks.cases import CAS
+from benchmarks.harness import (DUREE_MIN, charger_reference, comparer, enregistrer_reference, etalonner, mesurer,
+                                prechauffer, sans_mesure)
+
+REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+TAILLES = [10, 1_000, 100_000]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure le temps, la mémoire et l'exactitude des tests statistiques.")
+    parser.add_argument("--cases", nargs="+", choices=list(CAS), default=list(CAS), help="cas mesurés (défaut : tous)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=TAILLES,
+                        help="nombres de lignes (défaut 10 1000 100000, jusqu'à 10000000)")
+    parser.add_argument("--ties", choices=["both", "yes", "no"], default="both",
+                        help="données avec ex aequo, sans, ou les deux (défaut)")
+    parser.add_argument("--baseline", default=REFERENCE, help="fichier de référence JSON")
+    parser.add_argument("--save", action="store_true", help="enregistre les mesures comme nouvelle référence")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="baisse de débit tolérée par rapport à la référence (défaut 0.25)")
+    parser.add_argument("--min-time", type=float, default=DUREE_MIN, help="durée cumulée des répétitions (s)")
+    parser.add_argument("--no-memory", action="store_true", help="sans mesure du pic mémoire (exécution unique)")
+    parser.add_argument("-o", "--output", help="tableau des mesures (.csv)")
+    args = parser.parse_args(argv)
+
+    prechauffer(args.cases)
+    etalon = etalonner()
+    lignes = []
+    variantes = [False, True] if args.ties == "both" else [args.ties == "yes"]
+    for nom in args.cases:
+        cas = CAS[nom]
+        for ex_aequo in variantes:
+            if ex_aequo and not cas["ex_aequo"]:
+                continue
+            for n in args.sizes:
+                if n > cas.get("max_n", n):
+                    continue
+                ligne = mesurer(nom, n, ex_aequo, memoire=not args.no_memory, duree_min=args.min_time)
+                lignes.append(ligne)
+                print(f"{nom:<24} n={n:<10} {'ex aequo' if ex_aequo else 'continu':<9} "
+                      + (f"{ligne['secondes'] * 1e3:10.3f} ms" if ligne["secondes"] is not None else " " * 13)
+                      + (f"  {ligne['pic_mo']:9.2f} Mo" if ligne["pic_mo"] is not None else "")
+                      + ("" if ligne["exact"] is not False else f"  INEXACT (écart {ligne['ecart']:.3g})")
+                      + ("" if ligne["statut"] == "ok" else f"  {ligne['statut']}"), flush=True)
+
+    # Seconde mesure de la charge d'étalonnage : la plus rapide des deux, comme pour les cas
+    etalon = min(etalon, etalonner())
+
+    code = 0
+    erreurs = [l for l in lignes if l["statut"].startswith("erreur")]
+    if erreurs:
+        print(f"\n{len(erreurs)} cas en erreur :", file=sys.stderr)
+        for l in erreurs:
+            print(f"  {l['cas']} n={l['n']} {'ex aequo' if l['ex_aequo'] else 'continu'} : {l['statut']}",
+                  file=sys.stderr)
+        code = 1
+
+    inexacts = [l for l in lignes if l["exact"] is False]
+    if inexacts:
+        print(f"\n{len(inexacts)} résultat(s) hors tolérance par rapport à la référence :", file=sys.stderr)
+        for l in inexacts:
+            print(f"  {l['cas']} n={l['n']} : obtenu {l['obtenu']!r}, attendu {l['attendu']!r}", file=sys.stderr)
+        code = 1
+
+    if args.save:
+        enregistrer_reference(lignes, args.baseline, etalon)
+        print(f"\nRéférence enregistrée : {args.baseline}")
+    elif os.path.exists(args.baseline):
+        reference = charger_reference(args.baseline)
+        # Mesures de la référence absentes de cette exécution alors que leur cas et leur taille étaient demandés
+        # (un cas retiré du registre compte toujours comme demandé)
+        manquantes = sans_mesure(lignes, reference, lambda nom, n, ex_aequo: (
+            (nom not in CAS or nom in args.cases) and n in args.sizes and ex_aequo in variantes))
+        if manquantes:
+            print(f"\n{len(manquantes)} mesure(s) de la référence sans mesure actuelle :", file=sys.stderr)
+            for cle in manquantes:
+                print(f"  {cle}", file=sys.stderr)
+            code = 1
+        regressions = comparer(lignes, reference, args.threshold, etalon)
+        if regressions:
+            # Confirmation : chaque régression supposée est remesurée plus longuement, la plus rapide mesure est gardée
+            for l in regressions:
+                nouvelle = mesurer(l["cas"], l["n"], l["ex_aequo"], memoire=False, duree_min=5 * args.min_time)
+                if nouvelle["secondes"] is not None and nouvelle["secondes"] < l["secondes"]:
+                    l.update(secondes=nouvelle["secondes"], lignes_par_s=nouvelle["lignes_par_s"])
+            regressions = comparer(lignes, reference, args.threshold, min(etalon, etalonner()))
+        if regressions:
+            print(f"\n{len(regressions)} régression(s) de débit au-delà de {args.threshold:.0%} :", file=sys.stderr)
+            for l in regressions:
+                print(f"  {l['cas']} n={l['n']} {'ex aequo' if l['ex_aequo'] else 'continu'} : "
+                      f"{l['rapport_debit']:.2f} × le débit de référence", file=sys.stderr)
+            code = 1
+        else:
+            print(f"\nAucune régression de débit au-delà de {args.threshold:.0%}.")
+    else:
+        print(f"\nPas de référence ({args.baseline}) : lancer avec --save pour l'enregistrer.")
+
+    if args.output:
+        pd.DataFrame(lignes).to_csv(args.output, index=False)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,17 @@
 from math import log, sqrt
-from scipy.stats import chi2
+import numpy as np
+from utils.batch import as_rows, reshape_rows
+from utils.distributions import critical_value, p_value, p_values
+from utils.group_stats import group_moments, row_group_moments, stack_groups
 
 def run_bartlett_test(groups, alpha=0.05):
     k = len(groups)
-    n_i = [len(group) for group in groups]
+    counts, _, m2 = group_moments(groups)
+    n_i = [int(c) for c in counts]
     N = sum(n_i)
 
-    # Moyennes et variances individuelles
-    var_i = [sum((x - sum(group)/len(group))**2 for x in group) / (len(group) - 1) for group in groups]
+    # Variances individuelles (non biaisées)
+    var_i = [float(v) for v in m2 / (counts - 1)]
 
     # Variance globale pondérée (sp²)
     numerator = sum((n_i[i] - 1) * var_i[i] for i in range(k))
@@ -23,9 +27,11 @@ def run_bartlett_test(groups, alpha=0.05):
     T = num / denom
 
     ddl = k - 1
-    chi2_crit = chi2.ppf(1 - alpha, ddl)
+    chi2_crit = critical_value("chi2", alpha, ddl)
+    p = p_value("chi2", T, ddl)
 
-    if T > chi2_crit:
+    reject = bool(T > chi2_crit)
+    if reject:
         conclusion = (
             f"Au seuil de signification de {alpha:.2f}, la statistique T = {T:.3f} dépasse la valeur critique "
             f"χ²({ddl}) = {chi2_crit:.3f}. Les variances sont significativement différentes."
@@ -44,5 +50,38 @@ def run_bartlett_test(groups, alpha=0.05):
         "var_i": [round(v, 4) for v in var_i],
         "n_i": n_i,
         "chi2_crit": round(chi2_crit, 4),
+        "p_value": p,
+        "reject": reject,
         "conclusion": conclusion
     }
+
+
+def bartlett_batch(groups, alpha=0.05, axis=-1, labels=None):
+    """Bartlett ligne par ligne : une liste de tableaux (un par groupe), ou un tableau et les étiquettes de groupe."""
+    if labels is None:
+        values, labels, shape = stack_groups(groups, axis)
+    else:
+        values, shape = as_rows(groups, axis)
+        labels = np.asarray(labels)
+
+    counts, _, m2 = row_group_moments(values, labels)
+    k = len(counts)
+    N = int(counts.sum())
+
+    var_i = m2 / (counts - 1)
+    sp2 = m2.sum(axis=1) / (N - k)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        num = (N - k) * np.log(sp2) - ((counts - 1) * np.log(var_i)).sum(axis=1)
+    denom = 1 + (1 / (3 * (k - 1))) * ((1 / (counts - 1)).sum() - 1 / (N - k))
+    T = num / denom
+
+    ddl = k - 1
+    chi2_crit = critical_value("chi2", alpha, ddl)
+    return reshape_rows({
+        "T": T,
+        "ddl": ddl,
+        "sp2": sp2,
+        "chi2_crit": chi2_crit,
+        "p_value": p_values("chi2", T, ddl),
+        "reject": T > chi2_crit,
+    }, shape)
@@ -0,0 +1,368 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+from utils.batch import BLOCK_ELEMENTS, row_blocks, worker_count
+from utils.distributions import p_value, quantile
+
+# Au-delà de ce nombre d'observations, le jackknife de l'intervalle BCa se fait par blocs d'observations
+JACKKNIFE_MAX = 200
+# Jusqu'à ce nombre d'observations, Kendall passe par la matrice des signes des paires (produits matriciels) ;
+# au-delà, par un comptage par fusion pondéré, vectorisé sur le lot
+KENDALL_BOOTSTRAP_MAX = 2000
+# Au-delà de ce nombre d'observations, l'intervalle de τ n'est pas calculé (log₂ n passes sur chaque lot :
+# une minute par cœur pour 10 000 rééchantillons à la limite)
+KENDALL_BOOTSTRAP_LIMIT = 20_000
+# En dessous de cette taille de strate, les multiplicités d'un lot sont comptées en un seul bincount
+BINCOUNT_PAR_LIGNE = 1000
+
+
+def _tirer_effectifs(rng, tailles, b):
+    """Multiplicités (b, N) de chaque observation dans b rééchantillons, tirés avec remise dans chaque strate."""
+    effectifs = np.empty((b, sum(tailles)))
+    debut = 0
+    for taille in tailles:
+        idx = rng.integers(0, taille, (b, taille), dtype=np.int32)
+        if taille >= BINCOUNT_PAR_LIGNE:
+            # Grande strate : un comptage par rééchantillon, dont le tableau de comptes reste en cache
+            for ligne, tirage in zip(effectifs[:, debut:debut + taille], idx):
+                ligne[:] = np.bincount(tirage, minlength=taille)
+        else:
+            idx += (np.arange(b, dtype=np.int32) * taille)[:, None]
+            effectifs[:, debut:debut + taille] = np.bincount(idx.ravel(), minlength=b * taille).reshape(b, taille)
+        debut += taille
+    return effectifs
+
+
+def _evaluer(statistic, tailles, rng, b):
+    return statistic(_tirer_effectifs(rng, tailles, b))
+
+
+def _tirage_binomial(n, p_hat, rng, b):
+    return rng.binomial(n, p_hat, b) / n
+
+
+def _lots(tirage, graines, tailles):
+    return np.concatenate([tirage(np.random.default_rng(g), t) for g, t in zip(graines, tailles)])
+
+
+def _distribution(tirage, n_resamples, taille_lot, seed, workers, volume):
+    """Statistiques bootstrap, lot par lot ; une graine dérivée par lot, donc un résultat indépendant de workers.
+
+    tirage(rng, b) est une fonction de module (ou un partial) : quand worker_count accorde plusieurs processus pour
+    ce volume de calcul, chacun évalue une tranche contiguë de lots.
+    """
+    lots = [min(taille_lot, n_resamples - debut) for debut in range(0, n_resamples, taille_lot)]
+    graines = np.random.SeedSequence(seed).spawn(len(lots))
+    workers = min(worker_count(workers, volume), len(lots))
+    if workers > 1:
+        tranches = np.array_split(np.arange(len(lots)), workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_lots, tirage, [graines[i] for i in t], [lots[i] for i in t]) for t in tranches]
+            return np.concatenate([f.result() for f in futures])
+    return _lots(tirage, graines, lots)
+
+
+def _jackknife(statistic, N):
+    """Statistiques en retirant une observation (ou un bloc d'observations quand N > JACKKNIFE_MAX)."""
+    blocs = np.array_split(np.arange(N), min(N, JACKKNIFE_MAX))
+    valeurs = []
+    for lignes in row_blocks(len(blocs), N):
+        poids = np.ones((lignes.stop - lignes.start, N))
+        for i, bloc in enumerate(blocs[lignes]):
+            poids[i, bloc] = 0.0
+        valeurs.append(statistic(poids))
+    return np.concatenate(valeurs)
+
+
+def _acceleration(jack, poids=None):
+    """Accélération a de l'intervalle BCa à partir des valeurs jackknife."""
+    ecarts = np.average(jack, weights=poids) - jack
+    poids = np.ones(len(jack)) if poids is None else np.asarray(poids, dtype=float)
+    denominateur = 6 * ((poids * ecarts ** 2).sum()) ** 1.5
+    return float((poids * ecarts ** 3).sum() / denominateur) if denominateur > 0 else 0.0
+
+
+def _intervalle(theta, boot, alpha, method, acceleration=None):
+    """Intervalle percentile ou BCa de niveau 1 - alpha à partir de la distribution bootstrap."""
+    boot = boot[np.isfinite(boot)]
+    B = len(boot)
+    if B == 0:
+        raise ValueError("Aucun rééchantillon exploitable (statistique indéfinie).")
+
+    if method == "percentile":
+        niveaux = [alpha / 2, 1 - alpha / 2]
+    elif method == "bca":
+        # Correction de biais z0 (bornée pour rester finie) et accélération a
+        proportion = (np.sum(boot < theta) + 0.5 * np.sum(boot == theta)) / B
+        z0 = quantile("norm", min(max(proportion, 1 / (B + 1)), B / (B + 1)))
+        niveaux = []
+        for za in (quantile("norm", alpha / 2), quantile("norm", 1 - alpha / 2)):
+            corrige = z0 + (z0 + za) / (1 - acceleration * (z0 + za))
+            niveaux.append(p_value("norm", -corrige))  # Φ(corrige)
+    else:
+        raise ValueError(f"Méthode inconnue : {method} (percentile ou bca)")
+
+    basse, haute = np.quantile(boot, niveaux)
+    return {
+        "statistic": float(theta),
+        "ci_low": float(basse),
+        "ci_high": float(haute),
+        "confidence": 1 - alpha,
+        "method": method,
+        "n_resamples": B,
+        "std_error": float(boot.std(ddof=1)) if B > 1 else 0.0,
+        "bias": float(boot.mean() - theta),
+    }
+
+
+def bootstrap_counts(statistic, tailles, alpha=0.05, n_resamples=10_000, method="bca", seed=None, workers=1):
+    """Intervalle bootstrap d'une statistique évaluée sur des multiplicités.
+
+    statistic(poids) reçoit une matrice (b, N) de poids des N observations (un rééchantillon par ligne) et renvoie
+    les b valeurs de la statistique. tailles donne la taille de chaque strate (rééchantillonnage stratifié).
+    Les lots sont répartis entre workers processus (None : tous les cœurs) ; statistic doit alors pouvoir être
+    envoyée à un processus (fonction de module ou objet, pas de lambda). Même graine, même résultat quel que
+    soit workers.
+    """
+    N = sum(tailles)
+    theta = float(statistic(np.ones((1, N)))[0])
+    taille_lot = max(1, BLOCK_ELEMENTS // N)
+    boot = _distribution(partial(_evaluer, statistic, tailles), n_resamples, taille_lot, seed, workers,
+                         N * n_resamples)
+    acceleration = _acceleration(_jackknife(statistic, N)) if method == "bca" else None
+    return _intervalle(theta, boot, alpha, method, acceleration)
+
+
+def _deux_series(x, y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) != len(y):
+        raise ValueError("Les deux séries doivent avoir la même taille.")
+    if len(x) < 3:
+        raise ValueError("Au moins 3 observations sont nécessaires.")
+    return x, y
+
+
+def _centrer(values):
+    # Centrage-réduction : les moments pondérés restent précis en double précision
+    ecart = values.std()
+    return (values - values.mean()) / (ecart if ecart > 0 else 1.0)
+
+
+class _Pearson:
+    """r pondéré : moments des rééchantillons d'un lot en un seul produit matriciel."""
+
+    def __init__(self, x, y):
+        x, y = _centrer(x), _centrer(y)
+        self.moments = np.stack([x, y, x * x, y * y, x * y], axis=1)
+
+    def __call__(self, poids):
+        s = poids @ self.moments / poids.sum(axis=1)[:, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (s[:, 4] - s[:, 0] * s[:, 1]) / np.sqrt((s[:, 2] - s[:, 0] ** 2) * (s[:, 3] - s[:, 1] ** 2))
+
+
+def bootstrap_pearson(x, y, alpha=0.05, n_resamples=10_000, method="bca", seed=None, workers=1):
+    """Intervalle bootstrap du coefficient r de Pearson (moments pondérés en un produit matriciel par lot)."""
+    x, y = _deux_series(x, y)
+    return bootstrap_counts(_Pearson(x, y), [len(x)], alpha, n_resamples, method, seed, workers)
+
+
+def _plages(values):
+    """Ordre de tri, début de chaque plage d'ex aequo dans l'ordre trié et numéro de plage de chaque observation."""
+    ordre = np.argsort(values, kind="mergesort")
+    tries = values[ordre]
+    debuts = np.flatnonzero(np.r_[True, tries[1:] != tries[:-1]])
+    plage = np.empty(len(values), dtype=np.int64)
+    plage[ordre] = np.cumsum(np.r_[True, tries[1:] != tries[:-1]]) - 1
+    return ordre, debuts, plage
+
+
+class _Spearman:
+    """ρ pondéré : corrélation de Pearson des rangs moyens de chaque rééchantillon (ex aequo compris).
+
+    Les rangs se déduisent du tri initial, sans retrier : effectifs cumulés des plages d'ex aequo. Les sommes des
+    carrés ne dépendent que des effectifs des plages ; seul le produit croisé demande le rang de chaque observation.
+    """
+
+    def __init__(self, x, y):
+        self.ordre_x, self.debuts_x, plage_x = _plages(x)
+        self.ordre_y, self.debuts_y, plage_y = _plages(y)
+        self.ex_aequo_x = len(self.debuts_x) < len(x)
+        self.ex_aequo_y = len(self.debuts_y) < len(y)
+        # Plage de chaque observation, les observations étant rangées selon x
+        self.plage_x = plage_x[self.ordre_x]
+        self.plage_y = plage_y[self.ordre_x]
+
+    @staticmethod
+    def _rangs(poids_tries, debuts, ex_aequo):
+        """Effectif et rang moyen centré de chaque plage d'ex aequo, pour chaque rééchantillon.
+
+        Rang moyen d'une plage d'effectif e finissant au cumul c : c - (e - 1) / 2 ; centré en retirant (W + 1) / 2.
+        """
+        effectif = np.add.reduceat(poids_tries, debuts, axis=1) if ex_aequo else poids_tries
+        rangs = np.cumsum(effectif, axis=1)
+        centre = rangs[:, -1:] / 2
+        rangs -= effectif * 0.5
+        rangs -= centre
+        return effectif, rangs
+
+    def __call__(self, poids):
+        poids_x = np.take(poids, self.ordre_x, axis=1)
+        effectif_x, rangs_x = self._rangs(poids_x, self.debuts_x, self.ex_aequo_x)
+        effectif_y, rangs_y = self._rangs(np.take(poids, self.ordre_y, axis=1), self.debuts_y, self.ex_aequo_y)
+        # Somme des carrés des rangs moyens centrés : (W³ - Σ e³) / 12, correction des ex aequo comprise
+        total = poids.sum(axis=1) ** 3
+        sxx = (total - np.einsum("ij,ij,ij->i", effectif_x, effectif_x, effectif_x)) / 12
+        syy = (total - np.einsum("ij,ij,ij->i", effectif_y, effectif_y, effectif_y)) / 12
+        if self.ex_aequo_x:
+            rangs_x = np.take(rangs_x, self.plage_x, axis=1)
+        sxy = np.einsum("ij,ij,ij->i", poids_x, rangs_x, np.take(rangs_y, self.plage_y, axis=1))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sxy / np.sqrt(sxx * syy)
+
+
+def bootstrap_spearman(x, y, alpha=0.05, n_resamples=10_000, method="bca", seed=None, workers=1):
+    """Intervalle bootstrap de ρ de Spearman (corrélation des rangs moyens, comme scipy.stats.spearmanr)."""
+    x, y = _deux_series(x, y)
+    return bootstrap_counts(_Spearman(x, y), [len(x)], alpha, n_resamples, method, seed, workers)
+
+
+class _KendallSignes:
+    """τ pondéré pour n ≤ KENDALL_BOOTSTRAP_MAX : C - D et C + D sont des formes quadratiques wᵀSw des poids avec
+    la matrice des signes des paires."""
+
+    def __init__(self, x, y):
+        self.signes = np.sign(x[:, None] - x[None, :]) * np.sign(y[:, None] - y[None, :])
+        self.non_ex_aequo = np.abs(self.signes)
+
+    def __call__(self, poids):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return ((poids @ self.signes) * poids).sum(axis=1) / ((poids @ self.non_ex_aequo) * poids).sum(axis=1)
+
+
+class _KendallFusion:
+    """τ pondéré par un tri fusion de Knight dont la structure est commune à tous les rééchantillons.
+
+    Les observations sont rangées selon (x, y). À chaque niveau de la fusion ascendante, chaque observation de la
+    moitié droite d'un bloc est comparée sur y à toute la moitié gauche : seuls les poids changent d'un
+    rééchantillon à l'autre, les positions (recherches dichotomiques) sont calculées une fois. Pour un lot, un
+    niveau coûte une somme cumulée des poids et quelques lectures indexées, vectorisées sur les b rééchantillons :
+    O(b · n log n) au total. Les paires ex aequo sur x, comptées par la fusion, sont retirées à la fin.
+    """
+
+    def __init__(self, x, y):
+        n = len(x)
+        ordre = np.lexsort((y, x))
+        xs, ys = x[ordre], y[ordre]
+        self.ordre = ordre
+        nouveau_x = np.r_[True, xs[1:] != xs[:-1]]
+        self.debuts_x = np.flatnonzero(nouveau_x)
+        self.debuts_xy = np.flatnonzero(nouveau_x | np.r_[True, ys[1:] != ys[:-1]])
+        self.ordre_y = np.argsort(ys, kind="mergesort")
+        ys_tries = ys[self.ordre_y]
+        self.debuts_y = np.flatnonzero(np.r_[True, ys_tries[1:] != ys_tries[:-1]])
+        rang_y = np.empty(n, dtype=np.int64)
+        rang_y[self.ordre_y] = np.cumsum(np.r_[True, ys_tries[1:] != ys_tries[:-1]]) - 1
+        K = int(rang_y.max()) + 1
+
+        # Niveaux de la fusion : (gauche, droite, < y, ≤ y, début et fin de la moitié gauche du bloc), positions
+        # dans les sommes cumulées des poids de la gauche, rangée par y dans chaque bloc
+        self.niveaux = []
+        courant = np.arange(n)  # positions rangées par y à l'intérieur de chaque bloc de taille s
+        positions = np.arange(n)
+        s = 1
+        while s < n:
+            bloc = positions // (2 * s)
+            a_gauche = positions % (2 * s) < s
+            gauche, droite = courant[a_gauche], courant[~a_gauche]
+            cles_gauche = bloc[a_gauche] * K + rang_y[gauche]
+            bloc_droite = bloc[~a_gauche]
+            cles_droite = bloc_droite * K + rang_y[droite]
+            self.niveaux.append((
+                gauche, droite,
+                np.searchsorted(cles_gauche, cles_droite, "left"),
+                np.searchsorted(cles_gauche, cles_droite, "right"),
+                np.searchsorted(cles_gauche, bloc_droite * K, "left"),
+                np.searchsorted(cles_gauche, (bloc_droite + 1) * K, "left"),
+            ))
+            courant = courant[np.lexsort((rang_y[courant], bloc))]
+            s *= 2
+
+    def __call__(self, poids):
+        w = poids[:, self.ordre]
+        b = len(w)
+        # Σ_{i<j} w_i w_j sgn(y_j - y_i), i et j dans l'ordre de (x, y)
+        difference = np.zeros(b)
+        for gauche, droite, inferieur, inferieur_egal, debut, fin in self.niveaux:
+            cumul = np.zeros((b, len(gauche) + 1))
+            np.cumsum(w[:, gauche], axis=1, out=cumul[:, 1:])
+            # Poids de la gauche sous y_d moins poids de la gauche au-dessus de y_d
+            ecart = cumul[:, inferieur]
+            ecart += cumul[:, inferieur_egal]
+            ecart -= cumul[:, debut]
+            ecart -= cumul[:, fin]
+            difference += np.einsum("ij,ij->i", w[:, droite], ecart)
+
+        total = w.sum(axis=1)
+        carres_x = (np.add.reduceat(w, self.debuts_x, axis=1) ** 2).sum(axis=1)
+        carres_y = (np.add.reduceat(w[:, self.ordre_y], self.debuts_y, axis=1) ** 2).sum(axis=1)
+        carres_xy = (np.add.reduceat(w, self.debuts_xy, axis=1) ** 2).sum(axis=1)
+        # Paires ex aequo sur x (et pas sur y) : comptées +1 par la fusion, qui les voit dans l'ordre de y
+        difference -= (carres_x - carres_xy) / 2
+        # C + D : paires du rééchantillon qui ne sont ex aequo ni sur x ni sur y
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return difference / ((total ** 2 - carres_x - carres_y + carres_xy) / 2)
+
+
+def bootstrap_kendall(x, y, alpha=0.05, n_resamples=10_000, method="bca", seed=None, workers=1):
+    """Intervalle bootstrap de τ = (C - D) / (C + D).
+
+    Jusqu'à KENDALL_BOOTSTRAP_MAX observations, par la matrice des signes des paires ; au-delà, par un tri fusion
+    pondéré commun au lot. Au-delà de KENDALL_BOOTSTRAP_LIMIT observations, l'intervalle n'est pas calculé.
+    """
+    x, y = _deux_series(x, y)
+    n = len(x)
+    if n > KENDALL_BOOTSTRAP_LIMIT:
+        raise ValueError(f"Intervalle bootstrap de τ limité à {KENDALL_BOOTSTRAP_LIMIT} observations (n = {n}).")
+    statistic = _KendallSignes(x, y) if n <= KENDALL_BOOTSTRAP_MAX else _KendallFusion(x, y)
+    return bootstrap_counts(statistic, [n], alpha, n_resamples, method, seed, workers)
+
+
+class _Eta2:
+    """η² pondéré : effectif, somme et somme des carrés de chaque groupe en un seul produit matriciel."""
+
+    def __init__(self, groups):
+        valeurs = _centrer(np.concatenate(groups))
+        indicatrices = np.eye(len(groups))[np.repeat(np.arange(len(groups)), [len(g) for g in groups])]
+        self.k = len(groups)
+        self.plan = np.hstack([indicatrices, indicatrices * valeurs[:, None], indicatrices * (valeurs ** 2)[:, None]])
+
+    def __call__(self, poids):
+        k = self.k
+        m = poids @ self.plan
+        n, s, q = m[:, :k], m[:, k:2 * k], m[:, 2 * k:]
+        total = s.sum(axis=1) ** 2 / n.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return ((s ** 2 / n).sum(axis=1) - total) / (q.sum(axis=1) - total)
+
+
+def bootstrap_anova(groups, alpha=0.05, n_resamples=10_000, method="bca", seed=None, workers=1):
+    """Intervalle bootstrap de η² = SC inter / SC totale, rééchantillonnage stratifié par groupe."""
+    groups = [np.asarray(g, dtype=float) for g in groups]
+    return bootstrap_counts(_Eta2(groups), [len(g) for g in groups], alpha, n_resamples, method, seed, workers)
+
+
+def bootstrap_proportion(x, n, alpha=0.05, n_resamples=10_000, method="bca", seed=None, workers=1):
+    """Intervalle bootstrap de p̂ = x / n : un rééchantillon de n essais 0/1 compte ses succès selon B(n, p̂)."""
+    x, n = int(x), int(n)
+    if n < 2:
+        raise ValueError("Au moins 2 essais sont nécessaires.")
+    p_hat = x / n
+    # Un tirage binomial par rééchantillon : jamais assez de calcul pour le répartir entre processus
+    boot = _distribution(partial(_tirage_binomial, n, p_hat), n_resamples, BLOCK_ELEMENTS, seed, 1, 0)
+    acceleration = None
+    if method == "bca":
+        # Jackknife : retirer un succès (x fois) ou un échec (n - x fois)
+        acceleration = _acceleration(np.array([(x - 1) / (n - 1), x / (n - 1)]), [x, n - x])
+    return _intervalle(p_hat, boot, alpha, method, acceleration)
@@ -1,31 +1,46 @@
-from math import floor
-from scipy.stats import chi2
+import numpy as np
+from utils.distributions import critical_value, p_value, p_values
+
+def _cellules(table):
+    """Cellules non nulles (ligne, colonne, effectif) et forme d'un tableau dense, creux (scipy.sparse) ou en listes."""
+    if hasattr(table, "tocoo"):
+        coo = table.tocoo()
+        garder = coo.data != 0
+        return coo.row[garder], coo.col[garder], coo.data[garder].astype(float), coo.shape
+    dense = np.asarray(table, dtype=float)
+    lignes, colonnes = np.nonzero(dense)
+    return lignes, colonnes, dense[lignes, colonnes], dense.shape
+
 
 def run_chi2_indep_test(table, alpha=0.05):
-    rows = len(table)
-    cols = len(table[0])
-    total = sum(sum(row) for row in table)
+    """χ² d'indépendance sur un tableau dense, creux (scipy.sparse) ou un ContingencyAccumulator.
 
-    # Totaux par lignes et colonnes
-    row_totals = [sum(row) for row in table]
-    col_totals = [sum(table[i][j] for i in range(rows)) for j in range(cols)]
+    La statistique est calculée à partir des seules cellules non nulles et des totaux des lignes et colonnes, sans
+    former le tableau des effectifs théoriques (voir expected_cells et largest_residuals pour l'affichage).
+    """
+    if hasattr(table, "table"):
+        # Accumulateur : tableau construit par blocs à partir de deux colonnes qualitatives
+        table = table.table()[0]
+    lignes, colonnes, effectifs, (rows, cols) = _cellules(table)
 
-    # Calcul des effectifs théoriques
-    expected = [[(row_totals[i] * col_totals[j]) / total for j in range(cols)] for i in range(rows)]
+    # Totaux par lignes et colonnes
+    row_totals = np.bincount(lignes, weights=effectifs, minlength=rows)
+    col_totals = np.bincount(colonnes, weights=effectifs, minlength=cols)
+    total = float(effectifs.sum())
+    if total <= 0:
+        raise ValueError("Le tableau de contingence est vide.")
 
-    # Statistique χ²
-    chi2_stat = 0
-    for i in range(rows):
-        for j in range(cols):
-            o = table[i][j]
-            e = expected[i][j]
-            if e != 0:
-                chi2_stat += (o - e)**2 / e
+    # Statistique χ² : Σ (o - e)²/e = Σ o²/e - N = Σ o (o - e)/e, sur les seules cellules non nulles
+    # (Σ o = Σ e = N) ; les effectifs théoriques ne sont formés que pour ces cellules
+    expected = row_totals[lignes] * col_totals[colonnes] / total
+    chi2_stat = max(float((effectifs * (effectifs - expected) / expected).sum()), 0.0)
 
     ddl = (rows - 1) * (cols - 1)
-    chi2_crit = chi2.ppf(1 - alpha, ddl)
+    chi2_crit = critical_value("chi2", alpha, ddl)
+    p = p_value("chi2", chi2_stat, ddl)
 
-    if chi2_stat > chi2_crit:
+    reject = bool(chi2_stat > chi2_crit)
+    if reject:
         conclusion = (
             f"Au seuil de {alpha:.2f}, la statistique χ² = {chi2_stat:.3f} "
             f"dépasse la valeur critique χ²({ddl}) = {chi2_crit:.3f}. "
@@ -40,12 +55,59 @@ def run_chi2_indep_test(table, alpha=0.05):
 
     return {
         "observed": table,
-        "expected": expected,
         "chi2": round(chi2_stat, 4),
         "ddl": ddl,
         "chi2_crit": round(chi2_crit, 4),
+        "p_value": p,
+        "reject": reject,
         "row_totals": row_totals,
         "col_totals": col_totals,
         "total": total,
         "conclusion": conclusion
     }
+
+
+def expected_cells(result, rows=None, cols=None):
+    """Effectifs théoriques (H₀) des lignes et colonnes demandées (toutes par défaut), calculés à la demande."""
+    r = result["row_totals"] if rows is None else result["row_totals"][rows]
+    c = result["col_totals"] if cols is None else result["col_totals"][cols]
+    return np.outer(r, c) / result["total"]
+
+
+def largest_residuals(result, k=20):
+    """Les k cellules non nulles aux plus forts résidus de Pearson (o - e)/√e : (ligne, colonne, o, e, résidu).
+
+    Seules les cellules observées sont examinées ; les cellules vides ont un résidu négatif -√e.
+    """
+    lignes, colonnes, effectifs, _ = _cellules(result["observed"])
+    attendus = result["row_totals"][lignes] * result["col_totals"][colonnes] / result["total"]
+    residus = (effectifs - attendus) / np.sqrt(attendus)
+    k = min(k, len(residus))
+    meilleurs = np.argpartition(-np.abs(residus), k - 1)[:k] if k else np.array([], dtype=np.int64)
+    meilleurs = meilleurs[np.argsort(-np.abs(residus[meilleurs]), kind="stable")]
+    return [(int(lignes[i]), int(colonnes[i]), float(effectifs[i]), float(attendus[i]), float(residus[i]))
+            for i in meilleurs]
+
+
+def chi2_indep_batch(tables, alpha=0.05):
+    """χ² d'indépendance sur une pile de tableaux de contingence de même forme (..., lignes, colonnes)."""
+    tables = np.asarray(tables, dtype=float)
+    rows, cols = tables.shape[-2:]
+
+    row_totals = tables.sum(axis=-1)
+    col_totals = tables.sum(axis=-2)
+    total = row_totals.sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        expected = row_totals[..., :, None] * col_totals[..., None, :] / total[..., None, None]
+        terms = np.where(expected != 0, (tables - expected) ** 2 / expected, 0.0)
+    chi2_stat = terms.sum(axis=(-2, -1))
+
+    ddl = (rows - 1) * (cols - 1)
+    chi2_crit = critical_value("chi2", alpha, ddl)
+    return {
+        "chi2": chi2_stat,
+        "ddl": ddl,
+        "chi2_crit": chi2_crit,
+        "p_value": p_values("chi2", chi2_stat, ddl),
+        "reject": chi2_stat > chi2_crit,
+    }
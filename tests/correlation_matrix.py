@@ -0,0 +1,199 @@
+from math import sqrt
+import numpy as np
+from tests.kendall import _compter_inversions_lignes
+from utils.batch import BLOCK_ELEMENTS, row_blocks
+from utils.distributions import critical_value, p_values
+from utils.ranks import dense_rank_rows, rank_rows
+
+# Coûts unitaires de Kendall (s, mesurés sur un cœur) qui départagent les deux méthodes :
+# produit matriciel des signes ≈ KENDALL_COUT_PRODUIT · n²/2 · p (signes des paires de lignes, puis BLAS),
+# algorithme de Knight ≈ KENDALL_COUT_KNIGHT · p²/2 · n log₂ n (un tri fusion par paire de colonnes)
+KENDALL_COUT_PRODUIT = 5e-9
+KENDALL_COUT_KNIGHT = 6e-8
+
+
+def _observations_completes(data):
+    """Tableau (n, p) des lignes sans valeur manquante, et noms des colonnes."""
+    columns = [str(c) for c in data.columns] if hasattr(data, "columns") else None
+    values = np.asarray(data, dtype=float)
+    values = values[~np.isnan(values).any(axis=1)]
+    if columns is None:
+        columns = [f"V{j+1}" for j in range(values.shape[1])]
+    return values, columns
+
+
+def _produit_centre(values):
+    """Matrice des co-moments Σ(xi - x̄)(yi - ȳ) de toutes les paires de colonnes, en un produit matriciel."""
+    centered = values - values.mean(axis=0)
+    return centered.T @ centered
+
+
+def pearson_matrix(values):
+    """Coefficients r de toutes les paires de colonnes d'un tableau (n, p)."""
+    cov = _produit_centre(values)
+    scale = np.sqrt(np.diag(cov))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return cov / np.outer(scale, scale)
+
+
+def spearman_matrix(values):
+    """ρ = 1 - 6Σd² / n(n² - 1) de toutes les paires, avec un seul classement par colonne."""
+    n = values.shape[0]
+    ranks, _ = rank_rows(values.T)
+    # Σd² = Σrx² + Σry² - 2 Σ rx·ry : le terme croisé est un produit matriciel
+    squares = (ranks ** 2).sum(axis=1)
+    sum_d2 = squares[:, None] + squares[None, :] - 2 * (ranks @ ranks.T)
+    return 1 - (6 * sum_d2) / (n * (n ** 2 - 1))
+
+
+def _kendall_produit(ranks, ties):
+    """C - D et ex aequo joints de toutes les paires de colonnes : Σ signe(Δx)·signe(Δy) sur les paires de lignes.
+
+    Les lignes i sont prises par groupes consécutifs, comparées à toutes les lignes suivantes (blocs contigus, sans
+    tableau d'indices des n²/2 paires). Rangs denses et signes en float32 : les produits (entiers bornés par la
+    taille d'un bloc, sous 2²⁴) restent exacts.
+    """
+    p, n = ranks.shape
+    rangs = np.ascontiguousarray(ranks.T, dtype=np.float32)
+    diff = np.zeros((p, p))
+    ties_xy = np.zeros((p, p))
+    pas = max(1, BLOCK_ELEMENTS // max(n * p, 1))
+    for debut in range(0, n - 1, pas):
+        fin = min(debut + pas, n - 1)
+        # Ligne i = debut + k face aux lignes debut + 1 + t : seules les paires t ≥ k (ligne suivante) comptent
+        signs = np.sign(rangs[debut + 1:][None, :, :] - rangs[debut:fin, None, :])
+        deja_vues = np.tri(fin - debut, n - debut - 1, -1, dtype=bool)
+        signs[deja_vues] = 0
+        s = signs.reshape(-1, p)
+        diff += s.T @ s
+        if ties.any():
+            tied = (signs == 0).astype(np.float32)
+            tied[deja_vues] = 0
+            t = tied.reshape(-1, p)
+            ties_xy += t.T @ t
+    return diff.round().astype(np.int64), ties_xy.round().astype(np.int64)
+
+
+def _kendall_knight(values, ranks, ties, n0):
+    """Paires concordantes et discordantes par l'algorithme de Knight, toutes les colonnes j > i à la fois."""
+    n, p = values.shape
+    concordant = np.zeros((p, p), dtype=np.int64)
+    discordant = np.zeros((p, p), dtype=np.int64)
+    for i in range(p - 1):
+        others = np.arange(i + 1, p)
+        for rows in row_blocks(len(others), n):
+            cols = others[rows]
+            # Tri lexicographique par la colonne i puis par la colonne j, pour toutes les colonnes j à la fois
+            keys = ranks[i][None, :] * n + ranks[cols]
+            order = np.argsort(keys, axis=1, kind="stable")
+            sorted_keys = np.take_along_axis(keys, order, axis=1)
+            y = np.take_along_axis(ranks[cols], order, axis=1)
+
+            # Ex aequo joints : plages de clés (x, y) égales, chaque ligne commençant une nouvelle plage
+            starts = np.ones((len(cols), n), dtype=bool)
+            starts[:, 1:] = sorted_keys[:, 1:] != sorted_keys[:, :-1]
+            first = np.flatnonzero(starts.ravel())
+            t = np.diff(np.r_[first, starts.size])
+            ties_xy = np.bincount(first // n, weights=t * (t - 1) // 2, minlength=len(cols)).astype(np.int64)
+
+            d = _compter_inversions_lignes(y)
+            discordant[i, cols] = d
+            concordant[i, cols] = n0 - ties[i] - ties[cols] + ties_xy - d
+
+    return concordant + concordant.T, discordant + discordant.T
+
+
+def kendall_matrix(values):
+    """Paires concordantes et discordantes de toutes les paires de colonnes, avec les ex aequo de chaque colonne.
+
+    Knight est choisi quand son coût estimé est le plus faible, soit n / log₂ n au-delà d'environ 12 p
+    (KENDALL_COUT_KNIGHT / KENDALL_COUT_PRODUIT) : n > 1 200 pour 10 colonnes, n > 17 000 pour 100 colonnes.
+    """
+    n, p = values.shape
+    n0 = n * (n - 1) // 2
+    ranks = dense_rank_rows(values.T)
+
+    # Paires ex aequo de chaque colonne
+    ties = np.empty(p, dtype=np.int64)
+    for j in range(p):
+        t = np.bincount(ranks[j])
+        ties[j] = (t * (t - 1) // 2).sum()
+
+    # Méthode au coût estimé le plus faible : le produit croît en n² p, Knight en p² n log n
+    if KENDALL_COUT_KNIGHT * p * n * np.log2(max(n, 2)) < KENDALL_COUT_PRODUIT * n * n:
+        concordant, discordant = _kendall_knight(values, ranks, ties, n0)
+    else:
+        diff, ties_xy = _kendall_produit(ranks, ties)
+        # Paires ni ex aequo en x ni en y : C + D = n0 - tx - ty + txy
+        total = n0 - ties[:, None] - ties[None, :] + ties_xy
+        concordant = (total + diff) // 2
+        discordant = (total - diff) // 2
+    return concordant, discordant, ties, n0
+
+
+def run_correlation_matrix(data, alpha=0.05, method="pearson"):
+    """Coefficients, statistiques de test et décisions pour toutes les paires de colonnes numériques."""
+    values, columns = _observations_completes(data)
+    n, p = values.shape
+    if p < 2:
+        raise ValueError("Au moins deux variables numériques sont nécessaires.")
+    if n < 3:
+        raise ValueError("Au moins 3 observations complètes sont nécessaires.")
+
+    result = {"method": method, "columns": columns, "n": n}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if method == "pearson":
+            coef = pearson_matrix(values)
+            ddl = n - 2
+            stat = coef * sqrt(ddl) / np.sqrt(1 - coef ** 2)
+            crit = critical_value("t", alpha, ddl, bilateral=True)
+            p = p_values("t", stat, ddl, bilateral=True)
+            result["ddl"] = ddl
+        elif method == "spearman":
+            coef = spearman_matrix(values)
+            crit = critical_value("norm", alpha, bilateral=True)
+            # Approximation normale valable pour n > 10, comme run_spearman_test
+            stat = coef * sqrt(n - 1) if n > 10 else np.full_like(coef, np.nan)
+            p = p_values("norm", stat, bilateral=True)
+        elif method == "kendall":
+            concordant, discordant, ties, n0 = kendall_matrix(values)
+            coef = (concordant - discordant) / (concordant + discordant)
+            result["tau_b"] = (concordant - discordant) / np.sqrt(np.outer(n0 - ties, n0 - ties))
+            stat = coef / sqrt((2 * (2 * n + 5)) / (9 * n * (n - 1)))
+            crit = critical_value("norm", alpha, bilateral=True)
+            p = p_values("norm", stat, bilateral=True)
+        else:
+            raise ValueError(f"Méthode inconnue : {method} (pearson, spearman ou kendall)")
+
+    # La diagonale (une variable avec elle-même) n'est pas testée
+    np.fill_diagonal(coef, 1.0)
+    np.fill_diagonal(stat, np.nan)
+    np.fill_diagonal(p, np.nan)
+    reject = np.abs(stat) > crit
+
+    iu = np.triu_indices(len(columns), 1)
+    result.update({
+        "coef": coef,
+        "statistic": stat,
+        "critical_value": crit,
+        "p_value": p,
+        "reject": reject,
+        "n_pairs": len(iu[0]),
+        "n_reject": int(reject[iu].sum()),
+    })
+    return result
+
+
+def strongest_pairs(result, k=50, significant_only=False):
+    """Les k paires de variables au plus fort |coefficient| : (var1, var2, coef, statistique, p-value)."""
+    i, j = np.triu_indices(len(result["columns"]), 1)
+    if significant_only:
+        keep = result["reject"][i, j]
+        i, j = i[keep], j[keep]
+    coef = result["coef"][i, j]
+    order = np.argsort(-np.abs(np.nan_to_num(coef)), kind="stable")[:k]
+    return [
+        (result["columns"][i[o]], result["columns"][j[o]], float(coef[o]),
+         float(result["statistic"][i[o], j[o]]), float(result["p_value"][i[o], j[o]]))
+        for o in order
+    ]
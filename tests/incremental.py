@@ -0,0 +1,332 @@
+from collections import Counter
+import numpy as np
+from tests.kendall import kendall_counts
+from tests.spearman import compute_ranks
+from utils.order_statistic import RankTree
+from utils.ranks import rank_average, tie_correction
+
+
+def _tie_term(t):
+    return t ** 3 - t
+
+
+def _lignes_modifiees(anciennes, nouvelles):
+    """Positions modifiées entre deux saisies de même longueur (une ligne = une valeur par série)."""
+    m = min(len(anciennes[0]), len(nouvelles[0]))
+    differentes = np.zeros(m, dtype=bool)
+    for a, b in zip(anciennes, nouvelles):
+        differentes |= np.asarray(a[:m]) != np.asarray(b[:m])
+    return np.flatnonzero(differentes)
+
+
+def _trop_de_changements(k, n):
+    """Au-delà d'environ log₂ n lignes touchées, un recalcul complet (un tri) coûte moins cher."""
+    return k > max(8, n.bit_length())
+
+
+class _Series:
+    """Valeurs d'une ou deux séries rangées par ligne, dans des tableaux à capacité doublée (ajouts en O(1) amorti)."""
+
+    def __init__(self, *series):
+        self._valeurs = [np.array(s, dtype=float) for s in series]
+        self.n = len(self._valeurs[0])
+
+    def __len__(self):
+        return self.n
+
+    def colonne(self, j):
+        return self._valeurs[j][:self.n]
+
+    def ajouter(self, *valeurs):
+        if self.n == len(self._valeurs[0]):
+            self._valeurs = [np.resize(v, max(8, 2 * self.n)) for v in self._valeurs]
+        for v, x in zip(self._valeurs, valeurs):
+            v[self.n] = x
+        self.n += 1
+
+    def retirer(self):
+        self.n -= 1
+        return tuple(float(v[self.n]) for v in self._valeurs)
+
+    def ligne(self, i):
+        return tuple(float(v[i]) for v in self._valeurs)
+
+    def remplacer(self, i, *valeurs):
+        for v, x in zip(self._valeurs, valeurs):
+            v[i] = x
+
+
+class IncrementalMannWhitney:
+    """U de Mann-Whitney et correction des ex aequo tenus à jour quand on modifie, ajoute ou retire une valeur.
+
+    Chaque groupe est rangé dans un RankTree : une valeur modifiée coûte O(log n) (rangs lus dans l'autre groupe),
+    au lieu du reclassement des n1 + n2 valeurs.
+    """
+
+    def __init__(self, ech1=(), ech2=()):
+        self._construire(ech1, ech2)
+
+    def _construire(self, ech1, ech2):
+        ech1 = np.asarray(ech1, dtype=float)
+        ech2 = np.asarray(ech2, dtype=float)
+        self.series = [_Series(ech1), _Series(ech2)]
+        self.arbres = [RankTree(ech1), RankTree(ech2)]
+        n1 = len(ech1)
+        ranks, sizes = rank_average(np.concatenate([ech1, ech2]))
+        self.U = float(ranks[:n1].sum()) - n1 * (n1 + 1) / 2  # U1 : paires (a, b) avec a > b, ex aequo pour 1/2
+        self.ties = tie_correction(sizes)                     # Σ (t³ - t) de l'échantillon combiné
+
+    @property
+    def n1(self):
+        return len(self.series[0])
+
+    @property
+    def n2(self):
+        return len(self.series[1])
+
+    @property
+    def ech1(self):
+        return self.series[0].colonne(0)
+
+    @property
+    def ech2(self):
+        return self.series[1].colonne(0)
+
+    def _contribution(self, groupe, value):
+        """Part de U apportée par value (du groupe donné) face aux valeurs de l'autre groupe."""
+        autre = self.arbres[1 - groupe]
+        egales = autre.count_equal(value)
+        if groupe == 0:
+            return autre.count_less(value) + 0.5 * egales
+        return autre.count_greater(value) + 0.5 * egales
+
+    def _inserer(self, groupe, value):
+        c = self.arbres[0].count_equal(value) + self.arbres[1].count_equal(value)
+        self.ties += _tie_term(c + 1) - _tie_term(c)
+        self.U += self._contribution(groupe, value)
+        self.arbres[groupe].insert(value)
+
+    def _supprimer(self, groupe, value):
+        self.arbres[groupe].delete(value)
+        c = self.arbres[0].count_equal(value) + self.arbres[1].count_equal(value)
+        self.ties -= _tie_term(c + 1) - _tie_term(c)
+        self.U -= self._contribution(groupe, value)
+
+    def append(self, groupe, value):
+        """Ajoute une valeur à la fin du groupe (0 ou 1)."""
+        self._inserer(groupe, value)
+        self.series[groupe].ajouter(value)
+        return self
+
+    def pop(self, groupe):
+        """Retire la dernière valeur du groupe."""
+        self._supprimer(groupe, *self.series[groupe].retirer())
+        return self
+
+    def replace(self, groupe, i, value):
+        """Remplace la i-ème valeur du groupe."""
+        self._supprimer(groupe, *self.series[groupe].ligne(i))
+        self._inserer(groupe, value)
+        self.series[groupe].remplacer(i, value)
+        return self
+
+    def precalcul(self):
+        """Arguments nommés de run_mann_whitney_test tirés de l'état (pas de reclassement)."""
+        return {"u_ties": (self.U, self.ties)}
+
+    def sync(self, ech1, ech2):
+        """Aligne l'état sur une nouvelle saisie : seules les valeurs modifiées, ajoutées ou retirées sont traitées."""
+        nouveaux = [np.asarray(ech1, dtype=float), np.asarray(ech2, dtype=float)]
+        modifiees = [_lignes_modifiees((s.colonne(0),), (v,)) for s, v in zip(self.series, nouveaux)]
+        k = sum(len(m) + abs(len(s) - len(v)) for m, s, v in zip(modifiees, self.series, nouveaux))
+        if _trop_de_changements(k, self.n1 + self.n2):
+            self._construire(*nouveaux)
+            return self
+        for groupe, (valeurs, lignes) in enumerate(zip(nouveaux, modifiees)):
+            for i in lignes:
+                self.replace(groupe, i, valeurs[i])
+            while len(self.series[groupe]) > len(valeurs):
+                self.pop(groupe)
+            for value in valeurs[len(self.series[groupe]):]:
+                self.append(groupe, value)
+        return self
+
+
+class _IncrementalPaires:
+    """Base des statistiques de paires (x, y) tenues à jour ligne par ligne : ajout, retrait, remplacement, sync."""
+
+    def __init__(self, x=(), y=()):
+        if len(x) != len(y):
+            raise ValueError("Les deux séries doivent avoir la même taille.")
+        self._construire(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+
+    def __len__(self):
+        return len(self.series)
+
+    @property
+    def n(self):
+        return len(self.series)
+
+    @property
+    def x(self):
+        return self.series.colonne(0)
+
+    @property
+    def y(self):
+        return self.series.colonne(1)
+
+    def append(self, x, y):
+        self._inserer(len(self.series), x, y)
+        return self
+
+    def pop(self):
+        self._supprimer(len(self.series) - 1)
+        self.series.retirer()
+        return self
+
+    def replace(self, i, x, y):
+        self._supprimer(i)
+        self._inserer(i, x, y)
+        return self
+
+    def sync(self, x, y):
+        """Aligne l'état sur une nouvelle saisie : seules les lignes modifiées, ajoutées ou retirées sont traitées."""
+        if len(x) != len(y):
+            raise ValueError("Les deux séries doivent avoir la même taille.")
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        lignes = _lignes_modifiees((self.x, self.y), (x, y))
+        if _trop_de_changements(len(lignes) + abs(len(x) - self.n), max(self.n, len(x))):
+            self._construire(x, y)
+            return self
+        for i in lignes:
+            self.replace(i, x[i], y[i])
+        while self.n > len(x):
+            self.pop()
+        for i in range(self.n, len(x)):
+            self.append(x[i], y[i])
+        return self
+
+
+class IncrementalKendall(_IncrementalPaires):
+    """Paires concordantes, discordantes et ex aequo de Kendall tenues à jour ligne par ligne.
+
+    Les ex aequo sur x et sur y viennent de deux RankTree (O(log n)), les ex aequo joints d'un compteur de paires.
+    Les paires discordantes d'une ligne demandent un comptage à deux dimensions : une comparaison vectorisée
+    en O(n) avec les autres lignes, sans tri.
+    """
+
+    def _construire(self, x, y):
+        self.series = _Series(x, y)
+        self.arbres = (RankTree(x), RankTree(y))
+        self.paires = Counter(zip(x.tolist(), y.tolist()))
+        counts = kendall_counts(x, y)
+        self.discordant = counts["discordant"]
+        self.ties_x = counts["ties_x"]
+        self.ties_y = counts["ties_y"]
+        self.ties_xy = counts["ties_xy"]
+
+    def _discordantes(self, x0, y0):
+        x, y = self.x, self.y
+        return int(np.count_nonzero(((x < x0) & (y > y0)) | ((x > x0) & (y < y0))))
+
+    def _inserer(self, i, x0, y0):
+        x0, y0 = float(x0), float(y0)
+        self.discordant += self._discordantes(x0, y0)
+        self.ties_x += self.arbres[0].count_equal(x0)
+        self.ties_y += self.arbres[1].count_equal(y0)
+        self.ties_xy += self.paires[(x0, y0)]
+        self.arbres[0].insert(x0)
+        self.arbres[1].insert(y0)
+        self.paires[(x0, y0)] += 1
+        if i == len(self.series):
+            self.series.ajouter(x0, y0)
+        else:
+            self.series.remplacer(i, x0, y0)
+
+    def _supprimer(self, i):
+        # La ligne elle-même n'est ni discordante ni comptée deux fois : elle reste en place pendant le comptage
+        x0, y0 = self.series.ligne(i)
+        self.discordant -= self._discordantes(x0, y0)
+        self.arbres[0].delete(x0)
+        self.arbres[1].delete(y0)
+        self.paires[(x0, y0)] -= 1
+        self.ties_x -= self.arbres[0].count_equal(x0)
+        self.ties_y -= self.arbres[1].count_equal(y0)
+        self.ties_xy -= self.paires[(x0, y0)]
+        self.series.remplacer(i, np.nan, np.nan)  # exclue des comparaisons jusqu'à son remplacement
+
+    def precalcul(self):
+        """Arguments nommés de kendall_tau_simplifie tirés de l'état."""
+        return {"counts": self.counts()}
+
+    def counts(self):
+        """Même résultat que kendall_counts(x, y)."""
+        n = self.n
+        n0 = n * (n - 1) // 2
+        return {
+            "n": n,
+            "n0": n0,
+            "concordant": n0 - self.ties_x - self.ties_y + self.ties_xy - self.discordant,
+            "discordant": self.discordant,
+            "ties_x": self.ties_x,
+            "ties_y": self.ties_y,
+            "ties_xy": self.ties_xy,
+        }
+
+
+class IncrementalSpearman(_IncrementalPaires):
+    """Rangs moyens de x et de y et Σd² de Spearman tenus à jour ligne par ligne.
+
+    Le rang de la ligne ajoutée vient de deux RankTree en O(log n). Les lignes déjà présentes ne changent de rang
+    que d'un pas (1, ou 1/2 pour un ex aequo) : leurs rangs et Σd² sont corrigés par une opération vectorisée
+    en O(n), sans retrier.
+    """
+
+    def _construire(self, x, y):
+        self.series = _Series(x, y, compute_ranks(x), compute_ranks(y))
+        self.arbres = (RankTree(x), RankTree(y))
+        self.sum_d2 = float(((self.rangs_x - self.rangs_y) ** 2).sum())
+
+    @property
+    def rangs_x(self):
+        return self.series.colonne(2)
+
+    @property
+    def rangs_y(self):
+        return self.series.colonne(3)
+
+    def precalcul(self):
+        """Arguments nommés de run_spearman_test tirés de l'état (copies : l'état change à la saisie suivante)."""
+        return {"ranks": (self.rangs_x.copy(), self.rangs_y.copy())}
+
+    def _decaler(self, x0, y0, signe):
+        """Décale les rangs des autres lignes quand la valeur (x0, y0) arrive (+1) ou part (-1)."""
+        x, y, rx, ry = self.x, self.y, self.rangs_x, self.rangs_y
+        dx = (x > x0) + 0.5 * (x == x0)
+        dy = (y > y0) + 0.5 * (y == y0)
+        e = signe * (dx - dy)
+        self.sum_d2 += float((2 * (rx - ry) * e + e * e).sum())
+        rx += signe * dx
+        ry += signe * dy
+
+    def _inserer(self, i, x0, y0):
+        x0, y0 = float(x0), float(y0)
+        self._decaler(x0, y0, 1)
+        self.arbres[0].insert(x0)
+        self.arbres[1].insert(y0)
+        rx, ry = self.arbres[0].rank(x0), self.arbres[1].rank(y0)
+        self.sum_d2 += (rx - ry) ** 2
+        if i == len(self.series):
+            self.series.ajouter(x0, y0, rx, ry)
+        else:
+            self.series.remplacer(i, x0, y0, rx, ry)
+
+    def _supprimer(self, i):
+        x0, y0, rx, ry = self.series.ligne(i)
+        self.sum_d2 -= (rx - ry) ** 2
+        # Ligne neutralisée avant le décalage des autres (NaN : jamais supérieure ni égale)
+        self.series.remplacer(i, np.nan, np.nan, 0.0, 0.0)
+        self.arbres[0].delete(x0)
+        self.arbres[1].delete(y0)
+        self._decaler(x0, y0, -1)
@@ -1,21 +1,106 @@
 from math import sqrt
+import numpy as np
+from utils.batch import as_rows, reshape_rows, row_blocks
+from utils.distributions import critical_value, p_value, p_values
+from utils.ranks import tie_sizes
 
-def kendall_tau_simplifie(x, y, alpha=0.05):
+
+def _paires_ex_aequo(sorted_values):
+    """Nombre de paires ex aequo dans un tableau déjà trié."""
+    t = tie_sizes(sorted_values)
+    return int((t * (t - 1) // 2).sum())
+
+
+def _compter_inversions(ranks):
+    """Compte les inversions strictes d'un tableau de rangs entiers (tri fusion ascendant)."""
+    return int(_compter_inversions_lignes(np.asarray(ranks)[None, :])[0])
+
+
+def _compter_inversions_lignes(ranks):
+    """Inversions strictes de chaque ligne d'un tableau 2D de rangs entiers, toutes les lignes fusionnées ensemble."""
+    rows, n = ranks.shape
+    inversions = np.zeros(rows, dtype=np.int64)
+    if n < 2 or rows == 0:
+        return inversions
+    m = int(ranks.max()) + 1
+    n_blocks = (n + 1) // 2
+    row = np.repeat(np.arange(rows, dtype=np.int64), n)
+    pos = np.tile(np.arange(n, dtype=np.int64), rows)
+    current = ranks.astype(np.int64).ravel()
+    width = 1
+    while width < n:
+        # Chaque (ligne, bloc) reçoit un décalage propre : les clés restent triées d'un bloc au suivant
+        block = row * n_blocks + pos // (2 * width)
+        is_left = (pos % (2 * width)) < width
+        keys = block * m + current
+
+        # Chaque moitié gauche est triée et les blocs sont décalés de m : left_keys est trié globalement
+        left_keys = keys[is_left]
+        right_keys = keys[~is_left]
+        right_block = block[~is_left]
+
+        # Pour chaque élément de droite : nombre d'éléments de la moitié gauche strictement supérieurs
+        end = np.searchsorted(left_keys, (right_block + 1) * m, side="left")
+        le = np.searchsorted(left_keys, right_keys, side="right")
+        inversions += np.bincount(row[~is_left], weights=end - le, minlength=rows).astype(np.int64)
+
+        # Fusion : les moitiés sont déjà triées, le tri stable (timsort) se ramène à une fusion
+        current = np.sort(keys, kind="stable") - block * m
+        width *= 2
+    return inversions
+
+
+def kendall_counts(x, y):
+    """Paires concordantes, discordantes et ex aequo en O(n log n) (algorithme de Knight)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
     if len(x) != len(y):
         raise ValueError("Les deux séries doivent avoir la même taille.")
-    
+
     n = len(x)
-    concordant = 0
-    discordant = 0
-
-    for i in range(n):
-        for j in range(i + 1, n):
-            dx = x[i] - x[j]
-            dy = y[i] - y[j]
-            if dx * dy > 0:
-                concordant += 1
-            elif dx * dy < 0:
-                discordant += 1
+    n0 = n * (n - 1) // 2
+
+    # Tri lexicographique par x puis y
+    order = np.lexsort((y, x))
+    xs = x[order]
+    ys = y[order]
+
+    ties_x = _paires_ex_aequo(xs)
+    ties_y = _paires_ex_aequo(np.sort(y))
+
+    # Ex aequo joints : plages consécutives où x et y sont égaux
+    if n:
+        same = np.r_[True, (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1]), True]
+        t = np.diff(np.flatnonzero(same))
+        ties_xy = int((t * (t - 1) // 2).sum())
+    else:
+        ties_xy = 0
+
+    # Rangs denses de y, les inversions donnent les paires discordantes
+    _, y_ranks = np.unique(ys, return_inverse=True)
+    discordant = _compter_inversions(y_ranks)
+    concordant = n0 - ties_x - ties_y + ties_xy - discordant
+
+    return {
+        "n": n,
+        "n0": n0,
+        "concordant": concordant,
+        "discordant": discordant,
+        "ties_x": ties_x,
+        "ties_y": ties_y,
+        "ties_xy": ties_xy,
+    }
+
+
+def kendall_tau_simplifie(x, y, alpha=0.05, bootstrap=False, seed=0, workers=None, counts=None):
+    if len(x) != len(y):
+        raise ValueError("Les deux séries doivent avoir la même taille.")
+    # Comptages fournis quand ils sont déjà connus (état incrémental de la saisie), sinon calculés
+    if counts is None:
+        counts = kendall_counts(x, y)
+    n = counts["n"]
+    concordant = counts["concordant"]
+    discordant = counts["discordant"]
 
     total = concordant + discordant
     if total == 0:
@@ -23,25 +108,78 @@ def kendall_tau_simplifie(x, y, alpha=0.05):
     else:
         tau = (concordant - discordant) / total
 
+    # Tau-b : correction des ex aequo sur x et sur y
+    denom_b = sqrt((counts["n0"] - counts["ties_x"]) * (counts["n0"] - counts["ties_y"]))
+    tau_b = (concordant - discordant) / denom_b if denom_b > 0 else 0.0
+
     # Calcul de la variance et de la statistique Z
     var_tau = (2 * (2 * n + 5)) / (9 * n * (n - 1))
     z = tau / sqrt(var_tau)
 
-    # Valeur critique pour test bilatéral à alpha = 0.05
-    z_crit = 1.96  # valeur z de la loi normale centrée réduite
+    # Valeur critique pour test bilatéral au seuil alpha
+    z_crit = critical_value("norm", alpha, bilateral=True)
+    p = p_value("norm", z, bilateral=True)
 
-    # Interprétation correcte, sans p-value
-    if abs(z) > z_crit:
+    # Interprétation par la valeur critique (la p-value est renvoyée à titre indicatif)
+    reject = bool(abs(z) > z_crit)
+    if reject:
         conclusion = (
             f"Au seuil de signification de {alpha:.2f}, la statistique de test Z = {z:.3f} "
-            f"dépasse la valeur critique z = ±{z_crit}. Il existe donc une corrélation significative "
+            f"dépasse la valeur critique z = ±{z_crit:.3f}. Il existe donc une corrélation significative "
             f"entre les deux variables."
         )
     else:
         conclusion = (
             f"Au seuil de signification de {alpha:.2f}, la statistique de test Z = {z:.3f} "
-            f"n'appartient pas à la zone de rejet définie par z = ±{z_crit}. "
+            f"n'appartient pas à la zone de rejet définie par z = ±{z_crit:.3f}. "
             f"Aucune corrélation significative entre les deux variables ne peut être conclue."
         )
 
-    return tau, concordant, discordant, z, z_crit, conclusion
+    # Intervalle de confiance bootstrap de τ (niveau 1 - α), sur demande
+    ic = None
+    if bootstrap:
+        from tests.bootstrap import bootstrap_kendall
+        ic = bootstrap_kendall(x, y, alpha, seed=seed, workers=workers)
+
+    return tau, tau_b, concordant, discordant, z, z_crit, p, conclusion, ic, reject
+
+
+def kendall_batch(x, y, alpha=0.05, axis=-1):
+    """Kendall sur de nombreux jeux de données de même taille (le long de axis) : statistiques vectorisées."""
+    x, shape = as_rows(x, axis)
+    y, _ = as_rows(y, axis)
+    m, n = x.shape
+    i, j = np.triu_indices(n, 1)
+
+    concordant = np.empty(m)
+    discordant = np.empty(m)
+    ties_x = np.empty(m)
+    ties_y = np.empty(m)
+    # Comparaison directe des n(n-1)/2 paires, par blocs de lignes pour borner la mémoire
+    for rows in row_blocks(m, len(i)):
+        sx = np.sign(x[rows][:, i] - x[rows][:, j])
+        sy = np.sign(y[rows][:, i] - y[rows][:, j])
+        prod = sx * sy
+        concordant[rows] = (prod > 0).sum(axis=1)
+        discordant[rows] = (prod < 0).sum(axis=1)
+        ties_x[rows] = (sx == 0).sum(axis=1)
+        ties_y[rows] = (sy == 0).sum(axis=1)
+
+    n0 = n * (n - 1) / 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tau = np.where(concordant + discordant > 0, (concordant - discordant) / (concordant + discordant), 0.0)
+        denom_b = np.sqrt((n0 - ties_x) * (n0 - ties_y))
+        tau_b = np.where(denom_b > 0, (concordant - discordant) / denom_b, 0.0)
+        z = tau / sqrt((2 * (2 * n + 5)) / (9 * n * (n - 1)))
+
+    z_crit = critical_value("norm", alpha, bilateral=True)
+    return reshape_rows({
+        "tau": tau,
+        "tau_b": tau_b,
+        "concordant": concordant,
+        "discordant": discordant,
+        "z": z,
+        "z_crit": z_crit,
+        "p_value": p_values("norm", z, bilateral=True),
+        "reject": np.abs(z) > z_crit,
+    }, shape)
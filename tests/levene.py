@@ -1,28 +1,34 @@
 from math import sqrt
-from scipy.stats import f as fisher_f
+import numpy as np
+from utils.batch import as_rows, reshape_rows
+from utils.distributions import critical_value, p_value, p_values
+from utils.accumulators import DeviationAccumulator, MomentAccumulator
+from utils.group_stats import (
+    flatten_groups, group_moments_labels, moments_from_accumulators, row_group_moments, row_sums_of_squares,
+    stack_groups, sums_of_squares
+)
 
 def run_levene_test(groups, alpha=0.05):
     k = len(groups)
-    n_i = [len(g) for g in groups]
-    N = sum(n_i)
-
-    # Étape 1 : transformer en Z_ij = |x_ij - moyenne_groupe|
-    Z = []
-    Z_flat = []
-    for group in groups:
-        mean_g = sum(group) / len(group)
-        z_group = [abs(x - mean_g) for x in group]
-        Z.append(z_group)
-        Z_flat.extend(z_group)
-
-    overall_mean = sum(Z_flat) / N
-    group_means = [sum(zg)/len(zg) for zg in Z]
-
-    # Somme des carrés entre groupes
-    ss_between = sum(len(Z[i]) * (group_means[i] - overall_mean)**2 for i in range(k))
-    
-    # Somme des carrés intra-groupes
-    ss_within = sum((z - group_means[i])**2 for i in range(k) for z in Z[i])
+    if all(isinstance(g, DeviationAccumulator) for g in groups):
+        # Accumulateurs des |x_ij - moyenne_groupe| déjà calculés (seconde passe en flux)
+        counts, group_means, m2 = moments_from_accumulators(groups)
+    elif any(isinstance(g, MomentAccumulator) for g in groups):
+        raise ValueError(
+            "Le test de Levene attend les écarts absolus : utiliser acc.deviations() "
+            "lors d'une seconde passe sur les données."
+        )
+    else:
+        values, labels = flatten_groups(groups)
+        _, means, _ = group_moments_labels(values, labels, k)
+
+        # Étape 1 : transformer en Z_ij = |x_ij - moyenne_groupe|
+        Z = np.abs(values - means[labels])
+
+        # Étape 2 : ANOVA sur les Z_ij
+        counts, group_means, m2 = group_moments_labels(Z, labels, k)
+    N = int(counts.sum())
+    overall_mean, ss_between, ss_within = sums_of_squares(counts, group_means, m2)
 
     ddl_between = k - 1
     ddl_within = N - k
@@ -31,9 +37,11 @@ def run_levene_test(groups, alpha=0.05):
     ms_within = ss_within / ddl_within
 
     F_obs = ms_between / ms_within
-    F_crit = fisher_f.ppf(1 - alpha, ddl_between, ddl_within)
+    F_crit = critical_value("f", alpha, ddl_between, ddl_within)
+    p = p_value("f", F_obs, ddl_between, ddl_within)
 
-    if F_obs > F_crit:
+    reject = bool(F_obs > F_crit)
+    if reject:
         conclusion = (
             f"Au seuil de signification de {alpha:.2f}, la statistique F = {F_obs:.3f} "
             f"dépasse la valeur critique F({ddl_between}, {ddl_within}) = {F_crit:.3f}. "
@@ -49,11 +57,44 @@ def run_levene_test(groups, alpha=0.05):
     return {
         "F_obs": round(F_obs, 4),
         "F_crit": round(F_crit, 4),
+        "p_value": p,
+        "reject": reject,
         "ddl_between": ddl_between,
         "ddl_within": ddl_within,
         "ms_between": round(ms_between, 4),
         "ms_within": round(ms_within, 4),
-        "group_means": [round(m, 4) for m in group_means],
+        "group_means": [round(float(m), 4) for m in group_means],
         "overall_mean": round(overall_mean, 4),
         "conclusion": conclusion
     }
+
+
+def levene_batch(groups, alpha=0.05, axis=-1, labels=None):
+    """Levene ligne par ligne : une liste de tableaux (un par groupe), ou un tableau et les étiquettes de groupe."""
+    if labels is None:
+        values, labels, shape = stack_groups(groups, axis)
+    else:
+        values, shape = as_rows(groups, axis)
+        labels = np.asarray(labels)
+
+    # Écarts absolus à la moyenne du groupe, puis ANOVA sur ces écarts
+    _, means, _ = row_group_moments(values, labels)
+    counts, group_means, m2 = row_group_moments(np.abs(values - means[:, labels]), labels)
+    k = len(counts)
+    N = int(counts.sum())
+    _, ss_between, ss_within = row_sums_of_squares(counts, group_means, m2)
+
+    ddl_between = k - 1
+    ddl_within = N - k
+    with np.errstate(invalid="ignore", divide="ignore"):
+        F_obs = (ss_between / ddl_between) / (ss_within / ddl_within)
+
+    F_crit = critical_value("f", alpha, ddl_between, ddl_within)
+    return reshape_rows({
+        "F_obs": F_obs,
+        "F_crit": F_crit,
+        "ddl_between": ddl_between,
+        "ddl_within": ddl_within,
+        "p_value": p_values("f", F_obs, ddl_between, ddl_within),
+        "reject": F_obs > F_crit,
+    }, shape)
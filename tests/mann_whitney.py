@@ -1,41 +1,54 @@
 from math import sqrt
-from scipy.stats import norm
+import numpy as np
+from utils.batch import as_rows, reshape_rows
+from utils.distributions import critical_value, p_value, p_values
+from utils.exact import mann_whitney_p_value, use_exact
+from utils.ranks import rank_average, rank_rows, tie_correction
 
-def run_mann_whitney_test(ech1, ech2, alpha=0.05):
+def run_mann_whitney_test(ech1, ech2, alpha=0.05, method="auto", permutation=False, seed=0, workers=None,
+                          u_ties=None):
     n1 = len(ech1)
     n2 = len(ech2)
+    # (U1, correction des ex aequo) fournis quand ils sont déjà connus (état incrémental de la saisie)
+    if u_ties is not None:
+        U1, ties = u_ties
+    else:
+        # Attribuer les rangs combinés
+        ranks, sizes = rank_average(np.concatenate([np.asarray(ech1, dtype=float), np.asarray(ech2, dtype=float)]))
+        U1 = float(ranks[:n1].sum()) - n1 * (n1 + 1) / 2
+        ties = tie_correction(sizes)
     n = n1 + n2
 
-    # Attribuer les rangs combinés
-    data = [(val, 'ech1') for val in ech1] + [(val, 'ech2') for val in ech2]
-    data.sort(key=lambda x: x[0])
-
-    ranks = {}
-    i = 0
-    while i < len(data):
-        val = data[i][0]
-        j = i
-        while j < len(data) and data[j][0] == val:
-            j += 1
-        avg_rank = sum(range(i + 1, j + 1)) / (j - i)
-        for k in range(i, j):
-            ranks[k] = avg_rank
-        i = j
-
-    W1 = sum(ranks[i] for i in range(n) if data[i][1] == 'ech1')
-    W2 = sum(ranks[i] for i in range(n) if data[i][1] == 'ech2')
-
-    U1 = W1 - n1 * (n1 + 1) / 2
-    U2 = W2 - n2 * (n2 + 1) / 2
+    U2 = n1 * n2 - U1
+    W1 = U1 + n1 * (n1 + 1) / 2
+    W2 = U2 + n2 * (n2 + 1) / 2
     U_obs = min(U1, U2)
 
-    # Approximation normale
+    # Approximation normale (variance corrigée des ex aequo)
     mu_U = n1 * n2 / 2
-    sigma_U = sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+    sigma_U = sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
     z = (U_obs - mu_U) / sigma_U
-    z_crit = norm.ppf(1 - alpha / 2)
+    z_crit = critical_value("norm", alpha, bilateral=True)
+
+    # Loi exacte de U (sans ex aequo, effectifs modérés), sinon approximation normale
+    exact = use_exact("mann_whitney", n1, n2, ties=ties > 0, method=method)
+    if exact:
+        p = mann_whitney_p_value(U_obs, n1, n2)
+    else:
+        p = p_value("norm", z, bilateral=True)
 
-    if abs(z) > z_crit:
+    reject = bool(p <= alpha) if exact else bool(abs(z) > z_crit)
+    if exact and reject:
+        conclusion = (
+            f"Au seuil de signification de {alpha:.2f}, la p-value exacte de U = {U_obs:g} vaut {p:.4g}. "
+            f"On conclut à une différence significative entre les deux groupes."
+        )
+    elif exact:
+        conclusion = (
+            f"Au seuil de signification de {alpha:.2f}, la p-value exacte de U = {U_obs:g} vaut {p:.4g}. "
+            f"Aucune différence significative entre les deux groupes ne peut être conclue."
+        )
+    elif reject:
         conclusion = (
             f"Au seuil de signification de {alpha:.2f}, la statistique de test Z = {z:.3f} "
             f"dépasse la valeur critique ±{z_crit:.3f}. On conclut à une différence significative entre les deux groupes."
@@ -47,7 +60,7 @@ def run_mann_whitney_test(ech1, ech2, alpha=0.05):
             f"Aucune différence significative entre les deux groupes ne peut être conclue."
         )
 
-    return {
+    result = {
         "U1": round(U1, 4),
         "U2": round(U2, 4),
         "U_obs": round(U_obs, 4),
@@ -55,7 +68,61 @@ def run_mann_whitney_test(ech1, ech2, alpha=0.05):
         "W2": round(W2, 4),
         "z": round(z, 4),
         "z_crit": round(z_crit, 4),
+        "p_value": p,
+        "reject": reject,
+        "methode": "exacte" if exact else "asymptotique",
         "mu_U": round(mu_U, 4),
         "sigma_U": round(sigma_U, 4),
         "conclusion": conclusion
     }
+    if permutation:
+        # p-value de permutation (exacte pour les petits échantillons), à côté de l'approximation normale
+        from tests.permutation import permutation_mann_whitney
+        result["permutation"] = permutation_mann_whitney(ech1, ech2, alpha, seed=seed, workers=workers)
+    return result
+
+
+def mann_whitney_batch(ech1, ech2, alpha=0.05, axis=-1, method="auto"):
+    """Mann-Whitney ligne par ligne sur des échantillons empilés (observations le long de axis).
+
+    Les lignes sans ex aequo utilisent la loi exacte de U (une seule loi pour toutes les lignes) quand les effectifs
+    le permettent.
+    """
+    ech1, shape = as_rows(ech1, axis)
+    ech2, _ = as_rows(ech2, axis)
+    n1 = ech1.shape[1]
+    n2 = ech2.shape[1]
+    n = n1 + n2
+
+    ranks, correction = rank_rows(np.concatenate([ech1, ech2], axis=1))
+    W1 = ranks[:, :n1].sum(axis=1)
+    W2 = ranks[:, n1:].sum(axis=1)
+    U1 = W1 - n1 * (n1 + 1) / 2
+    U2 = W2 - n2 * (n2 + 1) / 2
+    U_obs = np.minimum(U1, U2)
+
+    mu_U = n1 * n2 / 2
+    sigma_U = np.sqrt(n1 * n2 / 12 * ((n + 1) - correction / (n * (n - 1))))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (U_obs - mu_U) / sigma_U
+
+    z_crit = critical_value("norm", alpha, bilateral=True)
+    p = p_values("norm", z, bilateral=True)
+    reject = np.abs(z) > z_crit
+    exact = (correction == 0) & ~np.isnan(U_obs)
+    if exact.any() and use_exact("mann_whitney", n1, n2, method=method):
+        p[exact] = mann_whitney_p_value(U_obs[exact], n1, n2)
+        reject[exact] = p[exact] <= alpha
+    else:
+        exact[:] = False
+
+    return reshape_rows({
+        "U1": U1,
+        "U2": U2,
+        "U_obs": U_obs,
+        "z": z,
+        "z_crit": z_crit,
+        "p_value": p,
+        "exact": exact,
+        "reject": reject,
+    }, shape)
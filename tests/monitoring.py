@@ -0,0 +1,199 @@
+from abc import ABC, abstractmethod
+from math import atanh, exp, log, sqrt
+import numpy as np
+from utils.accumulators import PairAccumulator
+from utils.distributions import critical_value, p_value
+from utils.order_statistic import SortedRuns
+
+# Écart-type du mélange gaussien de l'effet standardisé (mSPRT) : ordre de grandeur des effets recherchés
+MIXING_SD = 0.1
+
+
+class SequentialMonitor(ABC):
+    """Suivi séquentiel d'un test : état mis à jour lot par lot et décision valide à tout instant.
+
+    La décision repose sur le rapport de vraisemblance mélangé (mSPRT) d'une statistique z ≈ δ·√n_eff :
+    Λ = (1 + r)^(-1/2) · exp(z² r / (2 (1 + r))), r = n_eff · τ². La p-value « toujours valide » min(1, 1/Λ), rendue
+    décroissante au fil des consultations, peut être lue après chaque lot sans gonfler le risque de première espèce.
+    """
+
+    nom = "test"
+
+    def __init__(self, alpha=0.05, tau=MIXING_SD):
+        self.alpha = alpha
+        self.tau = tau
+        self.always_valid_p = 1.0
+        self.n_looks = 0
+
+    @abstractmethod
+    def _statistique(self):
+        """(z, n_eff, détails) de l'état courant ; z est None tant que le test n'est pas défini."""
+
+    def result(self):
+        """Statistique courante, p-value à effectif fixé et décision séquentielle (une consultation de plus)."""
+        z, n_eff, details = self._statistique()
+        z_crit = critical_value("norm", self.alpha, bilateral=True)
+        if z is None or not np.isfinite(z):
+            return {**details, "z": None, "z_crit": round(z_crit, 4), "p_value": None,
+                    "always_valid_p": self.always_valid_p, "reject": False, "n_looks": self.n_looks,
+                    "conclusion": "Pas encore assez d'observations pour conclure."}
+
+        self.n_looks += 1
+        r = n_eff * self.tau ** 2
+        log_lambda = z * z * r / (2 * (1 + r)) - 0.5 * log(1 + r)
+        self.always_valid_p = min(self.always_valid_p, 1.0 if log_lambda <= 0 else exp(-log_lambda))
+        reject = self.always_valid_p <= self.alpha
+
+        if reject:
+            conclusion = (
+                f"Après {self.n_looks} consultation(s), la p-value séquentielle vaut {self.always_valid_p:.4g} "
+                f"≤ {self.alpha:.2f} : on rejette H₀ ({self.nom}), décision valable malgré les consultations répétées."
+            )
+        else:
+            conclusion = (
+                f"Après {self.n_looks} consultation(s), la p-value séquentielle vaut {self.always_valid_p:.4g} "
+                f"> {self.alpha:.2f} : pas de différence significative à ce stade ({self.nom}), le suivi continue."
+            )
+        return {
+            **details,
+            "z": round(z, 4),
+            "z_crit": round(z_crit, 4),
+            "p_value": p_value("norm", z, bilateral=True),  # effectif fixé : invalide si l'on consulte en continu
+            "always_valid_p": self.always_valid_p,
+            "reject": reject,
+            "n_looks": self.n_looks,
+            "conclusion": conclusion,
+        }
+
+
+def _tie_term(t):
+    return t ** 3 - t
+
+
+class MannWhitneyMonitor(SequentialMonitor):
+    """Mann-Whitney suivi lot par lot : U et la correction des ex aequo sont mis à jour en O(b log² n) par lot,
+    par comptages dans les valeurs déjà reçues (séquences triées), sans reclasser l'historique."""
+
+    nom = "Mann-Whitney"
+
+    def __init__(self, alpha=0.05, tau=MIXING_SD):
+        super().__init__(alpha, tau)
+        self.a = SortedRuns()
+        self.b = SortedRuns()
+        self.U = 0.0          # U du premier groupe : paires (a, b) avec a > b, ex aequo comptés pour 1/2
+        self.ties = 0.0       # Σ (t³ - t) sur les plages d'ex aequo de l'échantillon combiné
+
+    def update(self, a=(), b=()):
+        """Ajoute un lot d'observations à chaque groupe (l'un des deux lots peut être vide)."""
+        a = np.asarray(a, dtype=float).ravel()
+        b = np.asarray(b, dtype=float).ravel()
+        a = a[~np.isnan(a)]
+        b = b[~np.isnan(b)]
+
+        valeurs, k = np.unique(np.concatenate([a, b]), return_counts=True)
+        if len(valeurs) == 0:
+            return self
+        # Un seul comptage par groupe, sur les valeurs distinctes du lot ; chaque observation y retrouve les siennes
+        less_a, equal_a = self.a.counts(valeurs)
+        less_b, equal_b = self.b.counts(valeurs)
+
+        # Ex aequo : chaque valeur distincte du lot agrandit sa plage de k à partir de c valeurs déjà reçues
+        c = equal_a + equal_b
+        self.ties += float((_tie_term(c + k) - _tie_term(c)).sum())
+
+        # Nouveaux a contre les b déjà reçus
+        ia = np.searchsorted(valeurs, a)
+        self.U += float(less_b[ia].sum() + 0.5 * equal_b[ia].sum())
+        # Nouveaux b contre tous les a (déjà reçus et nouveaux)
+        ib = np.searchsorted(valeurs, b)
+        a_tries = np.sort(a)
+        gauche = np.searchsorted(a_tries, b, side="left")
+        egaux = equal_a[ib] + np.searchsorted(a_tries, b, side="right") - gauche
+        inferieurs = less_a[ib] + gauche
+        self.U += float((len(self.a) + len(a) - inferieurs - egaux).sum() + 0.5 * egaux.sum())
+
+        self.a.insert(a)
+        self.b.insert(b)
+        return self
+
+    def _statistique(self):
+        n1, n2 = len(self.a), len(self.b)
+        n = n1 + n2
+        details = {"n1": n1, "n2": n2, "U1": self.U, "U2": n1 * n2 - self.U}
+        if n1 == 0 or n2 == 0:
+            return None, 0, details
+        variance = n1 * n2 / 12 * ((n + 1) - self.ties / (n * (n - 1)))
+        if variance <= 0:
+            return None, 0, details
+        z = (self.U - n1 * n2 / 2) / sqrt(variance)
+        return z, n1 * n2 / n, details
+
+
+class ProportionMonitor(SequentialMonitor):
+    """Proportions suivies lot par lot (issues 0/1) : succès et essais cumulés, O(b) par lot.
+
+    Avec p0, test à un échantillon sur le premier groupe ; sinon, comparaison des deux groupes (z à variance poolée).
+    """
+
+    nom = "proportion"
+
+    def __init__(self, alpha=0.05, p0=None, tau=MIXING_SD):
+        super().__init__(alpha, tau)
+        self.p0 = p0
+        self.x = [0, 0]
+        self.n = [0, 0]
+
+    def update(self, a=(), b=()):
+        """Ajoute un lot d'issues 0/1 à chaque groupe."""
+        for i, lot in enumerate((a, b)):
+            lot = np.asarray(lot, dtype=float).ravel()
+            lot = lot[~np.isnan(lot)]
+            self.x[i] += int(lot.sum())
+            self.n[i] += len(lot)
+        return self
+
+    def _statistique(self):
+        (x1, x2), (n1, n2) = self.x, self.n
+        if self.p0 is not None:
+            details = {"x": x1, "n": n1, "p_hat": x1 / n1 if n1 else None}
+            if n1 == 0 or not 0 < self.p0 < 1:
+                return None, 0, details
+            return (x1 / n1 - self.p0) / sqrt(self.p0 * (1 - self.p0) / n1), n1, details
+
+        details = {"x1": x1, "n1": n1, "x2": x2, "n2": n2,
+                   "p1": x1 / n1 if n1 else None, "p2": x2 / n2 if n2 else None}
+        if n1 == 0 or n2 == 0:
+            return None, 0, details
+        pooled = (x1 + x2) / (n1 + n2)
+        variance = pooled * (1 - pooled) * (1 / n1 + 1 / n2)
+        if variance <= 0:
+            return None, 0, details
+        return (x1 / n1 - x2 / n2) / sqrt(variance), n1 * n2 / (n1 + n2), details
+
+
+class PearsonMonitor(SequentialMonitor):
+    """Corrélation de Pearson suivie lot par lot : moments et co-moment cumulés (PairAccumulator), O(b) par lot.
+
+    z = atanh(r) · √(n - 3) (transformation de Fisher).
+    """
+
+    nom = "Pearson"
+
+    def __init__(self, alpha=0.05, tau=MIXING_SD):
+        super().__init__(alpha, tau)
+        self.acc = PairAccumulator()
+
+    def update(self, x=(), y=()):
+        """Ajoute un lot de paires (x, y) ; les paires incomplètes sont ignorées."""
+        self.acc.update(x, y)
+        return self
+
+    def _statistique(self):
+        acc = self.acc
+        details = {"n": acc.n, "r": None}
+        if acc.n < 4 or acc.m2_x <= 0 or acc.m2_y <= 0:
+            return None, 0, details
+        r = acc.c_xy / sqrt(acc.m2_x * acc.m2_y)
+        details["r"] = round(r, 4)
+        r = min(max(r, -1 + 1e-15), 1 - 1e-15)
+        return atanh(r) * sqrt(acc.n - 3), acc.n - 3, details
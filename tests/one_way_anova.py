@@ -1,23 +1,19 @@
 from math import sqrt
-from scipy.stats import f as fisher_f
+import numpy as np
+from utils.batch import as_rows, reshape_rows
+from utils.distributions import critical_value, p_value, p_values
+from utils.group_stats import (
+    group_moments, row_group_moments, row_sums_of_squares, stack_groups, sums_of_squares
+)
+from utils.accumulators import MomentAccumulator
 
-def run_one_way_anova(groups, alpha=0.05):
+def run_one_way_anova(groups, alpha=0.05, bootstrap=False, seed=0, workers=None):
     k = len(groups)
-    all_data = [x for group in groups for x in group]
-    N = len(all_data)
-    overall_mean = sum(all_data) / N
-
-    # Somme des carrés entre groupes (inter-group)
-    ss_between = sum(
-        len(group) * (sum(group)/len(group) - overall_mean) ** 2
-        for group in groups
-    )
-
-    # Somme des carrés intra-groupes
-    ss_within = sum(
-        sum((x - sum(group)/len(group)) ** 2 for x in group)
-        for group in groups
-    )
+    counts, means, m2 = group_moments(groups)
+    N = int(counts.sum())
+
+    # Moyenne globale, sommes des carrés entre groupes (inter) et intra-groupes
+    overall_mean, ss_between, ss_within = sums_of_squares(counts, means, m2)
 
     df_between = k - 1
     df_within = N - k
@@ -26,9 +22,11 @@ def run_one_way_anova(groups, alpha=0.05):
     ms_within = ss_within / df_within
 
     F_obs = ms_between / ms_within
-    F_crit = fisher_f.ppf(1 - alpha, df_between, df_within)
+    F_crit = critical_value("f", alpha, df_between, df_within)
+    p = p_value("f", F_obs, df_between, df_within)
 
-    if F_obs > F_crit:
+    reject = bool(F_obs > F_crit)
+    if reject:
         conclusion = (
             f"Au seuil de signification de {alpha:.2f}, la statistique F = {F_obs:.3f} "
             f"dépasse la valeur critique F(α; {df_between}, {df_within}) = {F_crit:.3f}. "
@@ -41,9 +39,11 @@ def run_one_way_anova(groups, alpha=0.05):
             f"Aucune différence significative entre les moyennes ne peut être conclue."
         )
 
-    return {
+    result = {
         "F_obs": round(F_obs, 4),
         "F_crit": round(F_crit, 4),
+        "p_value": p,
+        "reject": reject,
         "ss_between": round(ss_between, 4),
         "ss_within": round(ss_within, 4),
         "ms_between": round(ms_between, 4),
@@ -51,5 +51,43 @@ def run_one_way_anova(groups, alpha=0.05):
         "df_between": df_between,
         "df_within": df_within,
         "overall_mean": round(overall_mean, 4),
+        "eta2": round(ss_between / (ss_between + ss_within), 4),
         "conclusion": conclusion
     }
+    if bootstrap:
+        # Intervalle de η² (part de variance expliquée par le facteur), rééchantillonnage dans chaque groupe
+        if any(isinstance(g, MomentAccumulator) for g in groups):
+            raise ValueError("L'intervalle bootstrap nécessite les valeurs brutes (indisponible en lecture par blocs).")
+        from tests.bootstrap import bootstrap_anova
+        result["bootstrap"] = bootstrap_anova(groups, alpha, seed=seed, workers=workers)
+    return result
+
+
+def anova_batch(groups, alpha=0.05, axis=-1, labels=None):
+    """ANOVA ligne par ligne : une liste de tableaux (un par groupe), ou un tableau et les étiquettes de groupe le long de axis."""
+    if labels is None:
+        values, labels, shape = stack_groups(groups, axis)
+    else:
+        values, shape = as_rows(groups, axis)
+        labels = np.asarray(labels)
+
+    counts, means, m2 = row_group_moments(values, labels)
+    k = len(counts)
+    N = int(counts.sum())
+    overall_mean, ss_between, ss_within = row_sums_of_squares(counts, means, m2)
+
+    df_between = k - 1
+    df_within = N - k
+    with np.errstate(invalid="ignore", divide="ignore"):
+        F_obs = (ss_between / df_between) / (ss_within / df_within)
+
+    F_crit = critical_value("f", alpha, df_between, df_within)
+    return reshape_rows({
+        "F_obs": F_obs,
+        "F_crit": F_crit,
+        "df_between": df_between,
+        "df_within": df_within,
+        "overall_mean": overall_mean,
+        "p_value": p_values("f", F_obs, df_between, df_within),
+        "reject": F_obs > F_crit,
+    }, shape)
@@ -1,33 +1,39 @@
 from math import sqrt
-from scipy.stats import t as student_t
+import numpy as np
+from utils.batch import as_rows, reshape_rows
+from utils.distributions import critical_value, p_value, p_values
+from utils.accumulators import PairAccumulator
 
-def run_pearson_test(x, y, alpha=0.05):
-    if len(x) != len(y):
-        raise ValueError("Les deux séries doivent avoir la même taille.")
+def run_pearson_test(x, y=None, alpha=0.05, bootstrap=False, seed=0, workers=None):
+    if isinstance(x, PairAccumulator):
+        acc = x
+    else:
+        if len(x) != len(y):
+            raise ValueError("Les deux séries doivent avoir la même taille.")
+        acc = PairAccumulator.from_values(x, y)
 
-    n = len(x)
+    n = acc.n
     if n < 3:
         raise ValueError("Le test de Pearson nécessite au moins 3 observations.")
 
     # Moyennes
-    x_bar = sum(x) / n
-    y_bar = sum(y) / n
+    x_bar = acc.mean_x
+    y_bar = acc.mean_y
 
-    # Calcul de r
-    num = sum((x[i] - x_bar) * (y[i] - y_bar) for i in range(n))
-    den_x = sqrt(sum((x[i] - x_bar)**2 for i in range(n)))
-    den_y = sqrt(sum((y[i] - y_bar)**2 for i in range(n)))
-    r = num / (den_x * den_y)
+    # Calcul de r à partir du co-moment et des sommes des carrés des écarts
+    r = acc.c_xy / sqrt(acc.m2_x * acc.m2_y)
 
     # Statistique de test t
     t_obs = (r * sqrt(n - 2)) / sqrt(1 - r**2)
 
     # Valeur critique de Student à n-2 ddl
     ddl = n - 2
-    t_crit = student_t.ppf(1 - alpha/2, df=ddl)
+    t_crit = critical_value("t", alpha, ddl, bilateral=True)
+    p = p_value("t", t_obs, ddl, bilateral=True)
 
     # Conclusion
-    if abs(t_obs) > t_crit:
+    reject = bool(abs(t_obs) > t_crit)
+    if reject:
         conclusion = (
             f"Au seuil de signification de {alpha:.2f}, la statistique de test t = {t_obs:.3f} "
             f"dépasse la valeur critique ±{t_crit:.3f} (ddl = {ddl}). "
@@ -40,12 +46,46 @@ def run_pearson_test(x, y, alpha=0.05):
             f"Aucune corrélation linéaire significative ne peut être conclue."
         )
 
-    return {
+    result = {
         "r": round(r, 4),
         "t_obs": round(t_obs, 4),
         "t_crit": round(t_crit, 4),
+        "p_value": p,
+        "reject": reject,
         "ddl": ddl,
         "x_bar": round(x_bar, 4),
         "y_bar": round(y_bar, 4),
         "conclusion": conclusion
     }
+    if bootstrap:
+        if isinstance(x, PairAccumulator):
+            raise ValueError("L'intervalle bootstrap nécessite les valeurs brutes (indisponible en lecture par blocs).")
+        from tests.bootstrap import bootstrap_pearson
+        result["bootstrap"] = bootstrap_pearson(x, y, alpha, seed=seed, workers=workers)
+    return result
+
+
+def pearson_batch(x, y, alpha=0.05, axis=-1):
+    """Pearson ligne par ligne sur des séries empilées (observations le long de axis)."""
+    x, shape = as_rows(x, axis)
+    y, _ = as_rows(y, axis)
+    n = x.shape[1]
+    if n < 3:
+        raise ValueError("Le test de Pearson nécessite au moins 3 observations.")
+
+    dx = x - x.mean(axis=1, keepdims=True)
+    dy = y - y.mean(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = (dx * dy).sum(axis=1) / np.sqrt((dx ** 2).sum(axis=1) * (dy ** 2).sum(axis=1))
+        t_obs = r * sqrt(n - 2) / np.sqrt(1 - r ** 2)
+
+    ddl = n - 2
+    t_crit = critical_value("t", alpha, ddl, bilateral=True)
+    return reshape_rows({
+        "r": r,
+        "t_obs": t_obs,
+        "t_crit": t_crit,
+        "ddl": ddl,
+        "p_value": p_values("t", t_obs, ddl, bilateral=True),
+        "reject": np.abs(t_obs) > t_crit,
+    }, shape)
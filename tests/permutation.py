@@ -0,0 +1,172 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import combinations, permutations
+from math import comb, factorial, sqrt
+import numpy as np
+from utils.batch import worker_count
+from utils.ranks import rank_average
+
+# Nombre de rééchantillonnages tirés par lot (une seule évaluation vectorisée de la statistique par lot)
+BATCH_SIZE = 2000
+# En dessous de ce nombre de configurations, la loi de permutation est énumérée exactement
+MAX_EXACT = 400_000
+# Quantile de l'intervalle de confiance de la p-value Monte Carlo utilisé pour l'arrêt anticipé
+Z_ARRET = 3.29
+
+
+def _decision_tranchee(hits, total, alpha):
+    """Vrai si l'intervalle de Wilson de la p-value estimée ne contient plus alpha."""
+    if total == 0:
+        return False
+    p = (hits + 1) / (total + 1)
+    z2 = Z_ARRET ** 2
+    centre = (p + z2 / (2 * total)) / (1 + z2 / total)
+    demi = Z_ARRET * sqrt(p * (1 - p) / total + z2 / (4 * total ** 2)) / (1 + z2 / total)
+    return centre + demi < alpha or centre - demi > alpha
+
+
+def _compter(tirage, seuil, graine, taille):
+    """Nombre de statistiques d'un lot au moins aussi extrêmes que l'observée (exécuté dans un processus)."""
+    return int((tirage(np.random.default_rng(graine), taille) >= seuil).sum())
+
+
+def _monte_carlo(tirage, observed, alpha, n_resamples, seed, workers, early_stop):
+    """Compte des statistiques permutées au moins aussi extrêmes que l'observée, lot par lot.
+
+    tirage(rng, taille) renvoie l'écart |T - E(T)| d'un lot de statistiques permutées ; c'est une fonction de
+    module (ou un partial) pour être envoyée aux processus. Chaque lot a son générateur (SeedSequence.spawn) et
+    l'arrêt anticipé est examiné après chaque lot, dans l'ordre : le résultat ne dépend que de la graine, pas du
+    nombre de workers. Avec workers > 1, chaque tour répartit un lot par processus (ProcessPoolExecutor).
+    """
+    tailles = [min(BATCH_SIZE, n_resamples - debut) for debut in range(0, n_resamples, BATCH_SIZE)]
+    graines = np.random.SeedSequence(seed).spawn(len(tailles))
+    # Tolérance relative : les statistiques égales à l'observée, aux arrondis près, comptent comme extrêmes
+    compter = partial(_compter, tirage, observed - 1e-9 * max(1.0, abs(observed)))
+    hits = 0
+    total = 0
+    stopped = False
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(tailles) > 1 else None
+    try:
+        pas = workers if pool is not None else 1
+        for debut in range(0, len(tailles), pas):
+            tour = slice(debut, debut + pas)
+            if pool is None:
+                resultats = [compter(graines[debut], tailles[debut])]
+            else:
+                resultats = list(pool.map(compter, graines[tour], tailles[tour]))
+            for compte, taille in zip(resultats, tailles[tour]):
+                hits += compte
+                total += taille
+                if early_stop and _decision_tranchee(hits, total, alpha):
+                    stopped = total < n_resamples
+                    break
+            if stopped:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return (hits + 1) / (total + 1), total, stopped
+
+
+def _resultat(statistic, p, n_resamples, exact, stopped, alpha):
+    return {
+        "statistic": statistic,
+        "p_value": p,
+        "n_resamples": n_resamples,
+        "exact": exact,
+        "stopped_early": stopped,
+        "reject": p <= alpha,
+    }
+
+
+def _tirage_mann_whitney(ranks, n1, centre, rng, taille):
+    # Les n1 premières positions d'une permutation aléatoire forment le premier groupe
+    cles = rng.random((taille, len(ranks)))
+    groupe1 = np.argpartition(cles, n1 - 1, axis=1)[:, :n1]
+    return np.abs(ranks[groupe1].sum(axis=1) - centre)
+
+
+def _tirage_wilcoxon(ranks, centre, rng, taille):
+    signes = rng.random((taille, len(ranks))) < 0.5
+    return np.abs(signes @ ranks - centre)
+
+
+def _tirage_spearman(rx, ry, centre, rng, taille):
+    perms = np.argsort(rng.random((taille, len(rx))), axis=1)
+    return np.abs(ry[perms] @ rx - centre)
+
+
+def permutation_mann_whitney(ech1, ech2, alpha=0.05, n_resamples=20_000, seed=None, workers=1, early_stop=True):
+    """p-value bilatérale de Mann-Whitney par permutation des étiquettes de groupe (rangs calculés une fois)."""
+    n1, n2 = len(ech1), len(ech2)
+    ranks, _ = rank_average(np.concatenate([np.asarray(ech1, dtype=float), np.asarray(ech2, dtype=float)]))
+    n = n1 + n2
+    centre = n1 * (n + 1) / 2  # E(W1) sous H₀
+    W1 = float(ranks[:n1].sum())
+    observed = abs(W1 - centre)
+
+    total = comb(n, n1)
+    if total <= MAX_EXACT:
+        # Toutes les affectations possibles de n1 rangs au premier groupe
+        indices = np.fromiter((i for c in combinations(range(n), n1) for i in c), dtype=np.int64).reshape(total, n1)
+        ecarts = np.abs(ranks[indices].sum(axis=1) - centre)
+        p = float((ecarts >= observed - 1e-9 * max(1.0, observed)).mean())
+        return _resultat(W1, p, total, True, False, alpha)
+
+    tirage = partial(_tirage_mann_whitney, ranks, n1, centre)
+    workers = worker_count(workers, n * n_resamples)
+    p, used, stopped = _monte_carlo(tirage, observed, alpha, n_resamples, seed, workers, early_stop)
+    return _resultat(W1, p, used, False, stopped, alpha)
+
+
+def permutation_wilcoxon(x, y, alpha=0.05, n_resamples=20_000, seed=None, workers=1, early_stop=True):
+    """p-value bilatérale de Wilcoxon signé-rang par inversion aléatoire des signes des différences."""
+    diffs = np.asarray(y, dtype=float) - np.asarray(x, dtype=float)
+    diffs = diffs[diffs != 0]
+    if len(diffs) == 0:
+        raise ValueError("Toutes les différences sont nulles.")
+    ranks, _ = rank_average(np.abs(diffs))
+    m = len(ranks)
+    centre = ranks.sum() / 2  # E(R⁺) sous H₀
+    R_pos = float(ranks[diffs > 0].sum())
+    observed = abs(R_pos - centre)
+
+    if 2 ** m <= MAX_EXACT:
+        # Tous les vecteurs de signes : bit j du numéro de configuration = signe de la paire j
+        bits = (np.arange(2 ** m)[:, None] >> np.arange(m)) & 1
+        ecarts = np.abs(bits @ ranks - centre)
+        p = float((ecarts >= observed - 1e-9 * max(1.0, observed)).mean())
+        return _resultat(R_pos, p, 2 ** m, True, False, alpha)
+
+    tirage = partial(_tirage_wilcoxon, ranks, centre)
+    workers = worker_count(workers, m * n_resamples)
+    p, used, stopped = _monte_carlo(tirage, observed, alpha, n_resamples, seed, workers, early_stop)
+    return _resultat(R_pos, p, used, False, stopped, alpha)
+
+
+def permutation_spearman(x, y, alpha=0.05, n_resamples=20_000, seed=None, workers=1, early_stop=True):
+    """p-value bilatérale de Spearman par permutation des rangs de y (rangs calculés une fois)."""
+    if len(x) != len(y):
+        raise ValueError("Les deux séries doivent avoir la même taille.")
+    rx, _ = rank_average(x)
+    ry, _ = rank_average(y)
+    n = len(rx)
+    # Σd² = Σrx² + Σry² - 2 Σrx·ry : seul le produit croisé dépend de la permutation
+    constante = float((rx ** 2).sum() + (ry ** 2).sum())
+    denominateur = n * (n ** 2 - 1)
+    centre = float(rx.sum() * ry.sum() / n)  # E(Σrx·ry) sous H₀
+    croise = float(rx @ ry)
+    rho = 1 - 6 * (constante - 2 * croise) / denominateur
+    observed = abs(croise - centre)
+
+    if factorial(n) <= MAX_EXACT:
+        perms = np.array(list(permutations(range(n))), dtype=np.int64)
+        ecarts = np.abs(ry[perms] @ rx - centre)
+        p = float((ecarts >= observed - 1e-9 * max(1.0, observed)).mean())
+        return _resultat(rho, p, len(perms), True, False, alpha)
+
+    tirage = partial(_tirage_spearman, rx, ry, centre)
+    workers = worker_count(workers, n * n_resamples)
+    p, used, stopped = _monte_carlo(tirage, observed, alpha, n_resamples, seed, workers, early_stop)
+    return _resultat(rho, p, used, False, stopped, alpha)
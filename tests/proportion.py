@@ -1,13 +1,33 @@
 from math import sqrt
-from scipy.stats import norm
+import numpy as np
+from utils.distributions import critical_value, p_value, p_values
+from utils.exact import binomial_p_value, use_binomial_exact
 
-def run_proportion_test(x, n, p0, alpha=0.05):
+def run_proportion_test(x, n, p0, alpha=0.05, method="auto", bootstrap=False, seed=0, workers=None):
     p_hat = x / n 
     std_error = sqrt(p0 * (1 - p0) / n)
     z = (p_hat - p0) / std_error
-    z_crit = norm.ppf(1 - alpha / 2)
+    z_crit = critical_value("norm", alpha, bilateral=True)
 
-    if abs(z) > z_crit:
+    # Loi binomiale exacte quand n·p₀ ou n·(1 - p₀) est petit, sinon approximation normale
+    exact = use_binomial_exact(n, p0, method)
+    if exact:
+        p = binomial_p_value(x, n, p0)
+    else:
+        p = p_value("norm", z, bilateral=True)
+
+    reject = bool(p <= alpha) if exact else bool(abs(z) > z_crit)
+    if exact and reject:
+        conclusion = (
+            f"Au seuil de {alpha:.2f}, la p-value binomiale exacte vaut {p:.4g}. "
+            f"On rejette H₀ : la proportion observée ({p_hat:.3f}) diffère de {p0:.2f}."
+        )
+    elif exact:
+        conclusion = (
+            f"Au seuil de {alpha:.2f}, la p-value binomiale exacte vaut {p:.4g}. "
+            f"Aucune différence significative entre la proportion observée ({p_hat:.3f}) et {p0:.2f}."
+        )
+    elif reject:
         conclusion = (
             f"Au seuil de {alpha:.2f}, Z = {z:.3f} dépasse ±{z_crit:.3f}. "
             f"On rejette H₀ : la proportion observée ({p_hat:.3f}) diffère de {p0:.2f}."
@@ -18,10 +38,98 @@ def run_proportion_test(x, n, p0, alpha=0.05):
             f"Aucune différence significative entre la proportion observée ({p_hat:.3f}) et {p0:.2f}."
         )
 
-    return {
+    result = {
         "p_hat": round(p_hat, 4),
         "z": round(z, 4),
         "z_crit": round(z_crit, 4),
+        "p_value": p,
+        "reject": reject,
+        "methode": "exacte" if exact else "asymptotique",
         "std_error": round(std_error, 4),
         "conclusion": conclusion
     }
+    if bootstrap:
+        from tests.bootstrap import bootstrap_proportion
+        result["bootstrap"] = bootstrap_proportion(x, n, alpha, seed=seed, workers=workers)
+    return result
+
+
+def proportion_batch(x, n, p0=0.5, alpha=0.05, method="auto"):
+    """Test de proportion sur des tableaux de x, n et p0 (diffusion numpy) : un test par élément.
+
+    Les éléments où n·p₀ ou n·(1 - p₀) est petit sont conclus par la loi binomiale exacte (un appel vectorisé).
+    """
+    x, n, p0 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x, n, p0)))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p_hat = x / n
+        std_error = np.sqrt(p0 * (1 - p0) / n)
+        z = (p_hat - p0) / std_error
+
+    z_crit = critical_value("norm", alpha, bilateral=True)
+    p = np.array(p_values("norm", z, bilateral=True), dtype=float)
+    reject = np.array(np.abs(z) > z_crit)
+    exact = np.array(use_binomial_exact(n, p0, method) & ~np.isnan(p_hat))
+    if exact.any():
+        p[exact] = binomial_p_value(x[exact], n[exact], p0[exact])
+        reject[exact] = p[exact] <= alpha
+    return {
+        "p_hat": p_hat,
+        "z": z,
+        "z_crit": z_crit,
+        "std_error": std_error,
+        "p_value": p,
+        "exact": exact,
+        "reject": reject,
+    }
+
+
+def two_proportion_batch(x1, n1, x2, n2, alpha=0.05):
+    """Comparaison de deux proportions (z à variance poolée) sur des tableaux : un test par élément."""
+    x1, n1, x2, n2 = (np.asarray(v, dtype=float) for v in (x1, n1, x2, n2))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p1 = x1 / n1
+        p2 = x2 / n2
+        pooled = (x1 + x2) / (n1 + n2)
+        std_error = np.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+        z = (p1 - p2) / std_error
+
+    z_crit = critical_value("norm", alpha, bilateral=True)
+    return {
+        "p1": p1,
+        "p2": p2,
+        "difference": p1 - p2,
+        "p_pooled": pooled,
+        "std_error": std_error,
+        "z": z,
+        "z_crit": z_crit,
+        "p_value": p_values("norm", z, bilateral=True),
+        "reject": np.abs(z) > z_crit,
+    }
+
+
+def run_proportion_table(data, alpha=0.05, method="auto"):
+    """Un test par ligne d'un tableau : colonnes x, n (et p0, 0.5 par défaut) pour le test à un échantillon, ou
+    x1, n1, x2, n2 pour la comparaison de deux proportions. Renvoie le tableau complété des résultats."""
+    colonnes = set(data.columns)
+    if {"x1", "n1", "x2", "n2"} <= colonnes:
+        resultats = two_proportion_batch(data["x1"], data["n1"], data["x2"], data["n2"], alpha)
+        sortie = data[["x1", "n1", "x2", "n2"]].copy()
+        for cle in ("p1", "p2", "difference", "z", "p_value", "reject"):
+            sortie[cle] = resultats[cle]
+        return sortie
+    if not {"x", "n"} <= colonnes:
+        raise ValueError("Colonnes attendues : x, n (et p0), ou x1, n1, x2, n2.")
+
+    p0 = data["p0"].to_numpy(dtype=float) if "p0" in colonnes else 0.5
+    x = data["x"].to_numpy(dtype=float)
+    n = data["n"].to_numpy(dtype=float)
+    if np.any(x > n):
+        raise ValueError("Le nombre de succès (x) ne peut pas dépasser la taille de l’échantillon (n).")
+    resultats = proportion_batch(x, n, p0, alpha, method)
+    sortie = data[["x", "n"]].copy()
+    sortie["p0"] = p0
+    for cle in ("p_hat", "z", "p_value", "reject"):
+        sortie[cle] = resultats[cle]
+    sortie["methode"] = np.where(resultats["exact"], "exacte", "asymptotique")
+    return sortie
@@ -0,0 +1,232 @@
+from importlib import import_module
+
+# Registre des tests proposés par l'application.
+# Chaque test déclare son module et sa fonction de calcul, les colonnes attendues dans le fichier importé,
+# les clés de sa statistique et de sa valeur critique, son mode de saisie, sa lecture par blocs éventuelle, ses options
+# (p-value de permutation, intervalle bootstrap, suivi séquentiel, état incrémental de la grille) et son graphique.
+# Les modules (et scipy, matplotlib) ne sont importés qu'au moment où le test est exécuté.
+TESTS = {
+    "Test de Kendall Tau simplifié": {
+        "cle": "kendall",
+        "titre": "## 🔹 Test de Kendall Tau simplifié (corrélation de rangs)",
+        "module": "tests.kendall",
+        "runner": "kendall_tau_simplifie",
+        # Résultat renvoyé sous forme de tuple : noms des champs, dans l'ordre
+        "champs": ["tau", "tau_b", "concordant", "discordant", "z", "z_crit", "p_value", "conclusion", "bootstrap",
+                   "reject"],
+        "statistique": ("z", "z_crit"),
+        "saisie": "paires",
+        "entete_saisie": "### 📥 Données des variables",
+        "colonnes": ["X", "Y"],
+        "flux": "colonnes",
+        "bootstrap": True,
+        "bootstrap_max_n": "KENDALL_BOOTSTRAP_LIMIT",  # constante de tests.bootstrap (taille maximale de l'intervalle)
+        # Classe de tests.incremental (grille modifiée ligne par ligne) ; sa méthode precalcul() fournit au runner
+        # les quantités tenues à jour (comptages, rangs…) en arguments nommés
+        "incremental": "IncrementalKendall",
+        "graphique": {"fonction": "afficher_nuage_points", "entete": "### 📊 Nuage de points (x vs y)"},
+    },
+    "Test de Mann-Whitney": {
+        "cle": "mann_whitney",
+        "titre": "## 🔹 Test de Mann-Whitney",
+        "module": "tests.mann_whitney",
+        "runner": "run_mann_whitney_test",
+        "statistique": ("z", "z_crit"),
+        "saisie": "paires",
+        "entete_saisie": "### 📥 Données des échantillons",
+        "colonnes": ["A", "B"],
+        "flux": "colonnes",
+        "permutation": True,
+        "suivi": "MannWhitneyMonitor",  # classe de tests.monitoring (lots successifs)
+        "incremental": "IncrementalMannWhitney",
+        "graphique": {"fonction": "afficher_boxplot", "entete": "### 📊 Boxplot des deux échantillons"},
+    },
+    "Test de Pearson": {
+        "cle": "pearson",
+        "titre": "## 🔹 Test de corrélation linéaire de Pearson",
+        "module": "tests.pearson",
+        "runner": "run_pearson_test",
+        "statistique": ("t_obs", "t_crit"),
+        "saisie": "paires",
+        "entete_saisie": "### 📥 Données des variables",
+        "colonnes": ["X", "Y"],
+        "flux": "paire",
+        "bootstrap": True,
+        "suivi": "PearsonMonitor",
+        "graphique": {"fonction": "afficher_nuage_points", "entete": "### 📊 Nuage de points (x vs y)"},
+    },
+    "Test de Spearman": {
+        "cle": "spearman",
+        "titre": "## 🔹 Test de corrélation de Spearman (implémenté manuellement)",
+        "module": "tests.spearman",
+        "runner": "run_spearman_test",
+        "statistique": ("z", "z_crit"),
+        "saisie": "paires",
+        "entete_saisie": "### 📥 Données des variables",
+        "colonnes": ["X", "Y"],
+        "flux": "colonnes",
+        "permutation": True,
+        "bootstrap": True,
+        "incremental": "IncrementalSpearman",
+        "graphique": {"fonction": "afficher_nuage_points", "entete": "### 📊 Nuage de points (x vs y)"},
+    },
+    "Test One-Way ANOVA": {
+        "cle": "anova",
+        "titre": "## 🔹 Test One-Way ANOVA (analyse de variance à un facteur)",
+        "module": "tests.one_way_anova",
+        "runner": "run_one_way_anova",
+        "statistique": ("F_obs", "F_crit"),
+        "saisie": "groupes",
+        "colonnes": None,  # chaque colonne du fichier est un groupe
+        "flux": "groupes",
+        "bootstrap": True,
+        "graphique": {"fonction": "afficher_boxplot_groupes", "entete": "### 📊 Visualisation des groupes",
+                      "options": {"titre": "ANOVA"}},
+    },
+    "Test de Wilcoxon": {
+        "cle": "wilcoxon",
+        "titre": "## 🔹 Test de Wilcoxon signé-rang (données appariées)",
+        "module": "tests.wilcoxon",
+        "runner": "run_wilcoxon_test",
+        "statistique": ("z", "z_crit"),
+        "saisie": "paires",
+        "entete_saisie": "### 📥 Données appariées",
+        "colonnes": ["A", "B"],
+        "flux": "colonnes",
+        "permutation": True,
+        "graphique": {"fonction": "afficher_diff_ligne", "entete": "### 📊 Visualisation des différences (y - x)"},
+    },
+    "Test de Bartlett (égalité des variances)": {
+        "cle": "bartlett",
+        "titre": "## 🔹 Test de Bartlett (homogénéité des variances)",
+        "module": "tests.bartlett",
+        "runner": "run_bartlett_test",
+        "statistique": ("T", "chi2_crit"),
+        "saisie": "groupes",
+        "bouton": "✅ Exécuter le test de Bartlett",
+        "colonnes": None,
+        "flux": "groupes",
+        "graphique": {"fonction": "afficher_boxplot_groupes", "entete": "### 📊 Visualisation des variances par groupe",
+                      "options": {"titre": "BartLett"}},
+    },
+    "Test de Levene": {
+        "cle": "levene",
+        "titre": "## 🔹 Test de Levene",
+        "module": "tests.levene",
+        "runner": "run_levene_test",
+        "statistique": ("F_obs", "F_crit"),
+        "saisie": "groupes",
+        "bouton": "✅ Exécuter le test de Levene",
+        "colonnes": None,
+        "flux": "ecarts",
+        "graphique": {"fonction": "afficher_boxplot_groupes", "entete": "### 📊 Boxplot des groupes",
+                      "options": {"titre": "Levene"}},
+    },
+    "Test de proportion": {
+        "cle": "proportion",
+        "titre": "## 🔹 Test de proportion (bilatéral)",
+        "module": "tests.proportion",
+        "runner": "run_proportion_test",
+        "statistique": ("z", "z_crit"),
+        "saisie": "proportion",
+        "colonnes": ["x", "n", "p0"],
+        "flux": None,
+        "bootstrap": True,
+        "suivi": "ProportionMonitor",
+        "graphique": {"fonction": "afficher_repartition", "entete": "### 📊 Visualisation"},
+    },
+    "Matrice de corrélations": {
+        "cle": "correlation_matrix",
+        "titre": "## 🔹 Matrice de corrélations (toutes les paires de variables)",
+        "module": "tests.correlation_matrix",
+        "runner": "run_correlation_matrix",
+        "statistique": None,  # résultat matriciel : pas de ligne unique en exécution par lot
+        "saisie": "matrice",
+        "colonnes": None,  # toutes les colonnes numériques du fichier
+        "flux": None,
+        "graphique": None,  # carte des coefficients tracée avec les résultats
+    },
+    "Criblage des variables (top-k)": {
+        "cle": "screening",
+        "titre": "## 🔹 Criblage des variables les plus associées à une cible (top-k)",
+        "module": "tests.screening",
+        "runner": "run_screening",
+        "statistique": None,
+        "saisie": "criblage",
+        "colonnes": None,  # variable cible choisie parmi les colonnes du fichier
+        "flux": "blocs",  # une seule lecture du fichier, par blocs de lignes
+        "graphique": None,
+    },
+    "Test du χ² d’indépendance": {
+        "cle": "chi2",
+        "titre": "## 🔹 Test du χ² d’indépendance (variables qualitatives)",
+        "module": "tests.chi2_independance",
+        "runner": "run_chi2_indep_test",
+        "statistique": ("chi2", "chi2_crit"),
+        "saisie": "contingence",
+        "colonnes": None,  # le fichier est le tableau de contingence, ou deux colonnes qualitatives
+        "flux": "contingence",  # tableau construit bloc par bloc à partir de deux colonnes qualitatives
+        "graphique": None,
+    },
+}
+
+
+# Modes de saisie qu'un segment de table longue peut alimenter (exécution par segment)
+SAISIES_SEGMENTS = ("paires", "groupes", "proportion")
+
+
+def nom_par_cle(cle):
+    """Nom affiché du test à partir de sa clé courte ("anova", "mann_whitney"…)."""
+    for nom, spec in TESTS.items():
+        if spec["cle"] == cle:
+            return nom
+    raise KeyError(f"Test inconnu : {cle} (tests disponibles : {', '.join(s['cle'] for s in TESTS.values())})")
+
+
+def charger_runner(nom):
+    """Importe à la demande le module du test et renvoie sa fonction de calcul."""
+    spec = TESTS[nom]
+    return getattr(import_module(spec["module"]), spec["runner"])
+
+
+def charger_moniteur(nom):
+    """Importe à la demande la classe de suivi séquentiel du test (tests.monitoring)."""
+    return getattr(import_module("tests.monitoring"), TESTS[nom]["suivi"])
+
+
+def charger_incremental(nom):
+    """Importe à la demande la classe d'état incrémental du test (tests.incremental)."""
+    return getattr(import_module("tests.incremental"), TESTS[nom]["incremental"])
+
+
+def limite_bootstrap(nom):
+    """Nombre maximal d'observations de l'intervalle bootstrap du test (None : pas de limite)."""
+    constante = TESTS[nom].get("bootstrap_max_n")
+    return getattr(import_module("tests.bootstrap"), constante) if constante else None
+
+
+def charger_graphique(nom):
+    """Importe à la demande la fonction de tracé du test (matplotlib n'est chargé qu'ici)."""
+    graphique = TESTS[nom]["graphique"]
+    if graphique is None:
+        return None
+    return getattr(import_module("utils.visualisation"), graphique["fonction"])
+
+
+def resumer_resultat(nom, result):
+    """Statistique, valeur critique, p-value et décision d'un résultat, sous forme de ligne de tableau.
+
+    La décision est celle que le test a prise (valeur critique ou p-value exacte), jamais recalculée ici.
+    """
+    spec = TESTS[nom]
+    if spec["statistique"] is None:
+        raise ValueError(f"le test {spec['cle']} ne produit pas de ligne de résultats unique")
+    if "champs" in spec:
+        result = dict(zip(spec["champs"], result))
+    stat, crit = spec["statistique"]
+    return {
+        "statistic": result[stat],
+        "critical_value": result[crit],
+        "p_value": result.get("p_value"),
+        "reject": result["reject"],
+    }
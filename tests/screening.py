@@ -0,0 +1,158 @@
+import heapq
+import numpy as np
+from tests.spearman import compute_ranks
+from utils.accumulators import PairColumnsAccumulator
+from utils.batch import BLOCK_ELEMENTS
+from utils.distributions import p_values
+from utils.multiple_testing import adjust_p_values
+from utils.ranks import rank_rows
+
+
+def _pearson_accumulateur(acc):
+    """r, statistique t, p-value et effectif de chaque colonne à partir de ses co-moments avec la cible."""
+    n = acc.n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Même formule que run_pearson_test : co-moment et sommes des carrés des écarts sur les paires complètes
+        r = acc.c_xy / np.sqrt(acc.m2_x * acc.m2_y)
+        t = r * np.sqrt(n - 2) / np.sqrt(1 - r ** 2)
+        p = p_values("t", t, n - 2, bilateral=True)
+    return r, t, p, n
+
+
+def _pearson_bloc(y, X):
+    """r, statistique t, p-value et effectif de chaque colonne de X avec la cible y (paires complètes)."""
+    return _pearson_accumulateur(PairColumnsAccumulator.from_values(X, y))
+
+
+def _spearman_bloc(y, X):
+    """ρ, statistique z (n > 10), p-value et effectif de chaque colonne de X avec la cible y."""
+    b = X.shape[1]
+    rho = np.full(b, np.nan)
+    n = np.zeros(b, dtype=np.int64)
+    complete = ~np.isnan(X).any(axis=0)
+
+    # Colonnes sans valeur manquante : cible classée une fois, colonnes classées ensemble
+    if complete.any():
+        ry = compute_ranks(y)
+        rx, _ = rank_rows(X[:, complete].T)
+        m = len(y)
+        rho[complete] = 1 - 6 * ((rx - ry) ** 2).sum(axis=1) / (m * (m ** 2 - 1))
+        n[complete] = m
+
+    # Colonnes incomplètes : classement sur les paires valides de chaque colonne
+    for j in np.flatnonzero(~complete):
+        valid = ~np.isnan(X[:, j])
+        m = int(valid.sum())
+        n[j] = m
+        if m > 1:
+            d2 = ((compute_ranks(X[valid, j]) - compute_ranks(y[valid])) ** 2).sum()
+            rho[j] = 1 - 6 * d2 / (m * (m ** 2 - 1))
+
+    with np.errstate(invalid="ignore"):
+        z = np.where(n > 10, rho * np.sqrt(np.maximum(n - 1, 0)), np.nan)
+        p = p_values("norm", z, bilateral=True)
+    return rho, z, p, n
+
+
+def _blocs_tableau(data, exclude, block_columns):
+    """Blocs de colonnes numériques d'un DataFrame ou d'un tableau (n, p), sans la colonne cible."""
+    if hasattr(data, "columns"):
+        names = [c for c in data.select_dtypes("number").columns if c != exclude]
+        for start in range(0, len(names), block_columns):
+            cols = names[start:start + block_columns]
+            yield [str(c) for c in cols], data[cols].to_numpy(dtype=float)
+    else:
+        values = np.asarray(data, dtype=float)
+        cols = [j for j in range(values.shape[1]) if j != exclude]
+        for start in range(0, len(cols), block_columns):
+            idx = cols[start:start + block_columns]
+            yield [f"V{j+1}" for j in idx], values[:, idx]
+
+
+def _blocs_fichier_pearson(file, target, columns, block_columns=None):
+    """Fichier CSV, Pearson : une seule lecture par blocs de lignes, co-moments de toutes les colonnes à la fois."""
+    from utils.ingestion import stream_pair_columns
+    yield [str(c) for c in columns], *_pearson_accumulateur(stream_pair_columns(file, columns, target))
+
+
+def _blocs_fichier_spearman(file, target, columns, block_columns=None):
+    """Fichier CSV, Spearman : les rangs demandent des colonnes entières, relues par blocs depuis une copie binaire
+    du fichier faite en une seule lecture."""
+    from utils.ingestion import spilled_columns
+    with spilled_columns(file, [target, *columns]) as (n_rows, lire):
+        y = lire(0, 1)[:, 0]
+        keep = ~np.isnan(y)
+        y = y[keep]
+        block_columns = block_columns or max(1, BLOCK_ELEMENTS // max(n_rows, 1))
+        for start in range(0, len(columns), block_columns):
+            stop = min(start + block_columns, len(columns))
+            yield [str(c) for c in columns[start:stop]], *_spearman_bloc(y, lire(1 + start, 1 + stop)[keep])
+
+
+def run_screening(data, alpha=0.05, target=None, method="pearson", k=20, correction="bh", block_columns=None):
+    """Les k variables les plus associées (|r| ou |ρ|) à la variable cible, avec décisions ajustées.
+
+    data est un DataFrame, un tableau (n, p) ou un fichier CSV ouvert, lu une seule fois par blocs de lignes.
+    Seuls le bloc courant, le tas des k meilleures et une p-value par variable sont gardés en mémoire.
+    Dans un fichier, les colonnes numériques sont reconnues sur les premières lignes ; une valeur non numérique plus
+    loin compte comme manquante.
+    """
+    if method not in ("pearson", "spearman"):
+        raise ValueError(f"Méthode inconnue : {method} (pearson ou spearman)")
+
+    if hasattr(data, "read"):
+        from utils.ingestion import numeric_columns
+        columns = [c for c in numeric_columns(data) if c != target]
+        blocs = (_blocs_fichier_pearson if method == "pearson" else _blocs_fichier_spearman)(
+            data, target, columns, block_columns)
+    else:
+        if hasattr(data, "columns"):
+            y = data[target].to_numpy(dtype=float)
+        else:
+            y = np.asarray(data, dtype=float)[:, target]
+        block_columns = block_columns or max(1, BLOCK_ELEMENTS // max(len(y), 1))
+        # Lignes où la cible manque : écartées une fois pour toutes
+        keep = ~np.isnan(y)
+        calcul = _pearson_bloc if method == "pearson" else _spearman_bloc
+        blocs = ((names, *calcul(y[keep], X[keep])) for names, X in _blocs_tableau(data, target, block_columns))
+
+    heap = []  # (|coef|, position, nom, coef, statistique, effectif) des k plus fortes associations
+    all_p = []
+    position = 0
+    for names, coef, stat, p, n in blocs:
+        all_p.append(p)
+        strength = np.abs(np.nan_to_num(coef, nan=-1.0))
+        best = np.argsort(-strength, kind="stable")[:k]
+        for j in best:
+            item = (strength[j], -(position + j), names[j], float(coef[j]), float(stat[j]), int(n[j]))
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        position += len(names)
+
+    if position == 0:
+        raise ValueError("Aucune variable numérique à comparer à la cible.")
+    all_p = np.concatenate(all_p)
+    tested = np.nan_to_num(all_p, nan=1.0)
+    m = len(tested)
+
+    top = sorted(heap, reverse=True)
+    indices = np.array([-item[1] for item in top], dtype=np.int64)
+    adjusted_all = adjust_p_values(tested, correction)
+    adjusted = adjusted_all[indices]
+    n_reject = int((adjusted_all <= alpha).sum())
+
+    return {
+        "target": target,
+        "method": method,
+        "correction": correction,
+        "n_features": m,
+        "k": len(top),
+        "n_reject": n_reject,
+        "top": [
+            {"column": item[2], "coef": item[3], "statistic": item[4], "n": item[5],
+             "p_value": float(all_p[idx]), "p_adjusted": float(adj), "reject": bool(adj <= alpha)}
+            for item, idx, adj in zip(top, indices, adjusted)
+        ],
+    }
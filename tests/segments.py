@@ -0,0 +1,134 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from tests.registry import SAISIES_SEGMENTS, TESTS, charger_runner, nom_par_cle, resumer_resultat
+from utils.multiple_testing import adjust_p_values
+
+
+def segment_codes(data, by):
+    """Numéro de segment de chaque ligne (factorisation par hachage des colonnes clés) et niveaux de chaque clé.
+
+    Les lignes dont une clé manque reçoivent le code -1.
+    """
+    codes = np.zeros(len(data), dtype=np.int64)
+    valides = np.ones(len(data), dtype=bool)
+    niveaux = []
+    for col in by:
+        c, u = pd.factorize(data[col], sort=True)
+        valides &= c >= 0
+        codes = codes * len(u) + c
+        niveaux.append(u)
+    codes[~valides] = -1
+    return codes, niveaux
+
+
+def _groupes(valeurs, etiquettes):
+    """Découpe des valeurs d'un segment, déjà triées par étiquette de groupe, en une vue par groupe."""
+    coupures = np.flatnonzero(etiquettes[1:] != etiquettes[:-1]) + 1
+    return np.split(valeurs, coupures)
+
+
+def _arguments(spec, valeurs, etiquettes, p0):
+    """Arguments de la fonction du test pour un segment (vues sur les tableaux triés, sans copie)."""
+    saisie = spec["saisie"]
+    if saisie == "proportion":
+        return (int(valeurs[:, 0].sum()), len(valeurs), p0)
+    if etiquettes is None:
+        return (valeurs[:, 0], valeurs[:, 1])
+    groupes = _groupes(valeurs[:, 0], etiquettes)
+    if saisie == "paires":
+        if len(groupes) != 2:
+            raise ValueError(f"{len(groupes)} groupe(s) dans le segment, 2 attendus")
+        return tuple(groupes)
+    return ([g for g in groupes if len(g) >= 2],)
+
+
+def _executer_segments(nom, valeurs, etiquettes, bornes, alpha, p0):
+    """Exécute le test sur chaque segment [début, fin) des tableaux triés ; une ligne de résultats par segment."""
+    spec = TESTS[nom]
+    runner = charger_runner(nom)
+    lignes = []
+    for debut, fin in bornes:
+        ligne = {"n": int(fin - debut)}
+        try:
+            args = _arguments(spec, valeurs[debut:fin], None if etiquettes is None else etiquettes[debut:fin], p0)
+            ligne.update(resumer_resultat(nom, runner(*args, alpha)))
+            ligne["status"] = "ok"
+        except Exception as e:
+            ligne["status"] = f"erreur : {e}"
+        lignes.append(ligne)
+    return lignes
+
+
+def run_by_segment(data, alpha=0.05, test="mann_whitney", by=(), columns=None, group=None, p0=0.5, workers=1,
+                   correction=None):
+    """Exécute un test sur chaque segment d'une table longue ; un tableau avec une ligne par segment.
+
+    by : colonnes clés des segments (pays, jour, bras…). columns : les deux colonnes appariées (X/Y) ou la colonne de
+    valeurs ; group : colonne des groupes comparés dans chaque segment (tests de groupes, ou Mann-Whitney au format
+    long). Pour le test de proportion, columns désigne la colonne des succès (0/1).
+    Les lignes sont triées une seule fois par (segment, groupe) ; chaque segment est une tranche des tableaux triés.
+    correction (bonferroni, holm, bh ou by) ajoute les p-values ajustées sur l'ensemble des segments.
+    """
+    nom = nom_par_cle(test)
+    spec = TESTS[nom]
+    if spec["saisie"] not in SAISIES_SEGMENTS or spec["statistique"] is None:
+        raise ValueError(f"Le test {test} ne peut pas être exécuté par segment.")
+    by = list(by)
+    if not by:
+        raise ValueError("Au moins une colonne clé de segment est nécessaire.")
+    columns = list(columns or spec["colonnes"])
+    if spec["saisie"] == "groupes" and group is None:
+        raise ValueError("Une colonne de groupes est nécessaire pour ce test.")
+    if group is None and spec["saisie"] == "paires" and len(columns) != 2:
+        raise ValueError("Deux colonnes de valeurs (ou une colonne de valeurs et une colonne de groupes) sont attendues.")
+    if group is not None or spec["saisie"] == "proportion":
+        columns = columns[:1]
+
+    codes, niveaux = segment_codes(data, by)
+    valeurs = np.column_stack([pd.to_numeric(data[c], errors="coerce").to_numpy(dtype=float) for c in columns])
+    garder = (codes >= 0) & ~np.isnan(valeurs).any(axis=1)
+    cle_tri = codes
+    etiquettes = None
+    if group is not None:
+        etiquettes, _ = pd.factorize(data[group], sort=True)
+        garder &= etiquettes >= 0
+        # Tri par segment puis par groupe : les groupes de chaque segment sont contigus
+        cle_tri = codes * (etiquettes.max(initial=0) + 1) + etiquettes
+
+    lignes_gardees = np.flatnonzero(garder)
+    ordre = lignes_gardees[np.argsort(cle_tri[lignes_gardees], kind="stable")]
+    codes = codes[ordre]
+    valeurs = valeurs[ordre]
+    if etiquettes is not None:
+        etiquettes = etiquettes[ordre]
+
+    debuts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=np.int64)
+    fins = np.r_[debuts[1:], len(codes)]
+    bornes = list(zip(debuts.tolist(), fins.tolist()))
+
+    if workers > 1 and len(bornes) > 1:
+        # Tranches contiguës de segments : chaque processus ne reçoit que les lignes de sa tranche
+        tranches = np.array_split(np.arange(len(bornes)), min(len(bornes), 4 * workers))
+        taches = []
+        for t in tranches:
+            if len(t) == 0:
+                continue
+            d, f = bornes[t[0]][0], bornes[t[-1]][1]
+            taches.append((valeurs[d:f], None if etiquettes is None else etiquettes[d:f],
+                           [(a - d, b - d) for a, b in bornes[t[0]:t[-1] + 1]]))
+        with ProcessPoolExecutor(max_workers=workers, initializer=charger_runner, initargs=(nom,)) as pool:
+            futures = [pool.submit(_executer_segments, nom, v, e, b, alpha, p0) for v, e, b in taches]
+            lignes = [ligne for fut in futures for ligne in fut.result()]
+    else:
+        lignes = _executer_segments(nom, valeurs, etiquettes, bornes, alpha, p0)
+
+    # Valeurs des clés de chaque segment, décodées depuis son numéro
+    indices = np.unravel_index(codes[debuts], [len(u) for u in niveaux]) if len(debuts) else [[] for _ in by]
+    resultats = pd.DataFrame({col: np.asarray(u)[i] for col, u, i in zip(by, niveaux, indices)})
+    colonnes = ["n", "statistic", "critical_value", "p_value", "reject", "status"]
+    resultats = pd.concat([resultats, pd.DataFrame(lignes, columns=colonnes)], axis=1)
+    if correction is not None:
+        resultats["p_adjusted"] = adjust_p_values(resultats["p_value"].to_numpy(dtype=float), correction)
+        resultats["reject_adjusted"] = resultats["p_adjusted"] <= alpha
+    return resultats
@@ -1,32 +1,28 @@
 from math import sqrt
+import numpy as np
+from utils.batch import as_rows, reshape_rows
+from utils.distributions import critical_value, p_value, p_values
+from utils.ranks import rank_average, rank_rows
 
 def compute_ranks(data):
     """Attribue les rangs en gérant les ex aequos."""
-    n = len(data)
-    sorted_data = sorted((val, i) for i, val in enumerate(data))
-    ranks = [0] * n
-    i = 0
-    while i < n:
-        j = i
-        while j < n and sorted_data[j][0] == sorted_data[i][0]:
-            j += 1
-        rank = (i + 1 + j) / 2  # moyenne des positions
-        for k in range(i, j):
-            ranks[sorted_data[k][1]] = rank
-        i = j
+    ranks, _ = rank_average(data)
     return ranks
 
-def run_spearman_test(x, y, alpha=0.05):
+def run_spearman_test(x, y, alpha=0.05, permutation=False, seed=0, bootstrap=False, workers=None, ranks=None):
     if len(x) != len(y):
         raise ValueError("Les deux séries doivent avoir la même taille.")
-    
-    n = len(x)
-    rx = compute_ranks(x)
-    ry = compute_ranks(y)
+    # Rangs (rx, ry) fournis quand ils sont déjà connus (état incrémental de la saisie), sinon calculés
+    if ranks is None:
+        rx = compute_ranks(x)
+        ry = compute_ranks(y)
+    else:
+        rx, ry = ranks
 
     # Calcul des différences de rangs
-    d_squared = [(rx[i] - ry[i]) ** 2 for i in range(n)]
-    sum_d2 = sum(d_squared)
+    d_squared = (rx - ry) ** 2
+    sum_d2 = float(d_squared.sum())
+    n = len(x)
 
     # Formule de Spearman
     rho = 1 - (6 * sum_d2) / (n * (n**2 - 1))
@@ -34,9 +30,11 @@ def run_spearman_test(x, y, alpha=0.05):
     # Approximation de la statistique Z (valable pour n > 10)
     if n > 10:
         z = rho * sqrt(n - 1)
-        z_crit = 1.96  # valeur critique à alpha = 0.05, bilatéral
+        z_crit = round(critical_value("norm", alpha, bilateral=True), 4)
+        p = p_value("norm", z, bilateral=True)
+        reject = bool(abs(z) > z_crit)
 
-        if abs(z) > z_crit:
+        if reject:
             conclusion = (
                 f"Au seuil de signification de {alpha:.2f}, la statistique de test Z = {z:.3f} "
                 f"dépasse la valeur critique ±{z_crit}. On conclut à l'existence d'une corrélation "
@@ -49,20 +47,72 @@ def run_spearman_test(x, y, alpha=0.05):
                 f"Aucune corrélation monotone significative ne peut être conclue."
             )
     else:
+        # n ≤ 10 : pas d'approximation normale, la p-value vient de la loi de permutation de ρ
+        from tests.permutation import permutation_spearman
         z = None
         z_crit = None
-        conclusion = (
-            f"Effectif insuffisant (n = {n}) pour utiliser l'approximation normale. "
-            f"Le test n'est pas interprétable pour n ≤ 10."
-        )
+        loi = permutation_spearman(x, y, alpha, seed=seed, workers=workers)
+        p = loi["p_value"]
+        methode = "exacte" if loi["exact"] else f"sur {loi['n_resamples']} permutations"
+        reject = bool(p <= alpha)
+        if reject:
+            conclusion = (
+                f"Effectif réduit (n = {n}) : p-value de permutation {methode} = {p:.4g} ≤ {alpha:.2f}. "
+                f"On conclut à l'existence d'une corrélation monotone significative entre les deux variables."
+            )
+        else:
+            conclusion = (
+                f"Effectif réduit (n = {n}) : p-value de permutation {methode} = {p:.4g} > {alpha:.2f}. "
+                f"Aucune corrélation monotone significative ne peut être conclue."
+            )
 
-    return {
+    result = {
         "rho": round(rho, 4),
         "z": round(z, 4) if z is not None else "N/A",
         "z_crit": z_crit,
+        "p_value": p,
+        "reject": reject,
         "conclusion": conclusion,
         "rangs_x": rx,
         "rangs_y": ry,
         "d²": d_squared,
         "sum_d2": sum_d2
     }
+    if n <= 10:
+        result["permutation"] = loi
+    elif permutation:
+        from tests.permutation import permutation_spearman
+        result["permutation"] = permutation_spearman(x, y, alpha, seed=seed, workers=workers)
+    if bootstrap:
+        from tests.bootstrap import bootstrap_spearman
+        result["bootstrap"] = bootstrap_spearman(x, y, alpha, seed=seed, workers=workers)
+    return result
+
+
+def spearman_batch(x, y, alpha=0.05, axis=-1):
+    """Spearman ligne par ligne sur des séries empilées (approximation normale pour n > 10)."""
+    x, shape = as_rows(x, axis)
+    y, _ = as_rows(y, axis)
+    n = x.shape[1]
+
+    rx, _ = rank_rows(x)
+    ry, _ = rank_rows(y)
+    sum_d2 = ((rx - ry) ** 2).sum(axis=1)
+    rho = 1 - (6 * sum_d2) / (n * (n ** 2 - 1))
+
+    z_crit = critical_value("norm", alpha, bilateral=True)
+    if n > 10:
+        z = rho * sqrt(n - 1)
+        p = p_values("norm", z, bilateral=True)
+    else:
+        z = np.full(len(rho), np.nan)
+        p = np.full(len(rho), np.nan)
+
+    return reshape_rows({
+        "rho": rho,
+        "sum_d2": sum_d2,
+        "z": z,
+        "z_crit": z_crit,
+        "p_value": p,
+        "reject": np.abs(z) > z_crit,
+    }, shape)
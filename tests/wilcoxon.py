@@ -1,45 +1,56 @@
 from math import sqrt
-from scipy.stats import norm
+import numpy as np
+from utils.batch import as_rows, reshape_rows
+from utils.distributions import critical_value, p_value, p_values
+from utils.exact import use_exact, wilcoxon_p_value
+from utils.ranks import rank_average, rank_rows, tie_correction
 
-def run_wilcoxon_test(x, y, alpha=0.05):
+def run_wilcoxon_test(x, y, alpha=0.05, method="auto", permutation=False, seed=0, workers=None):
     if len(x) != len(y):
         raise ValueError("Les deux séries doivent avoir la même taille.")
     
-    n = len(x)
-    diffs = [y[i] - x[i] for i in range(n)]
-    
+    diffs = np.asarray(y, dtype=float) - np.asarray(x, dtype=float)
+
     # Exclusion des différences nulles
-    data = [(abs(d), 1 if d > 0 else -1) for d in diffs if d != 0]
-    if not data:
+    diffs = diffs[diffs != 0]
+    if len(diffs) == 0:
         raise ValueError("Toutes les différences sont nulles.")
 
-    data.sort(key=lambda x: x[0])
-    
-    # Attribution des rangs
-    ranks = []
-    i = 0
-    while i < len(data):
-        j = i
-        while j < len(data) and data[j][0] == data[i][0]:
-            j += 1
-        rank_avg = (i + 1 + j) / 2
-        for k in range(i, j):
-            ranks.append((rank_avg, data[k][1]))
-        i = j
+    # Attribution des rangs sur |d|
+    ranks, sizes = rank_average(np.abs(diffs))
+    signs = np.where(diffs > 0, 1, -1)
 
     # Rangs positifs et négatifs
-    R_pos = sum(r for r, s in ranks if s > 0)
-    R_neg = sum(r for r, s in ranks if s < 0)
+    R_pos = float(ranks[signs > 0].sum())
+    R_neg = float(ranks[signs < 0].sum())
     W = min(R_pos, R_neg)
 
     n_eff = len(ranks)
     mu_W = n_eff * (n_eff + 1) / 4
-    sigma_W = sqrt(n_eff * (n_eff + 1) * (2 * n_eff + 1) / 24)
+    sigma_W = sqrt(n_eff * (n_eff + 1) * (2 * n_eff + 1) / 24 - tie_correction(sizes) / 48)
 
     z = (W - mu_W) / sigma_W
-    z_crit = norm.ppf(1 - alpha / 2)
+    z_crit = critical_value("norm", alpha, bilateral=True)
+
+    # Loi exacte de W (sans ex aequo, effectif modéré), sinon approximation normale
+    exact = use_exact("wilcoxon", n_eff, ties=bool((sizes > 1).any()), method=method)
+    if exact:
+        p = wilcoxon_p_value(W, n_eff)
+    else:
+        p = p_value("norm", z, bilateral=True)
 
-    if abs(z) > z_crit:
+    reject = bool(p <= alpha) if exact else bool(abs(z) > z_crit)
+    if exact and reject:
+        conclusion = (
+            f"Au seuil de {alpha:.2f}, la p-value exacte de W = {W:g} vaut {p:.4g}. "
+            f"On rejette H₀ : les deux échantillons diffèrent significativement."
+        )
+    elif exact:
+        conclusion = (
+            f"Au seuil de {alpha:.2f}, la p-value exacte de W = {W:g} vaut {p:.4g}. "
+            f"Aucune différence significative n’est détectée entre les deux échantillons."
+        )
+    elif reject:
         conclusion = (
             f"Au seuil de {alpha:.2f}, la statistique Z = {z:.3f} dépasse ±{z_crit:.3f}. "
             f"On rejette H₀ : les deux échantillons diffèrent significativement."
@@ -50,7 +61,7 @@ def run_wilcoxon_test(x, y, alpha=0.05):
             f"Aucune différence significative n’est détectée entre les deux échantillons."
         )
 
-    return {
+    result = {
         "W": round(W, 4),
         "R_pos": round(R_pos, 4),
         "R_neg": round(R_neg, 4),
@@ -58,6 +69,65 @@ def run_wilcoxon_test(x, y, alpha=0.05):
         "sigma_W": round(sigma_W, 4),
         "z": round(z, 4),
         "z_crit": round(z_crit, 4),
+        "p_value": p,
+        "reject": reject,
+        "methode": "exacte" if exact else "asymptotique",
         "conclusion": conclusion,
-        "ranks": ranks
+        "ranks": ranks,
+        "signs": signs
     }
+    if permutation:
+        # p-value par inversion des signes (exacte pour les petits échantillons)
+        from tests.permutation import permutation_wilcoxon
+        result["permutation"] = permutation_wilcoxon(x, y, alpha, seed=seed, workers=workers)
+    return result
+
+
+def wilcoxon_batch(x, y, alpha=0.05, axis=-1, method="auto"):
+    """Wilcoxon signé-rang ligne par ligne sur des paires empilées (observations le long de axis).
+
+    Les lignes sans ex aequo utilisent la loi exacte de W, une par nombre de paires non nulles.
+    """
+    x, shape = as_rows(x, axis)
+    y, _ = as_rows(y, axis)
+    diffs = y - x
+
+    # Les différences nulles forment la première plage de |d| : on les classe puis on retire leur place
+    ranks, correction = rank_rows(np.abs(diffs))
+    zeros = (diffs == 0).sum(axis=1)
+    ranks = ranks - zeros[:, None]
+    correction = correction - (zeros.astype(float) ** 3 - zeros)
+
+    R_pos = np.where(diffs > 0, ranks, 0.0).sum(axis=1)
+    R_neg = np.where(diffs < 0, ranks, 0.0).sum(axis=1)
+    W = np.minimum(R_pos, R_neg)
+
+    n_eff = diffs.shape[1] - zeros
+    mu_W = n_eff * (n_eff + 1) / 4
+    sigma_W = np.sqrt(n_eff * (n_eff + 1) * (2 * n_eff + 1) / 24 - correction / 48)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (W - mu_W) / sigma_W
+
+    z_crit = critical_value("norm", alpha, bilateral=True)
+    p = p_values("norm", z, bilateral=True)
+    reject = np.abs(z) > z_crit
+    exact = (correction == 0) & (n_eff > 0)
+    for m in np.unique(n_eff[exact]):
+        if use_exact("wilcoxon", m, method=method):
+            lignes = exact & (n_eff == m)
+            p[lignes] = wilcoxon_p_value(W[lignes], m)
+            reject[lignes] = p[lignes] <= alpha
+        else:
+            exact[n_eff == m] = False
+
+    return reshape_rows({
+        "W": W,
+        "R_pos": R_pos,
+        "R_neg": R_neg,
+        "n_eff": n_eff,
+        "z": z,
+        "z_crit": z_crit,
+        "p_value": p,
+        "exact": exact,
+        "reject": reject,
+    }, shape)
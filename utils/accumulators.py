@@ -0,0 +1,329 @@
+import numpy as np
+from utils.batch import BLOCK_ELEMENTS
+
+
+class MomentAccumulator:
+    """Effectif, moyenne et M2 d'une série, mis à jour par blocs et fusionnables (Welford / Chan)."""
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n = int(n)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+
+    @classmethod
+    def from_values(cls, values):
+        acc = cls()
+        acc.update(values)
+        return acc
+
+    def _transform(self, values):
+        return values
+
+    def update(self, values):
+        """Ajoute un bloc de valeurs (les NaN sont ignorés)."""
+        values = np.asarray(values, dtype=float).ravel()
+        values = self._transform(values[~np.isnan(values)])
+        n = len(values)
+        if n == 0:
+            return self
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        return self._combine(n, mean, m2)
+
+    def merge(self, other):
+        """Fusionne un accumulateur calculé sur une autre partie des données."""
+        return self._combine(other.n, other.mean, other.m2)
+
+    def _combine(self, n_b, mean_b, m2_b):
+        if n_b == 0:
+            return self
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else float("nan")
+
+    def deviations(self):
+        """Accumulateur des écarts absolus à la moyenne courante (seconde passe du test de Levene)."""
+        return DeviationAccumulator(center=self.mean)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(n={self.n}, mean={self.mean:.6g}, m2={self.m2:.6g})"
+
+
+class DeviationAccumulator(MomentAccumulator):
+    """Moments de |x - centre|, le centre étant fixé par une première passe."""
+
+    def __init__(self, center, n=0, mean=0.0, m2=0.0):
+        super().__init__(n, mean, m2)
+        self.center = float(center)
+
+    def _transform(self, values):
+        return np.abs(values - self.center)
+
+    def merge(self, other):
+        if getattr(other, "center", None) != self.center:
+            raise ValueError("Les accumulateurs d'écarts doivent partager le même centre.")
+        return super().merge(other)
+
+
+class PairAccumulator:
+    """Moments de deux séries appariées et leur co-moment, fusionnables entre blocs ou processus."""
+
+    def __init__(self, n=0, mean_x=0.0, mean_y=0.0, m2_x=0.0, m2_y=0.0, c_xy=0.0):
+        self.n = int(n)
+        self.mean_x = float(mean_x)
+        self.mean_y = float(mean_y)
+        self.m2_x = float(m2_x)
+        self.m2_y = float(m2_y)
+        self.c_xy = float(c_xy)
+
+    @classmethod
+    def from_values(cls, x, y):
+        acc = cls()
+        acc.update(x, y)
+        return acc
+
+    def update(self, x, y):
+        """Ajoute un bloc de paires (x, y) ; les paires incomplètes sont ignorées."""
+        x = np.asarray(x, dtype=float).ravel()
+        y = np.asarray(y, dtype=float).ravel()
+        if len(x) != len(y):
+            raise ValueError("Les deux séries doivent avoir la même taille.")
+        keep = ~(np.isnan(x) | np.isnan(y))
+        x = x[keep]
+        y = y[keep]
+        n = len(x)
+        if n == 0:
+            return self
+        mx = float(x.mean())
+        my = float(y.mean())
+        dx = x - mx
+        dy = y - my
+        return self._combine(n, mx, my, float(dx @ dx), float(dy @ dy), float(dx @ dy))
+
+    def merge(self, other):
+        return self._combine(other.n, other.mean_x, other.mean_y, other.m2_x, other.m2_y, other.c_xy)
+
+    def _combine(self, n_b, mx_b, my_b, m2x_b, m2y_b, cxy_b):
+        if n_b == 0:
+            return self
+        n = self.n + n_b
+        dx = mx_b - self.mean_x
+        dy = my_b - self.mean_y
+        w = self.n * n_b / n
+        self.mean_x += dx * n_b / n
+        self.mean_y += dy * n_b / n
+        self.m2_x += m2x_b + dx * dx * w
+        self.m2_y += m2y_b + dy * dy * w
+        self.c_xy += cxy_b + dx * dy * w
+        self.n = n
+        return self
+
+    def __repr__(self):
+        return (f"PairAccumulator(n={self.n}, mean_x={self.mean_x:.6g}, mean_y={self.mean_y:.6g}, "
+                f"c_xy={self.c_xy:.6g})")
+
+
+class PairColumnsAccumulator:
+    """Les moments de PairAccumulator pour p colonnes x appariées à une même série y, tenus dans des tableaux.
+
+    Chaque colonne garde ses propres paires complètes. Un bloc de lignes (n, p) met à jour toutes les colonnes à la
+    fois, avec les formules de fusion de PairAccumulator ; acc[j] renvoie l'accumulateur de la colonne j.
+    """
+
+    def __init__(self, p):
+        self.n = np.zeros(p, dtype=np.int64)
+        self.mean_x = np.zeros(p)
+        self.mean_y = np.zeros(p)
+        self.m2_x = np.zeros(p)
+        self.m2_y = np.zeros(p)
+        self.c_xy = np.zeros(p)
+
+    @classmethod
+    def from_values(cls, X, y):
+        X = np.asarray(X, dtype=float)
+        return cls(X.shape[1]).update(X, y)
+
+    def __len__(self):
+        return len(self.n)
+
+    def __getitem__(self, j):
+        return PairAccumulator(self.n[j], self.mean_x[j], self.mean_y[j], self.m2_x[j], self.m2_y[j], self.c_xy[j])
+
+    def update(self, X, y):
+        """Ajoute un bloc de lignes : tableau X (n, p) et série y (n) ; les paires incomplètes sont ignorées."""
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float).ravel()
+        if X.shape[0] != len(y):
+            raise ValueError("Les deux séries doivent avoir la même taille.")
+        valid = ~np.isnan(X) & ~np.isnan(y)[:, None]
+        n = valid.sum(axis=0)
+        diviseur = np.maximum(n, 1)
+        mx = np.where(valid, X, 0.0).sum(axis=0) / diviseur
+        my = np.where(valid, y[:, None], 0.0).sum(axis=0) / diviseur
+        dx = np.where(valid, X - mx, 0.0)
+        dy = np.where(valid, y[:, None] - my, 0.0)
+        return self._combine(n, mx, my, (dx * dx).sum(axis=0), (dy * dy).sum(axis=0), (dx * dy).sum(axis=0))
+
+    def merge(self, other):
+        return self._combine(other.n, other.mean_x, other.mean_y, other.m2_x, other.m2_y, other.c_xy)
+
+    def _combine(self, n_b, mx_b, my_b, m2x_b, m2y_b, cxy_b):
+        n = self.n + n_b
+        diviseur = np.maximum(n, 1)
+        dx = np.where(n_b > 0, mx_b - self.mean_x, 0.0)
+        dy = np.where(n_b > 0, my_b - self.mean_y, 0.0)
+        w = self.n * n_b / diviseur
+        self.mean_x += dx * n_b / diviseur
+        self.mean_y += dy * n_b / diviseur
+        self.m2_x += m2x_b + dx * dx * w
+        self.m2_y += m2y_b + dy * dy * w
+        self.c_xy += cxy_b + dx * dy * w
+        self.n = n
+        return self
+
+    def __repr__(self):
+        return f"PairColumnsAccumulator(p={len(self)}, n_max={int(self.n.max(initial=0))})"
+
+
+class ContingencyAccumulator:
+    """Tableau de contingence de deux variables qualitatives, construit par blocs et fusionnable.
+
+    Les modalités sont codées en entiers (un code global par modalité, attribué à sa première apparition). Seules les
+    cellules non vides sont conservées (clé ligne · 2³² + colonne) : un tableau 20 000 × 5 000 peu rempli reste petit.
+    Les effectifs d'un bloc sont comptés par bincount quand le tableau est de taille modérée, par tri sinon.
+    """
+
+    def __init__(self):
+        self.row_labels = []
+        self.col_labels = []
+        self._row_codes = {}
+        self._col_codes = {}
+        self._cles = np.zeros(0, dtype=np.int64)
+        self._effectifs = np.zeros(0, dtype=np.int64)
+        self._tampon = []  # cellules des blocs pas encore fusionnées
+        self._en_attente = 0
+
+    @classmethod
+    def from_values(cls, rows, cols):
+        acc = cls()
+        acc.update(rows, cols)
+        return acc
+
+    @property
+    def n(self):
+        self._consolider()
+        return int(self._effectifs.sum())
+
+    @property
+    def shape(self):
+        return len(self.row_labels), len(self.col_labels)
+
+    @staticmethod
+    def _coder(values, codes, labels):
+        """Codes globaux des valeurs d'un bloc : codage du bloc par hachage, puis une recherche par modalité du bloc."""
+        import pandas as pd
+        locaux, modalites = pd.factorize(values)
+        correspondance = np.array([_code(m, codes, labels) for m in modalites], dtype=np.int64)
+        return correspondance[locaux]
+
+    def _ajouter(self, cles, effectifs):
+        self._tampon.append((cles, effectifs))
+        self._en_attente += len(cles)
+        if self._en_attente > max(len(self._cles), BLOCK_ELEMENTS):
+            self._consolider()
+
+    def _consolider(self):
+        """Fusionne les cellules des blocs en attente : une clé par cellule non vide, triée."""
+        if not self._tampon:
+            return
+        cles = np.concatenate([self._cles] + [c for c, _ in self._tampon])
+        effectifs = np.concatenate([self._effectifs] + [e for _, e in self._tampon])
+        self._cles, inverse = np.unique(cles, return_inverse=True)
+        self._effectifs = np.bincount(inverse, weights=effectifs).astype(np.int64)
+        self._tampon = []
+        self._en_attente = 0
+
+    def update(self, rows, cols):
+        """Ajoute un bloc d'observations (modalité en ligne, modalité en colonne) ; les paires incomplètes sont ignorées."""
+        import pandas as pd
+        if len(rows) != len(cols):
+            raise ValueError("Les deux variables doivent avoir la même taille.")
+        keep = ~(np.asarray(pd.isna(rows)) | np.asarray(pd.isna(cols)))
+        if not keep.all():
+            rows, cols = (v[keep] if isinstance(v, pd.Series) else np.asarray(v)[keep] for v in (rows, cols))
+        if len(rows) == 0:
+            return self
+        r = self._coder(rows, self._row_codes, self.row_labels)
+        c = self._coder(cols, self._col_codes, self.col_labels)
+        lignes, colonnes = self.shape
+        if lignes * colonnes <= BLOCK_ELEMENTS:
+            comptes = np.bincount(r * colonnes + c, minlength=lignes * colonnes)
+            cellules = np.flatnonzero(comptes)
+            self._ajouter((cellules // colonnes << 32) + cellules % colonnes, comptes[cellules])
+        else:
+            self._ajouter(*np.unique((r << 32) + c, return_counts=True))
+        return self
+
+    def merge(self, other):
+        """Fusionne un accumulateur calculé sur une autre partie des données (modalités réalignées)."""
+        r = np.array([_code(m, self._row_codes, self.row_labels) for m in other.row_labels], dtype=np.int64)
+        c = np.array([_code(m, self._col_codes, self.col_labels) for m in other.col_labels], dtype=np.int64)
+        lignes, colonnes, effectifs = other.cells()
+        self._ajouter((r[lignes] << 32) + c[colonnes], effectifs)
+        return self
+
+    def cells(self):
+        """Cellules non vides : (codes des lignes, codes des colonnes, effectifs)."""
+        self._consolider()
+        return self._cles >> 32, self._cles & 0xFFFFFFFF, self._effectifs
+
+    def table(self, sparse=None):
+        """(effectifs, modalités en ligne, modalités en colonne), modalités triées quand elles sont comparables.
+
+        Les effectifs sont un tableau numpy, ou une matrice creuse scipy (CSR) quand sparse=True ; par défaut, la
+        matrice creuse est choisie au-delà de BLOCK_ELEMENTS cellules.
+        """
+        lignes = _ordre(self.row_labels)
+        colonnes = _ordre(self.col_labels)
+        rang_lignes = np.empty(len(lignes), dtype=np.int64)
+        rang_lignes[lignes] = np.arange(len(lignes))
+        rang_colonnes = np.empty(len(colonnes), dtype=np.int64)
+        rang_colonnes[colonnes] = np.arange(len(colonnes))
+        r, c, effectifs = self.cells()
+        r, c = rang_lignes[r], rang_colonnes[c]
+
+        if sparse is None:
+            sparse = len(lignes) * len(colonnes) > BLOCK_ELEMENTS
+        if sparse:
+            from scipy.sparse import csr_array
+            counts = csr_array((effectifs, (r, c)), shape=self.shape)
+        else:
+            counts = np.zeros(self.shape, dtype=np.int64)
+            counts[r, c] = effectifs
+        return counts, [self.row_labels[i] for i in lignes], [self.col_labels[j] for j in colonnes]
+
+    def __repr__(self):
+        return f"ContingencyAccumulator(n={self.n}, shape={self.shape}, cells={len(self._cles)})"
+
+
+def _code(modalite, codes, labels):
+    """Code global d'une modalité, attribué à sa première apparition."""
+    code = codes.get(modalite)
+    if code is None:
+        code = codes[modalite] = len(labels)
+        labels.append(modalite)
+    return code
+
+
+def _ordre(labels):
+    try:
+        return sorted(range(len(labels)), key=labels.__getitem__)
+    except TypeError:  # modalités de types mélangés : ordre d'apparition
+        return list(range(len(labels)))
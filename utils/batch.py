@@ -0,0 +1,36 @@
+import os
+import numpy as np
+
+# Nombre maximal d'éléments des tableaux intermédiaires traités en une fois (bornage mémoire)
+BLOCK_ELEMENTS = 4_000_000
+# Volume de calcul (observations × tirages) à partir duquel les lots d'un rééchantillonnage sont répartis entre
+# processus : en dessous, le démarrage des processus coûte plus que le calcul
+PARALLEL_MIN = 20_000_000
+
+
+def as_rows(values, axis=-1):
+    """Place l'axe des observations en dernier et aplatit les autres : tableau (lignes, n) et forme des lignes."""
+    values = np.moveaxis(np.asarray(values, dtype=float), axis, -1)
+    return values.reshape(-1, values.shape[-1]), values.shape[:-1]
+
+
+def row_blocks(n_rows, row_size):
+    """Tranches de lignes dont le tableau intermédiaire reste sous BLOCK_ELEMENTS éléments."""
+    step = max(1, BLOCK_ELEMENTS // max(row_size, 1))
+    for start in range(0, n_rows, step):
+        yield slice(start, min(start + step, n_rows))
+
+
+def worker_count(workers, volume):
+    """Nombre de processus d'un calcul de volume donné : workers=None pour tous les cœurs, 1 sous PARALLEL_MIN."""
+    if volume < PARALLEL_MIN:
+        return 1
+    return (os.cpu_count() or 1) if workers is None else max(1, int(workers))
+
+
+def reshape_rows(result, shape):
+    """Redonne aux statistiques par ligne la forme des lignes d'origine (scalaires laissés tels quels)."""
+    return {
+        key: value.reshape(shape) if isinstance(value, np.ndarray) and value.ndim == 1 else value
+        for key, value in result.items()
+    }
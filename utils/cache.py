@@ -0,0 +1,178 @@
+import hashlib
+import io
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.profiling import stage
+
+
+class LRUCache:
+    """Cache LRU borné en nombre d'entrées et, optionnellement, en octets."""
+
+    def __init__(self, max_entries=32, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key][0]
+
+    def put(self, key, value, size=0):
+        # Une entrée plus grosse que le cache entier n'est pas conservée
+        if self.max_bytes is not None and size > self.max_bytes:
+            return value
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                _, (_, old_size) = self._data.popitem(last=False)
+                self._bytes -= old_size
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Valeur en cache, ou calculée puis conservée (calcul hors verrou)."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value, size=estimate_size(value))
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+
+def estimate_size(value):
+    """Taille approximative en octets d'une valeur mise en cache."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if hasattr(value, "memory_usage"):  # DataFrame / Series pandas
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+# Caches partagés entre les sessions du serveur Streamlit
+DIGESTS = LRUCache(max_entries=64)
+FRAMES = LRUCache(max_entries=8, max_bytes=1024 ** 3)
+RESULTS = LRUCache(max_entries=256, max_bytes=64 * 1024 ** 2)
+FIGURES = LRUCache(max_entries=64, max_bytes=128 * 1024 ** 2)
+
+
+def file_digest(file):
+    """Empreinte du contenu d'un fichier importé, mémorisée par identifiant d'import."""
+    file_id = getattr(file, "file_id", None)
+    if file_id is not None and file_id in DIGESTS:
+        return DIGESTS.get(file_id)
+
+    h = hashlib.blake2b(digest_size=16)
+    if hasattr(file, "getbuffer"):
+        buf = file.getbuffer()
+        try:
+            h.update(buf)
+        finally:
+            buf.release()
+    else:
+        pos = file.tell()
+        file.seek(0)
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            h.update(block)
+        file.seek(pos)
+    digest = h.hexdigest()
+
+    if file_id is not None:
+        DIGESTS.put(file_id, digest)
+    return digest
+
+
+def data_digest(*series):
+    """Empreinte de séries de valeurs saisies (listes, tableaux, DataFrames ou listes de groupes)."""
+    h = hashlib.blake2b(digest_size=16)
+    for s in series:
+        if isinstance(s, (int, float, np.number)):
+            s = [s]  # paramètre scalaire (x, n, p0…)
+        elif isinstance(s, np.ndarray):
+            pass  # tableau (éventuellement 2D) : empreinte directe, forme comprise
+        elif hasattr(s, "columns"):
+            # DataFrame : noms des colonnes et empreinte pandas de chaque ligne (tous types de colonnes)
+            import pandas as pd
+            h.update(str(list(s.columns)).encode())
+            h.update(pd.util.hash_pandas_object(s, index=True).to_numpy().tobytes())
+            continue
+        elif len(s) and isinstance(s[0], (list, tuple, np.ndarray)):
+            # Liste de groupes : la taille de chaque groupe fait partie de l'empreinte
+            h.update(data_digest(*s).encode())
+            continue
+        arr = np.ascontiguousarray(s, dtype=float)
+        h.update(str(arr.shape).encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def cached_frame(file, reader):
+    """DataFrame lu une seule fois par contenu de fichier."""
+    def read():
+        file.seek(0)
+        with stage("lecture"):
+            return reader(file)
+
+    return FRAMES.get_or_compute(("frame", file_digest(file)), read)
+
+
+def cached_result(key, compute):
+    """Résultat d'un test, indexé par (test, données, colonnes, alpha)."""
+    return RESULTS.get_or_compute(key, compute)
+
+
+def cached_figure(key, make_figure):
+    """Image PNG d'une figure matplotlib, rendue une seule fois par clé."""
+    def render():
+        with stage("figure"):
+            import matplotlib.pyplot as plt
+            fig = make_figure()
+            buf = io.BytesIO()
+            fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
+            plt.close(fig)
+            return buf.getvalue()
+
+    return FIGURES.get_or_compute(key, render)
+
+
+def cached_stream(file, name, compute):
+    """Données lues par blocs (tableaux ou accumulateurs), mémorisées par contenu du fichier."""
+    def read():
+        with stage("lecture"):
+            return compute()
+
+    return FRAMES.get_or_compute(("flux", file_digest(file), name), read)
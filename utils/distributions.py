@@ -0,0 +1,91 @@
+import numpy as np
+from utils.cache import LRUCache
+
+# Seuils usuels et degrés de liberté dont les quantiles sont précalculés
+# (un seul appel scipy vectorisé par loi, au premier accès)
+ALPHAS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1)
+DDL_MAX = 200       # t et χ² : ddl de 1 à 200
+DDL_F_NUM = 20      # F : ddl numérateur de 1 à 20 (ddl dénominateur de 1 à DDL_MAX)
+
+# Quantiles hors table, mémorisés par (loi, niveau, ddl) ; les p-values, dont la statistique ne se répète
+# presque jamais, sont calculées directement
+QUANTILES = LRUCache(max_entries=4096)
+_TABLES = {}
+
+
+def _loi(nom):
+    """Loi scipy correspondant au nom ("norm", "t", "chi2", "f"), importée à la première utilisation."""
+    from scipy import stats
+    return {"norm": stats.norm, "t": stats.t, "chi2": stats.chi2, "f": stats.f}[nom]
+
+
+def _cle_ddl(ddl):
+    return tuple(int(d) if float(d).is_integer() else float(d) for d in ddl)
+
+
+def _niveaux():
+    # Niveaux unilatéraux (1 - α) et bilatéraux (1 - α/2) des seuils usuels
+    return sorted({round(1 - a, 12) for a in ALPHAS} | {round(1 - a / 2, 12) for a in ALPHAS})
+
+
+def _table(nom):
+    """Table {(ddl, niveau): quantile} de la loi, construite au premier accès."""
+    table = _TABLES.get(nom)
+    if table is None:
+        niveaux = np.array(_niveaux())
+        if nom == "norm":
+            grille = [()]
+        elif nom == "f":
+            grille = [(d1, d2) for d1 in range(1, DDL_F_NUM + 1) for d2 in range(1, DDL_MAX + 1)]
+        else:
+            grille = [(d,) for d in range(1, DDL_MAX + 1)]
+        params = np.array(grille, dtype=float).reshape(len(grille), -1)
+        valeurs = _loi(nom).ppf(niveaux[None, :], *(params[:, [j]] for j in range(params.shape[1])))
+        valeurs = np.broadcast_to(valeurs, (len(grille), len(niveaux)))
+        table = {
+            (ddl, float(niveau)): float(v)
+            for ddl, ligne in zip(grille, valeurs) for niveau, v in zip(niveaux, ligne)
+        }
+        _TABLES[nom] = table
+    return table
+
+
+def quantile(loi, niveau, *ddl):
+    """Quantile d'ordre `niveau` de la loi : table précalculée, sinon calcul mémorisé."""
+    niveau = round(float(niveau), 12)
+    ddl = _cle_ddl(ddl)
+    valeur = _table(loi).get((ddl, niveau))
+    if valeur is not None:
+        return valeur
+    return QUANTILES.get_or_compute((loi, niveau, ddl), lambda: float(_loi(loi).ppf(niveau, *ddl)))
+
+
+def critical_value(loi, alpha, *ddl, bilateral=False):
+    """Valeur critique au seuil alpha (1 - α, ou 1 - α/2 pour un test bilatéral)."""
+    return quantile(loi, 1 - alpha / 2 if bilateral else 1 - alpha, *ddl)
+
+
+def p_value(loi, stat, *ddl, bilateral=False):
+    """p-value exacte de la statistique observée (queue droite, ou 2 × queue de |stat| en bilatéral)."""
+    stat = float(stat)
+    if bilateral:
+        return float(min(1.0, 2 * _loi(loi).sf(abs(stat), *ddl)))
+    return float(_loi(loi).sf(stat, *ddl))
+
+
+def critical_values(loi, alpha, *ddl, bilateral=False):
+    """Valeurs critiques pour des tableaux de ddl : un seul calcul par combinaison distincte."""
+    if not ddl:
+        return critical_value(loi, alpha, bilateral=bilateral)
+    ddl = np.broadcast_arrays(*(np.asarray(d, dtype=float) for d in ddl))
+    combinaisons, inverse = np.unique(np.stack([d.ravel() for d in ddl], axis=1), axis=0, return_inverse=True)
+    valeurs = np.array([critical_value(loi, alpha, *c, bilateral=bilateral) for c in combinaisons])
+    return valeurs[inverse.ravel()].reshape(ddl[0].shape)
+
+
+def p_values(loi, stats, *ddl, bilateral=False):
+    """p-values d'un tableau de statistiques, en un seul appel scipy vectorisé."""
+    stats = np.asarray(stats, dtype=float)
+    if bilateral:
+        return np.minimum(1.0, 2 * _loi(loi).sf(np.abs(stats), *ddl))
+    return _loi(loi).sf(stats, *ddl)
@@ -0,0 +1,135 @@
+import threading
+import numpy as np
+from utils.cache import LRUCache, estimate_size
+
+# Tailles jusqu'auxquelles la loi exacte remplace l'approximation normale (mode "auto")
+MANN_WHITNEY_EXACT_MAX = 10_000                 # n1 · n2 (temps du calcul ≈ (n1 · n2)² / 4 opérations)
+MANN_WHITNEY_EXACT_BYTES = 16 * 1024 * 1024     # mémoire du calcul (deux colonnes de lois, ≈ 8 · m² · n octets)
+WILCOXON_EXACT_MAX = 300                        # paires non nulles
+
+# Fonctions de répartition calculées, mémorisées par tailles d'échantillons (mémoire bornée)
+LOIS = LRUCache(max_entries=256, max_bytes=64 * 1024 * 1024)
+# État du calcul de Mann-Whitney par plus petit effectif m : dernière colonne p(i, j), i = 0..m, et son j
+ETATS = LRUCache(max_entries=32, max_bytes=64 * 1024 * 1024)
+# Un verrou par m : une loi n'est pas construite deux fois en parallèle, sans bloquer les autres effectifs
+_VERROUS = {}
+_VERROU_VERROUS = threading.Lock()
+
+
+def _verrou(m):
+    with _VERROU_VERROUS:
+        return _VERROUS.setdefault(m, threading.Lock())
+
+
+def _memoire_mann_whitney(m, n):
+    """Octets d'une colonne p(i, n), i = 0..m (supports de tailles i·n + 1)."""
+    return 8 * ((m + 1) + n * m * (m + 1) // 2)
+
+
+def _loi_mann_whitney(m, n):
+    """P(U = u), u = 0..mn, sans ex aequo.
+
+    La plus grande observation vient du premier groupe avec probabilité i / (i + j) et dépasse alors les j
+    observations du second : p(u; i, j) = i/(i+j) · p(u - j; i - 1, j) + j/(i+j) · p(u; i, j - 1).
+    Seule la dernière colonne p(·, j) de chaque m est conservée : un effectif n plus grand prolonge le calcul au lieu
+    de le refaire ; un n plus petit le reprend depuis j = 0 (les lois finales sont de toute façon dans LOIS).
+    """
+    with _verrou(m):
+        etat = ETATS.get(m)
+        if etat is None or etat["j"] > n:
+            debut, colonne = 0, [np.ones(1)] * (m + 1)  # j = 0 : U = 0 quel que soit i
+        else:
+            debut, colonne = etat["j"], etat["colonne"]
+        for j in range(debut + 1, n + 1):
+            # Loi de p(i, j) sur son support 0..ij, à partir de p(i, j - 1) et de p(i - 1, j)
+            nouvelle = [colonne[0]]
+            for i in range(1, m + 1):
+                p = np.zeros(i * j + 1)
+                p[:len(colonne[i])] = j / (i + j) * colonne[i]
+                p[j:] += i / (i + j) * nouvelle[i - 1]
+                nouvelle.append(p)
+            colonne = nouvelle
+        if etat is None or etat["j"] < n:
+            ETATS.put(m, {"j": n, "colonne": colonne}, size=estimate_size(colonne))
+        return colonne[m]
+
+
+def _loi_wilcoxon(n):
+    """P(W⁺ = w), w = 0..n(n+1)/2, sans ex aequo : chaque rang i entre dans W⁺ avec probabilité 1/2."""
+    p = np.zeros(n * (n + 1) // 2 + 1)
+    p[0] = 1.0
+    for i in range(1, n + 1):
+        p[i:] += p[:-i].copy()
+        p /= 2
+    return p
+
+
+def mann_whitney_cdf(n1, n2):
+    """Fonction de répartition exacte de U pour des effectifs n1 et n2, calculée une fois par paire d'effectifs."""
+    m, n = sorted((int(n1), int(n2)))  # la loi de U est symétrique en (n1, n2)
+    return LOIS.get_or_compute(("mann_whitney", m, n), lambda: np.cumsum(_loi_mann_whitney(m, n)))
+
+
+def wilcoxon_cdf(n):
+    """Fonction de répartition exacte de W pour n paires non nulles, calculée une fois par effectif."""
+    return LOIS.get_or_compute(("wilcoxon", int(n)), lambda: np.cumsum(_loi_wilcoxon(int(n))))
+
+
+def use_exact(test, *sizes, ties=False, method="auto"):
+    """Vrai si la loi exacte doit être utilisée : demandée, ou mode "auto" sans ex aequo et effectifs modérés."""
+    if method == "asymptotic":
+        return False
+    if ties:
+        if method == "exact":
+            raise ValueError("Loi exacte indisponible en présence d'ex aequo.")
+        return False
+    if method == "exact":
+        return True
+    if method != "auto":
+        raise ValueError(f"Méthode inconnue : {method} (auto, exact ou asymptotic)")
+    if test == "mann_whitney":
+        m, n = sorted(sizes[:2])
+        return m * n <= MANN_WHITNEY_EXACT_MAX and 2 * _memoire_mann_whitney(m, n) <= MANN_WHITNEY_EXACT_BYTES
+    return sizes[0] <= WILCOXON_EXACT_MAX
+
+
+def _bilaterale(cdf, stat):
+    # Loi symétrique : p = 2 · P(T ≤ min(T, T_max - T))
+    p = np.minimum(1.0, 2 * cdf[np.rint(stat).astype(np.int64)])
+    return float(p) if np.ndim(p) == 0 else p
+
+
+def mann_whitney_p_value(U_obs, n1, n2):
+    """p-value bilatérale exacte de U_obs = min(U1, U2) (scalaire ou tableau)."""
+    return _bilaterale(mann_whitney_cdf(n1, n2), U_obs)
+
+
+def wilcoxon_p_value(W, n):
+    """p-value bilatérale exacte de W = min(R⁺, R⁻) (scalaire ou tableau)."""
+    return _bilaterale(wilcoxon_cdf(n), W)
+
+
+# Approximation normale du test de proportion jugée acceptable quand n·p₀ et n·(1 - p₀) atteignent ce seuil
+BINOMIAL_NORMAL_MIN = 5
+
+
+def use_binomial_exact(n, p0, method="auto"):
+    """Vrai (élément par élément) si le test de proportion doit utiliser la loi binomiale exacte."""
+    if method not in ("auto", "exact", "asymptotic"):
+        raise ValueError(f"Méthode inconnue : {method} (auto, exact ou asymptotic)")
+    n = np.asarray(n, dtype=float)
+    p0 = np.asarray(p0, dtype=float)
+    if method != "auto":
+        masque = np.full(np.broadcast(n, p0).shape, method == "exact")
+    else:
+        masque = np.minimum(n * p0, n * (1 - p0)) < BINOMIAL_NORMAL_MIN
+    return bool(masque) if masque.ndim == 0 else masque
+
+
+def binomial_p_value(x, n, p0):
+    """p-value bilatérale exacte de x succès sur n sous B(n, p₀) : 2 × la plus petite queue (scalaire ou tableau)."""
+    from scipy.stats import binom
+    x = np.asarray(x, dtype=float)
+    queue = np.minimum(binom.cdf(x, n, p0), binom.sf(x - 1, n, p0))
+    p = np.minimum(1.0, 2 * queue)
+    return float(p) if np.ndim(p) == 0 else p
@@ -0,0 +1,92 @@
+import numpy as np
+from utils.accumulators import MomentAccumulator
+
+
+def flatten_groups(groups):
+    """Concatène les groupes en un tableau de valeurs et un tableau d'étiquettes de groupe."""
+    arrays = [np.asarray(g, dtype=float) for g in groups]
+    sizes = np.array([len(a) for a in arrays], dtype=np.int64)
+    values = np.concatenate(arrays) if arrays else np.array([], dtype=float)
+    labels = np.repeat(np.arange(len(arrays)), sizes)
+    return values, labels
+
+
+def group_moments_labels(values, labels, n_groups=None):
+    """Effectif, moyenne et M2 (somme des carrés des écarts) de chaque groupe étiqueté."""
+    values = np.asarray(values, dtype=float)
+    labels = np.asarray(labels, dtype=np.int64)
+    if n_groups is None:
+        n_groups = int(labels.max()) + 1 if len(labels) else 0
+
+    counts = np.bincount(labels, minlength=n_groups)
+    sums = np.bincount(labels, weights=values, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+
+    # Écarts à la moyenne du groupe (et non sommes brutes) pour rester stable numériquement
+    m2 = np.bincount(labels, weights=(values - means[labels]) ** 2, minlength=n_groups)
+    return counts, means, m2
+
+
+def moments_from_accumulators(accumulators):
+    """Effectif, moyenne et M2 de chaque groupe à partir d'accumulateurs."""
+    counts = np.array([acc.n for acc in accumulators], dtype=np.int64)
+    means = np.array([acc.mean for acc in accumulators], dtype=float)
+    m2 = np.array([acc.m2 for acc in accumulators], dtype=float)
+    return counts, means, m2
+
+
+def group_moments(groups):
+    """Effectif, moyenne et M2 de chaque groupe (listes de valeurs ou accumulateurs)."""
+    if any(isinstance(g, MomentAccumulator) for g in groups):
+        return moments_from_accumulators(
+            [g if isinstance(g, MomentAccumulator) else MomentAccumulator.from_values(g) for g in groups]
+        )
+    values, labels = flatten_groups(groups)
+    return group_moments_labels(values, labels, len(groups))
+
+
+def sums_of_squares(counts, means, m2):
+    """Moyenne globale, SS inter-groupes et SS intra-groupes à partir des moments par groupe."""
+    N = counts.sum()
+    overall_mean = float((counts * means).sum() / N)
+    ss_between = float((counts * (means - overall_mean) ** 2).sum())
+    ss_within = float(m2.sum())
+    return overall_mean, ss_between, ss_within
+
+
+def stack_groups(groups, axis=-1):
+    """Groupes empilés (un tableau par groupe) : valeurs (lignes, N), étiquettes de groupe et forme des lignes."""
+    from utils.batch import as_rows
+    rows = [as_rows(g, axis) for g in groups]
+    shape = rows[0][1]
+    values = np.concatenate([r for r, _ in rows], axis=1)
+    labels = np.repeat(np.arange(len(rows)), [r.shape[1] for r, _ in rows])
+    return values, labels, shape
+
+
+def row_group_moments(values, labels, n_groups=None):
+    """Effectifs (k,), moyennes et M2 (lignes, k) de chaque groupe, pour chaque ligne d'un tableau 2D."""
+    values = np.asarray(values, dtype=float)
+    labels = np.asarray(labels, dtype=np.int64)
+    if n_groups is None:
+        n_groups = int(labels.max()) + 1
+
+    # Matrice d'appartenance (N, k) : les sommes par groupe deviennent un produit matriciel
+    membership = np.zeros((len(labels), n_groups))
+    membership[np.arange(len(labels)), labels] = 1.0
+
+    counts = np.bincount(labels, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (values @ membership) / counts
+    m2 = ((values - means[:, labels]) ** 2) @ membership
+    return counts, means, m2
+
+
+def row_sums_of_squares(counts, means, m2):
+    """Moyenne globale, SS inter et SS intra de chaque ligne."""
+    N = counts.sum()
+    overall_mean = (means * counts).sum(axis=1) / N
+    ss_between = (counts * (means - overall_mean[:, None]) ** 2).sum(axis=1)
+    ss_within = m2.sum(axis=1)
+    return overall_mean, ss_between, ss_within
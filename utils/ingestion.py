@@ -0,0 +1,169 @@
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from utils.accumulators import ContingencyAccumulator, MomentAccumulator, PairAccumulator, PairColumnsAccumulator
+from utils.batch import BLOCK_ELEMENTS
+
+# Nombre de lignes lues par bloc : borne la mémoire de pointe pendant la lecture
+CHUNK_SIZE = 200_000
+# Lignes lues pour reconnaître les colonnes numériques du fichier
+LIGNES_TYPES = 1000
+
+
+def _file_size(file):
+    size = getattr(file, "size", None)
+    if size is None:
+        pos = file.tell()
+        file.seek(0, 2)
+        size = file.tell()
+        file.seek(pos)
+    return size
+
+
+def read_header(file):
+    """Noms des colonnes du fichier, sans lire les données."""
+    file.seek(0)
+    columns = list(pd.read_csv(file, nrows=0).columns)
+    file.seek(0)
+    return columns
+
+
+def numeric_columns(file, nrows=LIGNES_TYPES):
+    """Colonnes numériques du fichier, d'après ses premières lignes (comme select_dtypes("number") en mémoire)."""
+    file.seek(0)
+    head = pd.read_csv(file, nrows=nrows)
+    file.seek(0)
+    return list(head.select_dtypes("number").columns)
+
+
+def iter_chunks(file, columns, chunksize=CHUNK_SIZE, progress=None, dtype=None):
+    """Parcourt le fichier par blocs en ne décodant que les colonnes demandées."""
+    total = _file_size(file)
+    file.seek(0)
+    for chunk in pd.read_csv(file, usecols=columns, chunksize=chunksize, dtype=dtype):
+        yield chunk
+        if progress is not None and total:
+            progress(min(file.tell() / total, 1.0))
+    if progress is not None:
+        progress(1.0)
+    file.seek(0)
+
+
+def _numeric_values(chunk, columns):
+    """Tableau float64 (lignes, colonnes) du bloc ; une valeur non numérique plus loin dans le fichier devient NaN."""
+    bloc = chunk[columns]
+    texte = [c for c in columns if not pd.api.types.is_numeric_dtype(bloc[c])]
+    if texte:
+        bloc = bloc.assign(**{c: pd.to_numeric(bloc[c], errors="coerce") for c in texte})
+    return bloc.to_numpy(dtype=float, na_value=np.nan)
+
+
+def _column_values(chunk, col):
+    values = chunk[col].to_numpy(dtype=float, na_value=np.nan)
+    return values[~np.isnan(values)]
+
+
+def stream_columns(file, columns, chunksize=CHUNK_SIZE, progress=None, drop_missing=True):
+    """Colonnes demandées sous forme de tableaux float64 (valeurs manquantes retirées, ou NaN si drop_missing=False)."""
+    parts = {col: [] for col in columns}
+    for chunk in iter_chunks(file, columns, chunksize, progress):
+        for col in columns:
+            if drop_missing:
+                parts[col].append(_column_values(chunk, col))
+            else:
+                parts[col].append(chunk[col].to_numpy(dtype=float, na_value=np.nan))
+    return {
+        col: np.concatenate(arrays) if arrays else np.array([], dtype=float)
+        for col, arrays in parts.items()
+    }
+
+
+def _lignes_par_bloc(n_columns, chunksize=None):
+    """Lignes par bloc de lecture d'un fichier large : le bloc (lignes, colonnes) reste sous BLOCK_ELEMENTS."""
+    return chunksize or max(1, min(CHUNK_SIZE, BLOCK_ELEMENTS // max(n_columns, 1)))
+
+
+@contextmanager
+def spilled_columns(file, columns, chunksize=None, progress=None):
+    """Lit le fichier une seule fois et recopie les colonnes en binaire dans un fichier temporaire.
+
+    Chaque bloc de lignes y est écrit transposé (colonne par colonne) : un groupe de colonnes consécutives se relit
+    ensuite par quelques lectures contiguës, sans analyser à nouveau le CSV. Fournit (n lignes, lire), où
+    lire(debut, fin) renvoie le tableau (n, fin - debut) des colonnes columns[debut:fin], NaN conservés.
+    Le fichier temporaire occupe n × len(columns) × 8 octets et est supprimé à la sortie du bloc with.
+    """
+    p = len(columns)
+    with tempfile.TemporaryFile() as disque:
+        lignes = []
+        for chunk in iter_chunks(file, columns, _lignes_par_bloc(p, chunksize), progress):
+            bloc = _numeric_values(chunk, columns)
+            disque.write(np.ascontiguousarray(bloc.T).tobytes())
+            lignes.append(len(bloc))
+        disque.flush()
+        n = sum(lignes)
+        stockage = np.memmap(disque, dtype=float, mode="r", shape=(n * p,)) if n else np.empty(0)
+        decalages = np.cumsum([0] + [p * r for r in lignes])
+
+        def lire(debut, fin):
+            morceaux = [stockage[d + debut * r:d + fin * r].reshape(fin - debut, r) for d, r in zip(decalages, lignes)]
+            return np.concatenate(morceaux, axis=1).T if morceaux else np.empty((0, fin - debut))
+
+        try:
+            yield n, lire
+        finally:
+            del stockage
+
+
+def stream_moments(file, columns, chunksize=CHUNK_SIZE, progress=None):
+    """Un accumulateur de moments par colonne, en une seule passe sur le fichier."""
+    accumulators = {col: MomentAccumulator() for col in columns}
+    for chunk in iter_chunks(file, columns, chunksize, progress):
+        for col in columns:
+            accumulators[col].update(_column_values(chunk, col))
+    return accumulators
+
+
+def stream_deviations(file, accumulators, chunksize=CHUNK_SIZE, progress=None):
+    """Seconde passe : moments des écarts absolus à la moyenne de chaque colonne (Levene)."""
+    deviations = {col: acc.deviations() for col, acc in accumulators.items()}
+    columns = list(deviations)
+    for chunk in iter_chunks(file, columns, chunksize, progress):
+        for col in columns:
+            deviations[col].update(_column_values(chunk, col))
+    return deviations
+
+
+def stream_pair(file, x_col, y_col, chunksize=CHUNK_SIZE, progress=None):
+    """Accumulateur apparié (moyennes, M2 et co-moment) de deux colonnes."""
+    acc = PairAccumulator()
+    for chunk in iter_chunks(file, [x_col, y_col], chunksize, progress):
+        acc.update(chunk[x_col].to_numpy(dtype=float, na_value=np.nan),
+                   chunk[y_col].to_numpy(dtype=float, na_value=np.nan))
+    return acc
+
+
+def stream_pair_columns(file, x_cols, y_col, chunksize=None, progress=None):
+    """Co-moments de chaque colonne de x_cols avec la colonne y_col (paires complètes), en une seule lecture."""
+    acc = PairColumnsAccumulator(len(x_cols))
+    for chunk in iter_chunks(file, [*x_cols, y_col], _lignes_par_bloc(len(x_cols) + 1, chunksize), progress):
+        acc.update(_numeric_values(chunk, x_cols), _numeric_values(chunk, [y_col])[:, 0])
+    return acc
+
+
+def stream_groups(file, min_count=2, chunksize=CHUNK_SIZE, progress=None):
+    """Chaque colonne ayant au moins min_count valeurs devient un groupe (un accumulateur par groupe)."""
+    accumulators = stream_moments(file, read_header(file), chunksize, progress)
+    return {col: acc for col, acc in accumulators.items() if acc.n >= min_count}
+
+
+def stream_contingency(file, row_col, col_col, chunksize=CHUNK_SIZE, progress=None):
+    """Tableau de contingence de deux colonnes qualitatives, en une seule passe.
+
+    Chaque bloc est lu en catégories (codes entiers, sans tableau d'objets Python par ligne) puis compté par bincount.
+    """
+    acc = ContingencyAccumulator()
+    colonnes = [row_col, col_col]
+    for chunk in iter_chunks(file, colonnes, chunksize, progress, dtype={col: "category" for col in colonnes}):
+        acc.update(chunk[row_col], chunk[col_col])
+    return acc
@@ -0,0 +1,65 @@
+import numpy as np
+
+# Corrections disponibles et leur nom complet (affichage)
+CORRECTIONS = {
+    "bonferroni": "Bonferroni",
+    "holm": "Holm",
+    "bh": "Benjamini-Hochberg",
+    "by": "Benjamini-Yekutieli",
+}
+
+
+def adjust_p_values(p, method="bh"):
+    """p-values ajustées pour m tests (tableau de forme quelconque), en O(m log m) : un seul tri.
+
+    Les p-values manquantes (NaN) restent manquantes et ne comptent pas dans m.
+    bonferroni et holm contrôlent le FWER ; bh (tests indépendants ou positivement dépendants) et by (dépendance
+    quelconque) contrôlent le FDR.
+    """
+    if method not in CORRECTIONS:
+        raise ValueError(f"Correction inconnue : {method} ({', '.join(CORRECTIONS)})")
+    p = np.asarray(p, dtype=float)
+    valides = ~np.isnan(p)
+    valeurs = p[valides]
+    m = len(valeurs)
+    ajustees = np.full(p.shape, np.nan)
+    if m == 0:
+        return ajustees
+
+    if method == "bonferroni":
+        ajustees[valides] = np.minimum(1.0, valeurs * m)
+        return ajustees
+
+    ordre = np.argsort(valeurs, kind="stable")
+    rangs = np.arange(1, m + 1)
+    if method == "holm":
+        # p(i) · (m - i + 1), rendu croissant par maximum cumulé
+        triees = np.maximum.accumulate(valeurs[ordre] * (m - rangs + 1))
+    else:
+        # p(i) · m / i, rendu croissant par minimum cumulé depuis la plus grande p-value
+        facteur = m * (np.sum(1.0 / rangs) if method == "by" else 1.0)
+        triees = np.minimum.accumulate((valeurs[ordre] * facteur / rangs)[::-1])[::-1]
+
+    resultat = np.empty(m)
+    resultat[ordre] = np.minimum(1.0, triees)
+    ajustees[valides] = resultat
+    return ajustees
+
+
+def correct(p, alpha=0.05, method="bh"):
+    """Correction des tests multiples : p-values ajustées et décisions au seuil alpha.
+
+    p est un tableau de p-values ou le résultat d'une fonction *_batch (clé "p_value").
+    """
+    if isinstance(p, dict):
+        p = p["p_value"]
+    ajustees = adjust_p_values(p, method)
+    reject = ajustees <= alpha  # NaN : jamais rejeté
+    return {
+        "method": method,
+        "alpha": alpha,
+        "m": int(np.count_nonzero(~np.isnan(ajustees))),
+        "p_adjusted": ajustees,
+        "reject": reject,
+        "n_reject": int(reject.sum()),
+    }
@@ -0,0 +1,187 @@
+from bisect import bisect_left, bisect_right, insort
+from math import isqrt
+import numpy as np
+
+
+class SortedRuns:
+    """Multiset de valeurs rangé en séquences triées de tailles décroissantes (fusions à la manière d'un arbre LSM).
+
+    Un lot de b valeurs est trié puis fusionné avec les séquences de taille inférieure ou égale : chaque valeur est
+    fusionnée O(log n) fois, d'où une insertion amortie en O(b log n). Les rangs d'un lot s'obtiennent par recherche
+    dichotomique dans chacune des O(log n) séquences.
+    """
+
+    def __init__(self, values=()):
+        self.runs = []
+        self.n = 0
+        if len(values):
+            self.insert(values)
+
+    def __len__(self):
+        return self.n
+
+    def insert(self, values):
+        """Ajoute un lot de valeurs."""
+        run = np.sort(np.asarray(values, dtype=float).ravel())
+        if len(run) == 0:
+            return self
+        self.n += len(run)
+        while self.runs and len(self.runs[-1]) <= len(run):
+            # Deux séquences triées concaténées : le tri par fusion les fusionne en temps linéaire
+            run = np.sort(np.concatenate([self.runs.pop(), run]), kind="mergesort")
+        self.runs.append(run)
+        return self
+
+    def counts(self, values):
+        """Pour chaque valeur : (nombre de valeurs strictement inférieures, nombre de valeurs égales)."""
+        values = np.asarray(values, dtype=float)
+        # Recherches faites sur le lot trié : accès mémoire ordonnés dans les grandes séquences
+        ordre = np.argsort(values, axis=None, kind="stable")
+        tries = values.ravel()[ordre]
+        less = np.zeros(len(tries), dtype=np.int64)
+        equal = np.zeros(len(tries), dtype=np.int64)
+        for run in self.runs:
+            gauche = np.searchsorted(run, tries, side="left")
+            less += gauche
+            equal += np.searchsorted(run, tries, side="right") - gauche
+        resultat_less = np.empty_like(less)
+        resultat_equal = np.empty_like(equal)
+        resultat_less[ordre] = less
+        resultat_equal[ordre] = equal
+        return resultat_less.reshape(values.shape), resultat_equal.reshape(values.shape)
+
+    def values(self):
+        """Toutes les valeurs, triées."""
+        if not self.runs:
+            return np.zeros(0)
+        return np.sort(np.concatenate(self.runs), kind="mergesort")
+
+
+class FenwickTree:
+    """Arbre de Fenwick (indexé binaire) sur des effectifs entiers, stocké dans un simple tableau.
+
+    Ajout à une case, somme d'un préfixe et recherche du k-ième élément en O(log m) pour m cases.
+    """
+
+    def __init__(self, counts=()):
+        counts = np.asarray(counts, dtype=np.int64)
+        m = len(counts)
+        # Construction en O(m) : la case i (base 1) couvre ]i - lowbit(i), i], somme lue sur les cumuls
+        cumuls = np.r_[0, np.cumsum(counts)]
+        i = np.arange(1, m + 1)
+        self.arbre = [0] + (cumuls[i] - cumuls[i - (i & -i)]).tolist()
+        self.m = m
+        self.total = int(cumuls[-1])
+
+    def add(self, i, delta=1):
+        """Ajoute delta à l'effectif de la case i (base 0)."""
+        self.total += delta
+        i += 1
+        while i <= self.m:
+            self.arbre[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        """Somme des effectifs des cases 0 à i - 1."""
+        s = 0
+        while i > 0:
+            s += self.arbre[i]
+            i -= i & -i
+        return s
+
+    def search(self, k):
+        """Plus petite case j dont le cumul des cases 0..j dépasse k (k-ième élément, base 0)."""
+        j = 0
+        pas = 1 << self.m.bit_length()
+        while pas:
+            if j + pas <= self.m and self.arbre[j + pas] <= k:
+                j += pas
+                k -= self.arbre[j]
+            pas >>= 1
+        return j
+
+
+class RankTree:
+    """Multiset ordonné de valeurs : insertion, suppression et rangs en O(log n) (arbre de Fenwick sur les rangs).
+
+    Les cases de l'arbre sont les valeurs distinctes connues, triées. Une valeur jamais vue attend dans une petite
+    liste triée, comptée à part ; l'arbre n'est reconstruit (en O(m), vectorisé) que lorsque cette liste dépasse
+    √m valeurs. Passer d'avance les valeurs possibles (universe) évite toute reconstruction.
+    """
+
+    def __init__(self, values=(), universe=()):
+        values = np.asarray(values, dtype=float).ravel()
+        cases = np.unique(np.concatenate([values, np.asarray(universe, dtype=float).ravel()]))
+        self._construire(cases, np.bincount(np.searchsorted(cases, values), minlength=len(cases)))
+
+    def _construire(self, cases, counts):
+        self.cases = cases.tolist()
+        self.counts = np.asarray(counts, dtype=np.int64).tolist()
+        self.arbre = FenwickTree(self.counts)
+        self.attente = []
+        self.seuil = max(16, isqrt(len(self.cases)))
+
+    def _reconstruire(self):
+        """Intègre les valeurs en attente à l'arbre ; les cases vides sont retirées."""
+        cases = np.asarray(self.cases + self.attente)
+        counts = np.r_[np.asarray(self.counts, dtype=np.int64), np.ones(len(self.attente), dtype=np.int64)]
+        cases, inverse = np.unique(cases, return_inverse=True)
+        counts = np.bincount(inverse, weights=counts, minlength=len(cases)).astype(np.int64)
+        self._construire(cases[counts > 0], counts[counts > 0])
+
+    def __len__(self):
+        return self.arbre.total + len(self.attente)
+
+    def _case(self, value):
+        """Case de la valeur dans l'arbre, ou None si elle n'y a pas de case."""
+        i = bisect_left(self.cases, value)
+        return i if i < len(self.cases) and self.cases[i] == value else None
+
+    def insert(self, value):
+        value = float(value)
+        i = self._case(value)
+        if i is not None:
+            self.counts[i] += 1
+            self.arbre.add(i, 1)
+            return
+        insort(self.attente, value)
+        if len(self.attente) > self.seuil:
+            self._reconstruire()
+
+    def delete(self, value):
+        value = float(value)
+        i = self._case(value)
+        if i is not None and self.counts[i] > 0:
+            self.counts[i] -= 1
+            self.arbre.add(i, -1)
+            return
+        j = bisect_left(self.attente, value)
+        if j == len(self.attente) or self.attente[j] != value:
+            raise KeyError(f"Valeur absente : {value}")
+        del self.attente[j]
+
+    def count_less(self, value):
+        """Nombre de valeurs strictement inférieures."""
+        return self.arbre.prefix(bisect_left(self.cases, value)) + bisect_left(self.attente, value)
+
+    def count_equal(self, value):
+        """Nombre de valeurs égales."""
+        i = self._case(value)
+        egales = self.counts[i] if i is not None else 0
+        return egales + bisect_right(self.attente, value) - bisect_left(self.attente, value)
+
+    def count_greater(self, value):
+        """Nombre de valeurs strictement supérieures."""
+        return len(self) - self.count_less(value) - self.count_equal(value)
+
+    def rank(self, value):
+        """Rang moyen (de 1 à n) d'une valeur présente, ex aequo compris."""
+        return self.count_less(value) + (self.count_equal(value) + 1) / 2
+
+    def select(self, k):
+        """k-ième plus petite valeur (base 0)."""
+        if not 0 <= k < len(self):
+            raise IndexError(k)
+        if self.attente:
+            self._reconstruire()
+        return self.cases[self.arbre.search(k)]
@@ -0,0 +1,168 @@
+"""Profilage facultatif d'une exécution du script : temps par étape, profil cProfile et pic mémoire du calcul.
+
+Les temps sont exclusifs : une étape imbriquée (lecture du fichier pendant la saisie…) n'est comptée qu'une fois.
+Un profil désactivé ne mesure rien et ne coûte qu'un appel de fonction par étape.
+Agrégation du journal : python -m utils.profiling [profiling.jsonl]
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Journal JSON lines des exécutions profilées (une ligne par exécution)
+JOURNAL = os.environ.get("STATS_APP_PROFILING_LOG", "profiling.jsonl")
+# Lignes du profil cProfile conservées (fonctions triées par temps cumulé)
+LIGNES_PROFIL = 25
+
+_LOCAL = threading.local()
+
+
+class Profiler:
+    """Temps de chaque étape d'une exécution, par blocs (stage) ou par jalons successifs (lap)."""
+
+    def __init__(self, enabled=True, cprofile=False, memory=False):
+        self.enabled = enabled
+        self.cprofile = cprofile
+        self.memory = memory
+        self.debut = self._dernier = time.perf_counter()
+        self.stages = {}
+        self.peak_bytes = None
+        self.profile_text = None
+        self.context = {}
+        self._pile = []            # étapes imbriquées en cours : [nom, début de la part non encore comptée]
+        self._debut_externe = 0.0
+        self._dans_etapes = 0.0    # temps passé dans des étapes depuis le dernier jalon
+
+    def _ajouter(self, name, secondes):
+        self.stages[name] = self.stages.get(name, 0.0) + secondes
+
+    @contextmanager
+    def stage(self, name):
+        """Bloc chronométré ; le temps d'une étape imbriquée est retiré de celle qui la contient."""
+        if not self.enabled:
+            yield
+            return
+        maintenant = time.perf_counter()
+        if self._pile:
+            parent = self._pile[-1]
+            self._ajouter(parent[0], maintenant - parent[1])
+        else:
+            self._debut_externe = maintenant
+        self._pile.append([name, maintenant])
+        try:
+            yield
+        finally:
+            maintenant = time.perf_counter()
+            nom, debut = self._pile.pop()
+            self._ajouter(nom, maintenant - debut)
+            if self._pile:
+                self._pile[-1][1] = maintenant
+            else:
+                self._dans_etapes += maintenant - self._debut_externe
+
+    def lap(self, name):
+        """Attribue à l'étape name le temps écoulé depuis le jalon précédent, hors blocs déjà chronométrés."""
+        if not self.enabled:
+            return
+        maintenant = time.perf_counter()
+        self._ajouter(name, max(0.0, maintenant - self._dernier - self._dans_etapes))
+        self._dernier = maintenant
+        self._dans_etapes = 0.0
+
+    def call(self, name, fonction, *args, **kwargs):
+        """Appel chronométré (le calcul du test), avec profil cProfile et pic mémoire tracemalloc sur demande."""
+        if not self.enabled:
+            return fonction(*args, **kwargs)
+        import tracemalloc
+        suivi_memoire = self.memory and not tracemalloc.is_tracing()
+        profileur = None
+        if self.cprofile:
+            import cProfile
+            profileur = cProfile.Profile()
+        if suivi_memoire:
+            tracemalloc.start()
+        try:
+            with self.stage(name):
+                return profileur.runcall(fonction, *args, **kwargs) if profileur else fonction(*args, **kwargs)
+        finally:
+            # Coût propre du profilage (arrêt du suivi mémoire, mise en forme du profil), compté à part
+            with self.stage("profilage"):
+                if suivi_memoire:
+                    self.peak_bytes = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                if profileur is not None:
+                    import io
+                    import pstats
+                    texte = io.StringIO()
+                    pstats.Stats(profileur, stream=texte).sort_stats("cumulative").print_stats(LIGNES_PROFIL)
+                    self.profile_text = texte.getvalue()
+
+    def finish(self, **context):
+        """Clôt l'exécution (le temps restant va à « autres ») et renvoie son enregistrement."""
+        if not self.enabled:
+            return None
+        self.lap("autres")
+        self.context.update(context)
+        return self.record()
+
+    def record(self):
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "total_s": round(time.perf_counter() - self.debut, 6),
+            "stages": {nom: round(s, 6) for nom, s in self.stages.items()},
+            "peak_mb": None if self.peak_bytes is None else round(self.peak_bytes / 1024 ** 2, 3),
+            "cprofile": self.profile_text is not None,
+            **self.context,
+        }
+
+    def append_log(self, record, path=None):
+        """Ajoute l'enregistrement au journal JSON lines."""
+        with open(path or JOURNAL, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+_INACTIF = Profiler(enabled=False)
+
+
+def start_run(enabled=False, cprofile=False, memory=False):
+    """Nouveau profil pour l'exécution en cours (propre au fil d'exécution, donc à la session)."""
+    _LOCAL.profil = Profiler(enabled, cprofile, memory) if enabled else _INACTIF
+    return _LOCAL.profil
+
+
+def current():
+    return getattr(_LOCAL, "profil", _INACTIF)
+
+
+def stage(name):
+    """Bloc chronométré dans le profil de l'exécution en cours (sans effet s'il est désactivé)."""
+    return current().stage(name)
+
+
+def aggregate_log(path=None, by="test"):
+    """Agrège le journal : pour chaque valeur de by et chaque étape, nombre d'exécutions, médiane, 95e centile et
+    maximum des temps (s)."""
+    import pandas as pd
+    lignes = []
+    with open(path or JOURNAL, encoding="utf-8") as f:
+        for texte in f:
+            if not texte.strip():
+                continue
+            record = json.loads(texte)
+            etapes = {**record.get("stages", {}), "total": record.get("total_s")}
+            lignes.extend({by: record.get(by), "etape": nom, "secondes": s} for nom, s in etapes.items())
+    if not lignes:
+        return pd.DataFrame(columns=[by, "etape", "n", "median", "p95", "max"])
+    return (pd.DataFrame(lignes)
+            .groupby([by, "etape"], dropna=False)["secondes"]
+            .agg(n="count", median="median", p95=lambda s: s.quantile(0.95), max="max")
+            .reset_index())
+
+
+if __name__ == "__main__":
+    import sys
+    import pandas as pd
+    with pd.option_context("display.max_rows", None, "display.width", 120):
+        print(aggregate_log(sys.argv[1] if len(sys.argv) > 1 else None))
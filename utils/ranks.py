@@ -0,0 +1,80 @@
+import numpy as np
+
+
+def tie_sizes(sorted_values):
+    """Tailles des plages de valeurs égales d'un tableau déjà trié."""
+    sorted_values = np.asarray(sorted_values)
+    if len(sorted_values) == 0:
+        return np.array([], dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1], True])
+    return np.diff(starts)
+
+
+def rank_average(values):
+    """Rangs moyens (de 1 à n) en gérant les ex aequo, avec la taille de chaque groupe d'ex aequo."""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n == 0:
+        return np.array([], dtype=float), np.array([], dtype=np.int64)
+
+    order = np.argsort(values, kind="mergesort")
+    sorted_values = values[order]
+
+    # Bornes des plages d'ex aequo dans l'ordre trié
+    bounds = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1], True])
+    sizes = np.diff(bounds)
+
+    # Une plage [i, j) occupe les positions i+1..j : rang moyen (i + 1 + j) / 2
+    avg = (bounds[:-1] + bounds[1:] + 1) / 2
+
+    ranks = np.empty(n, dtype=float)
+    ranks[order] = np.repeat(avg, sizes)
+    return ranks, sizes
+
+
+def tie_correction(sizes):
+    """Terme de correction des ex aequo : somme des t³ - t."""
+    sizes = np.asarray(sizes, dtype=float)
+    return float((sizes ** 3 - sizes).sum())
+
+
+def rank_rows(values):
+    """Rangs moyens de chaque ligne d'un tableau 2D, avec la correction Σ(t³ - t) de chaque ligne."""
+    values = np.asarray(values, dtype=float)
+    m, n = values.shape
+    if n == 0:
+        return np.empty((m, 0)), np.zeros(m)
+
+    order = np.argsort(values, axis=1, kind="mergesort")
+    sorted_values = np.take_along_axis(values, order, axis=1)
+
+    # Début de chaque plage d'ex aequo ; les plages sont numérotées sur le tableau aplati
+    starts = np.ones((m, n), dtype=bool)
+    starts[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    starts = starts.ravel()
+    run_id = np.cumsum(starts) - 1
+    first = np.flatnonzero(starts)
+    sizes = np.bincount(run_id)
+
+    # Plage commençant à la position i de sa ligne : rang moyen i + (t + 1) / 2
+    avg = first % n + (sizes + 1) / 2
+    ranks = np.empty((m, n), dtype=float)
+    np.put_along_axis(ranks, order, avg[run_id].reshape(m, n), axis=1)
+
+    correction = np.bincount(first // n, weights=sizes.astype(float) ** 3 - sizes, minlength=m)
+    return ranks, correction
+
+
+def dense_rank_rows(values):
+    """Rangs denses (0, 1, 2… sans trou entre ex aequo) de chaque ligne d'un tableau 2D."""
+    values = np.asarray(values, dtype=float)
+    m, n = values.shape
+    if n == 0:
+        return np.empty((m, 0), dtype=np.int64)
+    order = np.argsort(values, axis=1, kind="mergesort")
+    sorted_values = np.take_along_axis(values, order, axis=1)
+    starts = np.zeros((m, n), dtype=np.int64)
+    starts[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    ranks = np.empty((m, n), dtype=np.int64)
+    np.put_along_axis(ranks, order, np.cumsum(starts, axis=1), axis=1)
+    return ranks
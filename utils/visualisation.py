@@ -45,3 +45,29 @@ def afficher_diff_ligne(x, y):                  #pour wilcoxon
     ax.set_ylabel("Différence")
     ax.grid(True)
     return fig
+
+
+def afficher_repartition(x, n):                 #pour le test de proportion
+    fig, ax = plt.subplots()
+    ax.bar(["Succès", "Échecs"], [x, n - x], color=["green", "gray"])
+    ax.set_title("Répartition des succès et échecs")
+    return fig
+
+
+def afficher_heatmap(matrice, labels, titre="Matrice de corrélations"):    #pour la matrice de corrélations
+    p = len(labels)
+    taille = min(4 + p * 0.3, 12)
+    fig, ax = plt.subplots(figsize=(taille, taille * 0.85))
+    image = ax.imshow(matrice, cmap="coolwarm", vmin=-1, vmax=1, interpolation="nearest")
+    fig.colorbar(image, ax=ax, fraction=0.046, pad=0.04)
+    # Noms des variables seulement s'ils restent lisibles
+    if p <= 40:
+        ax.set_xticks(range(p))
+        ax.set_yticks(range(p))
+        ax.set_xticklabels(labels, rotation=90)
+        ax.set_yticklabels(labels)
+    else:
+        ax.set_xticks([])
+        ax.set_yticks([])
+    ax.set_title(titre)
+    return fig